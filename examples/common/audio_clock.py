@@ -0,0 +1,90 @@
+import time
+
+
+class AudioClock:
+    """
+    AudioClock is the shared audio time of a stream: an integer count of the samples captured so
+    far, advanced by the audio producer (e.g. the microphone callback) by each packet's actual
+    length. Cursors derived from it are exact, with no rounding drift however long the session
+    runs, and packets of any size are accounted for.
+
+    Every advance also records the monotonic time at which it happened, which correlates audio
+    time with wall-clock time, e.g. to extrapolate the cursor between packets or to find when a
+    given audio position was captured.
+
+    A single thread advances the clock; any thread may read it.
+    """
+
+    def __init__(self, sample_rate: int):
+        """
+        Initializes the AudioClock at sample 0.
+
+        Args:
+            sample_rate (int): Sample rate of the audio counted by the clock.
+        """
+        self.sample_rate = sample_rate
+        # (samples, monotonic time of the last advance, samples in the last advance), replaced as one
+        # object so readers always see a consistent snapshot
+        self._anchor = (0, None, 0)
+
+    @property
+    def samples(self) -> int:
+        return self._anchor[0]
+
+    @property
+    def seconds(self) -> float:
+        """
+        The audio cursor: seconds of audio captured so far.
+        """
+        return self._anchor[0] / self.sample_rate
+
+    def advance(self, num_samples: int, monotonic_time: float = None) -> int:
+        """
+        Advances the clock by a packet of audio.
+
+        Args:
+            num_samples (int): Samples in the packet, per channel.
+            monotonic_time (float, optional): time.monotonic() when the packet was captured; defaults to now.
+
+        Returns:
+            int: The new sample count.
+        """
+        samples = self._anchor[0] + num_samples
+        self._anchor = (samples, time.monotonic() if monotonic_time is None else monotonic_time, num_samples)
+        return samples
+
+    def seconds_at(self, monotonic_time: float = None) -> float:
+        """
+        Estimates the audio cursor at a monotonic time by extrapolating from the last advance. The
+        extrapolation is capped at the length of the last packet, so the estimate stops growing
+        when audio stops arriving.
+
+        Args:
+            monotonic_time (float, optional): The monotonic time; defaults to now.
+
+        Returns:
+            float: Estimated audio cursor in seconds.
+        """
+        samples, anchor_time, packet_samples = self._anchor
+        if anchor_time is None:
+            return 0.0
+        if monotonic_time is None:
+            monotonic_time = time.monotonic()
+        elapsed = min(max(monotonic_time - anchor_time, 0.0), packet_samples / self.sample_rate)
+        return samples / self.sample_rate + elapsed
+
+    def monotonic_at(self, seconds: float) -> float:
+        """
+        Estimates the monotonic time at which the audio at `seconds` was (or will be) captured,
+        assuming audio keeps arriving in real time.
+
+        Returns:
+            float: The monotonic time, or None before the first advance.
+        """
+        samples, anchor_time, _ = self._anchor
+        if anchor_time is None:
+            return None
+        return anchor_time + seconds - samples / self.sample_rate
+
+    def reset(self):
+        self._anchor = (0, None, 0)
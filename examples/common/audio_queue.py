@@ -0,0 +1,111 @@
+import queue
+import threading
+from collections import deque
+
+from common.metrics import VAD_DROPPED_SAMPLES, VAD_QUEUE_DEPTH
+
+
+# What AudioQueue.put does when the queue is full:
+#   "block": wait until the consumer makes room
+#   "drop_oldest": drop the oldest queued packet
+#   "defer_in_speech": drop the oldest queued packet unless the audio VAD processed last was
+#                      speech; while it is, the queue may grow past its bound, so a backlog
+#                      building up during an utterance does not cut it. Queued packets have not
+#                      been run through VAD yet, so a dropped packet may still hold speech, e.g.
+#                      the onset of the next utterance
+AUDIO_QUEUE_POLICIES = ("block", "drop_oldest", "defer_in_speech")
+DEFAULT_MAX_PACKETS = 32 # About 3 s of audio in 96 ms packets
+BYTES_PER_SAMPLE = 2 # int16 PCM
+
+
+class AudioQueue:
+    """
+    AudioQueue is a bounded packet queue between an audio producer and the VAD worker. When VAD
+    falls behind real time, the queue applies its policy instead of growing without limit, so an
+    overloaded host loses VAD accuracy gradually rather than adding seconds of endpoint latency.
+
+    Dropped audio is accounted for: `get` returns, with each packet, the number of samples dropped
+    just before it, so the consumer can advance its timeline (see VADStream.skip) and later VAD
+    timestamps stay aligned with the audio clock.
+    """
+
+    def __init__(self, max_packets: int = DEFAULT_MAX_PACKETS, policy: str = "drop_oldest", is_speech=None, channels: int = 1, name: str = "audio_queue"):
+        """
+        Initializes the AudioQueue.
+
+        Args:
+            max_packets (int): Packets held before the policy applies.
+            policy (str): One of AUDIO_QUEUE_POLICIES.
+            is_speech (Callable, optional): Returns True while VAD is in speech; required for "defer_in_speech".
+            channels (int): Interleaved channels per packet, used to count samples.
+            name (str): The queue's `source` label in the vad_queue_depth_packets metric.
+        """
+        if policy not in AUDIO_QUEUE_POLICIES:
+            raise ValueError(f"Unknown audio queue policy '{policy}' (supported: {', '.join(AUDIO_QUEUE_POLICIES)})")
+        if policy == "defer_in_speech" and is_speech is None:
+            raise ValueError("The defer_in_speech policy needs an is_speech callable")
+        self.max_packets = max_packets
+        self.policy = policy
+        self.is_speech = is_speech
+        self.bytes_per_frame = BYTES_PER_SAMPLE * channels
+        self.dropped_packets = 0
+        self.dropped_samples = 0
+        self._packets = deque() # [data, samples dropped just before it]
+        self._skipped = 0 # Samples dropped while the queue was empty
+        self._condition = threading.Condition()
+        self._depth = VAD_QUEUE_DEPTH.labels(name)
+
+    def qsize(self) -> int:
+        return len(self._packets)
+
+    def empty(self) -> bool:
+        return not self._packets
+
+    def put(self, data: bytes):
+        """
+        Queues a packet, applying the policy if the queue is full.
+        """
+        with self._condition:
+            if len(self._packets) >= self.max_packets:
+                if self.policy == "block":
+                    self._condition.wait_for(lambda: len(self._packets) < self.max_packets)
+                elif self.policy == "drop_oldest" or not self.is_speech():
+                    while len(self._packets) >= self.max_packets:
+                        self._drop_oldest()
+
+            self._packets.append([data, self._skipped])
+            self._skipped = 0
+            self._depth.set(len(self._packets))
+            self._condition.notify_all()
+
+    def _drop_oldest(self):
+        data, skipped = self._packets.popleft()
+        samples = skipped + len(data) // self.bytes_per_frame
+        if self._packets:
+            self._packets[0][1] += samples
+        else:
+            self._skipped += samples
+        self.dropped_packets += 1
+        self.dropped_samples += len(data) // self.bytes_per_frame
+        VAD_DROPPED_SAMPLES.inc(len(data) // self.bytes_per_frame)
+
+    def get(self, timeout: float = None) -> tuple:
+        """
+        Takes the oldest packet.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a packet.
+
+        Returns:
+            tuple: (packet bytes, samples dropped just before the packet)
+
+        Raises:
+            queue.Empty: If no packet arrived within `timeout`.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._packets, timeout):
+                raise queue.Empty
+            data, skipped = self._packets.popleft()
+            self._depth.set(len(self._packets))
+            self._condition.notify_all()
+            return data, skipped
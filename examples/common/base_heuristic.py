@@ -1,39 +1,85 @@
+from common.history import BoundedHistory
+from common.scheduler import AudioScheduler
+from common.sinks import utterance_payload
+from common.utterance_builder import UtteranceBuilder
+
+
+EVENT_HISTORY_SIZE = 500 # Logged events kept per heuristic; more than any display shows
+UTTERANCE_HISTORY_SIZE = 100 # Completed utterances kept per heuristic
+
+
 class Heuristic:
-    def __init__(self, pause_threshold: float = 0.5):
+    def __init__(self, pause_threshold: float = 0.5, event_history_size: int = EVENT_HISTORY_SIZE, utterance_history_size: int = UTTERANCE_HISTORY_SIZE, on_utterance_evicted=None, sinks: list = None):
         self.pause_threshold = pause_threshold
         self.audio_cursor = 0
         self.vad_speech_detected = False
         self.vad_speech_end_at = None
         self.current_result = None
         self.last_transcript_result = None
-        self.current_utterance = ""
-        self.current_utterance_start = None
+        self.utterance = UtteranceBuilder() # Transcript and words not yet endpointed
         self.current_utterance_end = None
         self.last_word_end = 0
-        self.completed_utterances = []
-        self.events = []
+        self.completed_utterances = BoundedHistory(utterance_history_size, on_utterance_evicted)
+        self.events = BoundedHistory(event_history_size)
+        self.sinks = sinks or [] # UtteranceSinks receiving every completed utterance
+        self.channel = None # Input channel of a multichannel stream, set by MultichannelHeuristic
+        self.vad_frames = None # VADFrames of the latest packet, from "vad_frames" events
+        # Timers keyed on the audio cursor, fired by process(); "tick" events advance them without new data
+        self.scheduler = AudioScheduler()
         self._event_handlers = {}
         self._event_handlers = self.__class__._event_handlers.copy()
     
     @classmethod
     def event_handler(cls, event_type):
         def decorator(f):
-            if not hasattr(cls, '_class_event_handlers'):
-                cls._class_event_handlers = {}
-            cls._class_event_handlers[event_type] = f
+            f._handles_event_type = event_type
             return f
         return decorator
     
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
-        if hasattr(cls, '_class_event_handlers'):
-            cls._event_handlers = cls._class_event_handlers.copy()
-        else:
-            cls._event_handlers = {}
+        # Inherit the parent's handlers and add the ones decorated in this class's body, so
+        # heuristics defined in the same process do not share handlers
+        cls._event_handlers = dict(getattr(cls, '_event_handlers', {}))
+        for attribute in vars(cls).values():
+            event_type = getattr(attribute, '_handles_event_type', None)
+            if event_type is not None:
+                cls._event_handlers[event_type] = attribute
+
+    def handle_vad_frames(self, event):
+        """
+        Keeps the per-frame speech probabilities of the latest packet. Subclasses can extend this
+        handler to smooth them or make their own decisions (see common/vad_frames.py).
+        """
+        self.vad_frames = event.get("data")
+
+    # Handlers available to every heuristic; subclasses inherit them in __init_subclass__
+    _event_handlers = {"vad_frames": handle_vad_frames}
 
     def process(self, event: dict) -> dict:
         event_type = event.get("event_type")
         handler = self._event_handlers.get(event_type)
-        if handler:
-            return handler(self, event)
-        return {}
\ No newline at end of file
+        # Timers due before this event fire first, then those the handler made due
+        self.scheduler.advance(self.audio_cursor)
+        result = handler(self, event) if handler else {}
+        self.scheduler.advance(self.audio_cursor)
+        return result
+
+    def _complete_utterance(self, utterance):
+        """
+        Records a completed utterance and publishes it to the sinks. Publishing only queues the
+        utterance, so endpointing is never held up by a downstream consumer.
+
+        Args:
+            utterance (UtteranceRecord): The completed utterance.
+        """
+        utterance.channel = self.channel
+        self.completed_utterances.append(utterance)
+        if self.sinks:
+            self._publish(utterance_payload(utterance, self.audio_cursor))
+
+    def _publish(self, payload: dict):
+        if self.channel is not None:
+            payload["channel"] = self.channel
+        for sink in self.sinks:
+            sink.publish(payload)
\ No newline at end of file
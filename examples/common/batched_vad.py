@@ -0,0 +1,338 @@
+import queue
+import threading
+import time
+from typing import Callable, Hashable
+import numpy as np
+
+from common.audio_clock import AudioClock
+from common.audio_queue import AudioQueue
+from common.energy_gate import EnergyGate, GatedFrames
+from common.frame_buffer import FrameBuffer
+from common.metrics import VAD_QUEUE_DEPTH, VAD_INFERENCE_SECONDS, VAD_FRAMES, VAD_GATED_FRAMES, VAD_LAG_MS
+from common.resampler import StreamingResampler
+from common.vad import VADTrigger, VAD_SAMPLE_RATE, VAD_CHUNK, VAD_CHUNK_DURATION, VAD_CONTEXT, VAD_STATE_SIZE
+from common.vad_backends import VADBackend, get_vad_backend
+from common.vad_frames import FrameRecorder
+
+
+DEFAULT_MAX_BATCH_SIZE = 256
+
+
+class VADSession:
+    """
+    VADSession holds everything the BatchedVADEngine keeps per stream: pending input packets,
+    the resampler and framing state, the model's recurrent state and audio context, the
+    VADTrigger that turns probabilities into start/end events, and an optional EnergyGate.
+
+    A session covers one channel of its packets: with interleaved multichannel PCM, each channel
+    gets its own session fed the same packets, and reads its samples as a strided view.
+
+    With `process_vad_frames`, the probabilities of the session's frames are also delivered as
+    VADFrames once per tick.
+    """
+
+    def __init__(self, session_id: Hashable, process_vad_event: Callable, input_sample_rate: int, min_silence_duration_ms: float, gate: EnergyGate = None, channels: int = 1, channel: int = 0, speculative: bool = False, process_vad_frames: Callable = None):
+        self.session_id = session_id
+        self.channels = channels
+        self.channel = channel
+        self.process_vad_event = process_vad_event
+        self.input_sample_rate = input_sample_rate
+        self.samples_processed = 0 # Input samples per channel consumed, including skipped ones
+        self.trigger = VADTrigger(threshold=0.4, min_silence_duration_ms=min_silence_duration_ms, speech_pad_ms=0, speculative=speculative)
+        self.resampler = StreamingResampler(input_sample_rate, VAD_SAMPLE_RATE)
+        self.frame_buffer = FrameBuffer(VAD_CHUNK)
+        self.packets = queue.SimpleQueue()
+        self.state = np.zeros((2, VAD_STATE_SIZE), dtype=np.float32)
+        self.context = np.zeros(VAD_CONTEXT, dtype=np.float32)
+        self.gate = gate
+        self.gated = GatedFrames(VAD_CHUNK) # Recent chunks skipped by the gate, replayed when it reopens
+        self.frames = None
+        self.process_vad_frames = process_vad_frames
+        self.frame_recorder = FrameRecorder(VAD_SAMPLE_RATE, channel if channels > 1 else None)
+        self.trigger.on_probability = self.frame_recorder
+
+    def drain(self):
+        """
+        Resamples and frames every packet pushed since the last tick.
+        """
+        while True:
+            try:
+                data = self.packets.get_nowait()
+            except queue.Empty:
+                break
+            audio_int16 = np.frombuffer(data, dtype=np.int16)[self.channel::self.channels]
+            self.samples_processed += len(audio_int16)
+            self.frame_buffer.write(self.resampler.process(audio_int16, scale=1 / 32768.0))
+        self.frames = self.frame_buffer.frames()
+
+    def skip(self, num_samples: int) -> dict:
+        """
+        Accounts for input samples that were dropped without running VAD, as VADStream.skip does:
+        the gap is treated as silence, and the model restarts from a clean state after it.
+
+        Args:
+            num_samples (int): Number of dropped samples per channel at the input sample rate.
+
+        Returns:
+            dict: {'end': ...} if the skipped silence ends the current speech, otherwise None.
+        """
+        self.samples_processed += num_samples
+        self.resampler.reset()
+        self.frame_buffer.reset()
+        self.state[:] = 0.0
+        self.context[:] = 0.0
+        self.gated.clear()
+        vad_samples = self.samples_processed * VAD_SAMPLE_RATE // self.input_sample_rate
+        return self.trigger.skip(vad_samples - self.trigger.current_sample, return_seconds=True)
+
+
+class BatchedVADEngine:
+    """
+    BatchedVADEngine serves many independent VAD streams from a single silero-vad backend.
+
+    Each tick gathers the next pending 512-sample chunk from every active session and runs one
+    batched forward pass, passing each session's recurrent state and audio context explicitly.
+    Speech start/end triggering is applied per session, so every stream sees the same events it
+    would get from its own VADIterator.
+    """
+
+    def __init__(self, backend: VADBackend = None, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, energy_gate: bool = False, speculative: bool = False, name: str = "engine"):
+        """
+        Initializes the BatchedVADEngine.
+
+        Args:
+            backend (VADBackend, optional): Inference backend. Defaults to the configured shared backend.
+            max_batch_size (int): Largest number of chunks run in one forward pass.
+            energy_gate (bool): Give each session an EnergyGate, so chunks of obvious silence
+                outside speech skip the model (see VADIterator).
+            speculative (bool): Report likely ends and resumed speech as well (see VADTrigger).
+            name (str): The engine's `source` label in the vad_queue_depth_packets metric.
+        """
+        self.backend = backend or get_vad_backend()
+        self.max_batch_size = max_batch_size
+        self.energy_gate = energy_gate
+        self.speculative = speculative
+        self.sessions = {}
+        self._sessions_lock = threading.Lock()
+        self._data_ready = threading.Event()
+        self._queue_depth = VAD_QUEUE_DEPTH.labels(name)
+        self._batch = np.zeros((max_batch_size, VAD_CONTEXT + VAD_CHUNK), dtype=np.float32)
+        self._state = np.zeros((2, max_batch_size, VAD_STATE_SIZE), dtype=np.float32)
+
+    def add_session(self, session_id: Hashable, process_vad_event: Callable, input_sample_rate: int, min_silence_duration_ms: float, channels: int = 1, channel: int = 0, process_vad_frames: Callable = None) -> VADSession:
+        """
+        Registers a new stream.
+
+        Args:
+            session_id (Hashable): Key used to push audio for this stream.
+            process_vad_event (Callable): Called with each speech start/end dict of this stream.
+            input_sample_rate (int): Sample rate of the int16 PCM pushed for this stream.
+            min_silence_duration_ms (float): Silence required before speech is considered ended.
+            channels (int): Interleaved channels in the pushed packets.
+            channel (int): Channel this stream runs VAD on.
+            process_vad_frames (Callable, optional): Called with the VADFrames of this stream after each tick.
+
+        Returns:
+            VADSession: The registered session.
+        """
+        gate = EnergyGate() if self.energy_gate else None
+        session = VADSession(session_id, process_vad_event, input_sample_rate, min_silence_duration_ms, gate, channels, channel, self.speculative, process_vad_frames)
+        with self._sessions_lock:
+            self.sessions = {**self.sessions, session_id: session}
+        return session
+
+    def remove_session(self, session_id: Hashable):
+        with self._sessions_lock:
+            sessions = dict(self.sessions)
+            sessions.pop(session_id, None)
+            self.sessions = sessions
+
+    def push(self, session_id: Hashable, data: bytes):
+        """
+        Queues a packet of int16 PCM audio for a stream. Safe to call from any thread.
+        """
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session.packets.put(data)
+            self._data_ready.set()
+
+    def skip(self, session_id: Hashable, num_samples: int):
+        """
+        Accounts for samples of a stream that were dropped before reaching the engine, so later
+        timestamps stay aligned with the input. Call from the thread running `tick`, after the
+        tick that processed the packets pushed before the gap.
+
+        Args:
+            session_id (Hashable): The stream.
+            num_samples (int): Number of dropped samples per channel.
+        """
+        session = self.sessions.get(session_id)
+        if session is None:
+            return
+        speech_dict = session.skip(num_samples)
+        if speech_dict:
+            session.process_vad_event(speech_dict)
+
+    def tick(self) -> int:
+        """
+        Runs batched inference over all audio pushed since the last tick.
+
+        Returns:
+            int: Number of chunks processed.
+        """
+        sessions = list(self.sessions.values())
+        self._queue_depth.set(sum(session.packets.qsize() for session in sessions))
+        for session in sessions:
+            session.drain()
+
+        # Each pass takes at most one chunk per session, since a session's chunks depend on
+        # the recurrent state left by its previous chunk
+        processed = 0
+        pending = sessions
+        while pending:
+            ready = []
+            batch = []
+            for session in pending:
+                chunk = next(session.frames, None)
+                if chunk is None:
+                    continue
+                ready.append(session)
+                if session.gate is not None and session.gate.is_silence(chunk) and not session.trigger.triggered:
+                    self._skip_chunk(session, chunk)
+                    continue
+                if session.gated:
+                    self._warm_up(session)
+                batch.append((session, chunk))
+
+            for offset in range(0, len(batch), self.max_batch_size):
+                self._run_batch(batch[offset:offset + self.max_batch_size])
+
+            processed += len(ready)
+            pending = ready
+
+        for session in sessions:
+            frames = session.frame_recorder.take()
+            if frames is not None and session.process_vad_frames is not None:
+                session.process_vad_frames(frames)
+
+        return processed
+
+    def _run_batch(self, batch: list):
+        """
+        Runs one forward pass over a list of (session, chunk) pairs and dispatches the resulting
+        speech start/end events.
+        """
+        for row, (session, chunk) in enumerate(batch):
+            self._batch[row, :VAD_CONTEXT] = session.context
+            self._batch[row, VAD_CONTEXT:] = chunk
+            self._state[:, row] = session.state
+
+        speech_probs = self._forward(len(batch))
+
+        for row, (session, _) in enumerate(batch):
+            session.context[:] = self._batch[row, -VAD_CONTEXT:]
+            session.state[:] = self._state[:, row]
+            speech_dict = session.trigger.update(float(speech_probs[row]), return_seconds=True)
+            if speech_dict:
+                session.process_vad_event(speech_dict)
+
+    def _skip_chunk(self, session: VADSession, chunk: np.ndarray):
+        """
+        Advances a session over a chunk the energy gate classified as silence, without inference.
+        """
+        VAD_GATED_FRAMES.inc()
+        session.gated.append(chunk)
+        session.context[:] = chunk[-VAD_CONTEXT:]
+        session.trigger.update(0.0, return_seconds=True)
+
+    def _warm_up(self, session: VADSession):
+        """
+        Runs the chunks a session's gate skipped most recently through the model, one at a time,
+        so its recurrent state has seen the silence leading into the next chunk. Uses the last
+        row of the batch buffers, which are not filled until the pass's batches run.
+        """
+        row = self.max_batch_size - 1
+        batch = self._batch[row:]
+        state = self._state[:, row:]
+        batch[0, :VAD_CONTEXT] = 0.0
+        state[:, 0] = session.state
+        for chunk in session.gated:
+            batch[0, VAD_CONTEXT:] = chunk
+            start = time.perf_counter()
+            _, new_state = self.backend.forward(batch, state)
+            VAD_INFERENCE_SECONDS.observe(time.perf_counter() - start)
+            VAD_FRAMES.inc()
+            state[:] = new_state
+            batch[0, :VAD_CONTEXT] = chunk[-VAD_CONTEXT:]
+        session.state[:] = state[:, 0]
+        session.context[:] = batch[0, :VAD_CONTEXT]
+        session.gated.clear()
+
+    def _forward(self, batch_size: int) -> np.ndarray:
+        """
+        Runs the backend on the first `batch_size` rows of the batch buffers, writing the updated
+        recurrent state back into the state buffer.
+
+        Returns:
+            np.ndarray: Speech probability per row.
+        """
+        start = time.perf_counter()
+        speech_probs, new_state = self.backend.forward(self._batch[:batch_size], self._state[:, :batch_size])
+        VAD_INFERENCE_SECONDS.observe(time.perf_counter() - start)
+        VAD_FRAMES.inc(batch_size)
+        self._state[:, :batch_size] = new_state
+        return speech_probs
+
+    def run(self, stop_event: threading.Event):
+        """
+        Processes pushed audio until `stop_event` is set. Intended as a thread target.
+        """
+        while not stop_event.is_set():
+            if not self._data_ready.wait(timeout=2*VAD_CHUNK_DURATION):
+                continue
+            self._data_ready.clear()
+            self.tick()
+
+
+def vad_engine_worker(vad_queue: AudioQueue, engine: BatchedVADEngine, session_ids: list, stop_event: threading.Event, clock: AudioClock = None, stream: str = "default"):
+    """
+    Runs a BatchedVADEngine over the packets of an AudioQueue until `stop_event` is set, the
+    engine-thread counterpart of vad_worker. Every packet is pushed to each of `session_ids`, e.g.
+    one session per channel of interleaved audio, and audio the queue dropped is skipped in each.
+
+    Args:
+        vad_queue (AudioQueue): Queue of int16 PCM packets.
+        engine (BatchedVADEngine): The engine the sessions belong to.
+        session_ids (list): Sessions fed every packet.
+        stop_event (threading.Event): Stops the worker.
+        clock (AudioClock, optional): The stream's audio clock; when given, VAD lag behind it is
+            published as the vad_lag_ms metric.
+        stream (str): The stream's label in the vad_lag_ms metric.
+    """
+    lag = VAD_LAG_MS.labels(stream)
+    while not stop_event.is_set():
+        try:
+            data, skipped = vad_queue.get(timeout=2*VAD_CHUNK_DURATION)
+        except queue.Empty:
+            continue
+
+        # Everything already queued is pushed before the tick, so the channels share batches
+        while True:
+            if skipped:
+                # Packets pushed before the gap must be run before the sessions jump over it
+                engine.tick()
+                for session_id in session_ids:
+                    engine.skip(session_id, skipped)
+            for session_id in session_ids:
+                engine.push(session_id, data)
+            try:
+                data, skipped = vad_queue.get(timeout=0)
+            except queue.Empty:
+                break
+        engine.tick()
+
+        if clock is not None:
+            sessions = [engine.sessions[session_id] for session_id in session_ids if session_id in engine.sessions]
+            if sessions:
+                samples_processed = min(session.samples_processed for session in sessions)
+                lag.set((clock.samples - samples_processed) * 1000 / clock.sample_rate)
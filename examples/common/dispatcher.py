@@ -0,0 +1,101 @@
+import itertools
+import threading
+from collections import deque
+
+from common.audio_clock import AudioClock
+from common.base_heuristic import Heuristic
+
+
+class EventDispatcher:
+    """
+    EventDispatcher is the single consumer in front of a heuristic. Producers on any thread (the
+    VAD worker, Deepgram SDK callbacks) push events without taking a lock: each event is stamped
+    with the current audio cursor and appended to a deque, which is thread-safe for appends and
+    pops. One dispatcher thread drains the deque and applies the events in audio-time order, so
+    the heuristic is only ever touched by that thread and its decisions do not depend on how the
+    producer threads happen to interleave.
+
+    Events are stamped from the stream's AudioClock, which the microphone thread advances; the
+    heuristic sees the cursor each event was stamped with, not the live one.
+    """
+
+    def __init__(self, heuristic: Heuristic, clock: AudioClock, on_processed=None):
+        """
+        Initializes the EventDispatcher.
+
+        Args:
+            heuristic (Heuristic): The heuristic receiving the events.
+            clock (AudioClock): The stream's audio clock.
+            on_processed (Callable, optional): Called on the dispatcher thread after each event is
+                processed, with the heuristic, e.g. to update a display.
+        """
+        self.heuristic = heuristic
+        self.on_processed = on_processed
+        self.clock = clock
+        self._pending = deque()
+        self._sequence = itertools.count() # Keeps events with equal cursors in arrival order
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def audio_cursor(self) -> float:
+        return self.clock.seconds
+
+    def push(self, event_type: str, data, audio_cursor: float = None):
+        """
+        Queues an event for the heuristic. Safe to call from any thread.
+
+        Args:
+            event_type (str): Heuristic event type, e.g. "vad_event" or "transcript".
+            data: The event payload.
+            audio_cursor (float, optional): Audio cursor to stamp the event with; defaults to the current one.
+        """
+        if audio_cursor is None:
+            audio_cursor = self.audio_cursor
+        self._pending.append((audio_cursor, next(self._sequence), {
+            "event_type": event_type,
+            "audio_cursor": audio_cursor,
+            "data": data
+        }))
+        self._wakeup.set()
+
+    def dispatch_pending(self):
+        """
+        Applies every queued event in audio-time order. Must only be called from one thread at a time.
+        """
+        batch = []
+        while self._pending:
+            batch.append(self._pending.popleft())
+        batch.sort(key=lambda item: item[:2])
+
+        for audio_cursor, _, event in batch:
+            self.heuristic.audio_cursor = audio_cursor
+            self.heuristic.process(event)
+            if self.on_processed:
+                self.on_processed(self.heuristic)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self.dispatch_pending()
+        self.dispatch_pending()
+
+    def start(self):
+        """
+        Starts the dispatcher thread.
+        """
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the dispatcher thread after applying the events already queued.
+        """
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,112 @@
+import numpy as np
+
+
+CLOSE_THRESHOLD_DB = -55.0 # Frames quieter than this (RMS, dBFS) count as silence
+OPEN_THRESHOLD_DB = -50.0 # Frames louder than this reopen the gate at once
+ZCR_THRESHOLD = 0.25 # Zero-crossing rate above which a quiet frame may be unvoiced speech (e.g. "s", "f")
+FRICATIVE_FLOOR_DB = -65.0 # Quiet frames with a high zero-crossing rate are only silence below this
+HANGOVER_FRAMES = 8 # Consecutive silent frames before the gate closes (256 ms of 32 ms frames)
+WARMUP_FRAMES = 8 # Most recent gated frames run through the model when the gate reopens
+
+
+class EnergyGate:
+    """
+    EnergyGate is a cheap pre-gate in front of the VAD model. It measures each frame's RMS level
+    and zero-crossing rate and closes once the audio has stayed clearly below the noise floor for
+    HANGOVER_FRAMES frames; while it is closed, frames can skip model inference. Separate open and
+    close thresholds plus the hangover give it hysteresis, so it does not flap on audio hovering
+    around the floor, and the high zero-crossing rate of unvoiced sounds keeps quiet fricatives
+    from being mistaken for silence.
+
+    The gate only decides whether a frame is obvious silence; callers still advance the VAD
+    trigger for gated frames (see VADIterator), so triggering state stays consistent. Callers
+    keep the last WARMUP_FRAMES gated frames and run them through the model before the first
+    frame after the gate reopens, so the model's recurrent state has seen the silence leading
+    into the speech.
+
+    The gate is not neutral: the warm-up brings the recurrent state close to, but not exactly
+    to, the state an ungated run would have, so VAD can report different, and sometimes extra,
+    speech segments after a gated silence. Replay recordings with and without the gate
+    (replay.py --energy-gate) before enabling it.
+    """
+
+    def __init__(self, close_threshold_db: float = CLOSE_THRESHOLD_DB, open_threshold_db: float = OPEN_THRESHOLD_DB, hangover_frames: int = HANGOVER_FRAMES):
+        """
+        Initializes the EnergyGate in the open state.
+
+        Args:
+            close_threshold_db (float): RMS level in dBFS below which a frame counts as silence.
+            open_threshold_db (float): RMS level in dBFS above which a frame reopens the gate.
+            hangover_frames (int): Consecutive silent frames before the gate closes.
+        """
+        # Compare mean squares instead of taking a log per frame
+        self.close_power = 10 ** (close_threshold_db / 10)
+        self.open_power = 10 ** (open_threshold_db / 10)
+        self.fricative_power = 10 ** (FRICATIVE_FLOOR_DB / 10)
+        self.hangover_frames = hangover_frames
+        self.reset()
+
+    def reset(self):
+        self.closed = False
+        self.silent_frames = 0
+
+    def is_silence(self, frame: np.ndarray) -> bool:
+        """
+        Updates the gate with the next frame.
+
+        Args:
+            frame (np.ndarray): float32 samples in [-1, 1].
+
+        Returns:
+            bool: True if the gate is closed, i.e. the frame may skip inference.
+        """
+        power = float(np.dot(frame, frame)) / len(frame)
+
+        if power > self.open_power:
+            self.closed = False
+            self.silent_frames = 0
+            return False
+
+        silent = power < self.close_power
+        if silent and power >= self.fricative_power:
+            zero_crossings = np.count_nonzero(np.signbit(frame[1:]) != np.signbit(frame[:-1]))
+            silent = zero_crossings / len(frame) < ZCR_THRESHOLD
+
+        if not silent:
+            # Between the thresholds, or quiet unvoiced sound: keep the gate's state but restart the hangover
+            self.silent_frames = 0
+            return self.closed
+
+        self.silent_frames += 1
+        if self.silent_frames >= self.hangover_frames:
+            self.closed = True
+        return self.closed
+
+
+class GatedFrames:
+    """
+    GatedFrames keeps the last WARMUP_FRAMES frames skipped by an EnergyGate, for replay through
+    the model when the gate reopens. Frames are copied into a preallocated ring, since the
+    caller's frame is usually a view into a buffer that is about to be overwritten.
+    """
+
+    def __init__(self, frame_size: int, max_frames: int = WARMUP_FRAMES):
+        self._frames = np.zeros((max_frames, frame_size), dtype=np.float32)
+        self._count = 0 # Frames appended since the last clear
+
+    def __len__(self) -> int:
+        return min(self._count, len(self._frames))
+
+    def append(self, frame: np.ndarray):
+        self._frames[self._count % len(self._frames)] = frame
+        self._count += 1
+
+    def __iter__(self):
+        """
+        Yields the kept frames, oldest first, as views into the ring.
+        """
+        for index in range(self._count - len(self), self._count):
+            yield self._frames[index % len(self._frames)]
+
+    def clear(self):
+        self._count = 0
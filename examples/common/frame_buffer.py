@@ -0,0 +1,103 @@
+import numpy as np
+
+
+DEFAULT_CAPACITY_FRAMES = 16
+
+
+class FrameBuffer:
+    """
+    FrameBuffer accumulates a stream of audio samples of arbitrary packet sizes in a preallocated
+    ring buffer and hands them out as fixed-size frames. Leftover samples that do not fill a frame
+    are carried over to the next write, so no audio is dropped at packet boundaries.
+
+    The ring capacity is a multiple of the frame size, so every frame is contiguous in memory and
+    is returned as a view without copying. A frame view is only valid until the next `write`.
+    """
+
+    def __init__(self, frame_size: int, capacity_frames: int = DEFAULT_CAPACITY_FRAMES, dtype=np.float32):
+        """
+        Initializes the FrameBuffer.
+
+        Args:
+            frame_size (int): Number of samples in each emitted frame.
+            capacity_frames (int): Initial ring capacity in frames; grows if a write does not fit.
+            dtype: Sample type stored in the ring.
+        """
+        self.frame_size = frame_size
+        self._ring = np.zeros(frame_size * capacity_frames, dtype=dtype)
+        self._read = 0 # Absolute index of the next sample to emit
+        self._write = 0 # Absolute index of the next sample to store
+
+    @property
+    def buffered(self) -> int:
+        """
+        Number of samples written but not yet emitted as part of a frame.
+        """
+        return self._write - self._read
+
+    @property
+    def frames_emitted(self) -> int:
+        """
+        Number of frames emitted since the stream started, i.e. the index of the next frame.
+        """
+        return self._read // self.frame_size
+
+    def write(self, samples: np.ndarray):
+        """
+        Appends samples to the ring.
+
+        Args:
+            samples (np.ndarray): Samples to append.
+        """
+        num_samples = len(samples)
+        if self.buffered + num_samples > len(self._ring):
+            self._grow(self.buffered + num_samples)
+
+        self._store(self._ring, self._write, samples)
+        self._write += num_samples
+
+    @staticmethod
+    def _store(ring: np.ndarray, position: int, samples: np.ndarray):
+        """
+        Copies samples into the ring at absolute `position`, wrapping around the end if needed.
+        """
+        capacity = len(ring)
+        start = position % capacity
+        first = min(len(samples), capacity - start)
+        ring[start:start + first] = samples[:first]
+        if first < len(samples):
+            ring[:len(samples) - first] = samples[first:]
+
+    def _grow(self, min_samples: int):
+        """
+        Reallocates the ring to hold at least `min_samples`, keeping buffered samples in place.
+        """
+        capacity = len(self._ring)
+        new_capacity = capacity
+        while new_capacity < min_samples:
+            new_capacity *= 2
+
+        start = self._read % capacity
+        pending = np.roll(self._ring, -start)[:self.buffered]
+        self._ring = np.zeros(new_capacity, dtype=self._ring.dtype)
+        self._store(self._ring, self._read, pending)
+
+    def frames(self):
+        """
+        Yields every complete frame currently buffered, in order.
+
+        Yields:
+            np.ndarray: A view of `frame_size` samples.
+        """
+        capacity = len(self._ring)
+        while self.buffered >= self.frame_size:
+            start = self._read % capacity
+            self._read += self.frame_size
+            yield self._ring[start:start + self.frame_size]
+
+    def reset(self):
+        """
+        Discards buffered samples and restarts the frame count at zero.
+        """
+        self._read = 0
+        self._write = 0
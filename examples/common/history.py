@@ -0,0 +1,46 @@
+from collections import deque
+from itertools import islice
+
+
+class BoundedHistory(deque):
+    """
+    BoundedHistory is a ring buffer of the most recent items of an unbounded stream, such as a
+    heuristic's event log or its completed utterances. Once it is full, every append evicts the
+    oldest item and hands it to `on_evict`, so long sessions keep constant memory while evicted
+    items can still be archived, e.g. written to a file or put on a queue.
+    """
+
+    def __init__(self, maxlen: int = None, on_evict=None):
+        """
+        Initializes the BoundedHistory.
+
+        Args:
+            maxlen (int, optional): Number of items kept. None keeps every item.
+            on_evict (Callable, optional): Called with each item as it is evicted.
+        """
+        super().__init__(maxlen=maxlen)
+        self.on_evict = on_evict
+        self.appended = 0 # Items ever appended, including evicted ones
+
+    def append(self, item):
+        if self.on_evict is not None and len(self) == self.maxlen:
+            self.on_evict(self[0])
+        super().append(item)
+        self.appended += 1
+
+    def tail(self, n: int) -> list:
+        """
+        Returns the last `n` items, oldest first.
+        """
+        items = list(islice(reversed(self), max(n, 0)))
+        items.reverse()
+        return items
+
+    def evict_all(self):
+        """
+        Empties the history, handing every remaining item to `on_evict`, e.g. at the end of a session.
+        """
+        while self:
+            item = self.popleft()
+            if self.on_evict is not None:
+                self.on_evict(item)
@@ -0,0 +1,272 @@
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Histogram buckets in milliseconds for transcription and endpoint latency
+LATENCY_BUCKETS_MS = (50, 100, 150, 200, 300, 400, 500, 750, 1000, 1500, 2000, 3000, 5000)
+# Histogram buckets in seconds for one VAD forward pass
+INFERENCE_BUCKETS_SECONDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+# Histogram buckets for per-frame VAD speech probabilities
+PROBABILITY_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    Metric is a named family of values, one per combination of label values. Children are
+    created on first use by `labels()` and cached, so the hot path is one dict lookup plus the
+    update itself, done under a per-child lock.
+    """
+
+    metric_type = None
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), registry: "Registry" = None):
+        """
+        Initializes the metric and registers it.
+
+        Args:
+            name (str): Metric name, e.g. "heuristic_endpoints_total".
+            documentation (str): Help text.
+            labelnames (tuple): Names of the metric's labels.
+            registry (Registry, optional): Registry to add the metric to. Defaults to REGISTRY.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._children_lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._children_lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def collect(self) -> list:
+        """
+        Returns the metric's samples.
+
+        Returns:
+            list: (name suffix, labels dict, value) tuples.
+        """
+        samples = []
+        for values, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, values))
+            samples.extend((suffix, {**labels, **extra}, value) for suffix, extra, value in child.samples())
+        return samples
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self):
+        return [("", {}, self.value)]
+
+
+class _GaugeChild(_CounterChild):
+    def set(self, value: float):
+        self.value = value
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def observe_many(self, values):
+        indices = [bisect.bisect_left(self.buckets, value) for value in values]
+        with self._lock:
+            for index in indices:
+                self.counts[index] += 1
+            self.sum += float(sum(values))
+
+    def samples(self):
+        with self._lock:
+            counts = list(self.counts)
+            total = self.sum
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            samples.append(("_bucket", {"le": _format_value(float(bound))}, cumulative))
+        samples.append(("_sum", {}, total))
+        samples.append(("_count", {}, cumulative))
+        return samples
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS_MS, registry: "Registry" = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def observe_many(self, values):
+        """
+        Observes every value of an iterable, e.g. a numpy array, taking the lock once.
+        """
+        self.labels().observe_many(values)
+
+
+class Registry:
+    """
+    Registry holds a set of metrics and renders them in the Prometheus text exposition format.
+    Exporters other than the HTTP endpoint can read the raw samples with `collect()`.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def collect(self) -> list:
+        """
+        Returns:
+            list: (metric, samples) pairs, samples as returned by Metric.collect().
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return [(metric, metric.collect()) for metric in metrics]
+
+    def render(self) -> str:
+        lines = []
+        for metric, samples in self.collect():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            for suffix, labels, value in samples:
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Pipeline metrics, shared by every heuristic and VAD stream in the process
+ENDPOINTS = Counter("heuristic_endpoints_total", "Completed utterances by endpoint path.", ("completed_by",))
+ENDPOINT_LATENCY = Histogram("heuristic_endpoint_latency_ms", "Time from the end of the last word to the endpoint decision.", ("completed_by",))
+TRANSCRIPTION_LATENCY = Histogram("heuristic_transcription_latency_ms", "Time from the end of the audio covered by a transcript to its arrival.", ("result_type",))
+VAD_QUEUE_DEPTH = Gauge("vad_queue_depth_packets", "Audio packets waiting for VAD, by the queue holding them.", ("source",))
+VAD_INFERENCE_SECONDS = Histogram("vad_inference_seconds", "Duration of one VAD forward pass.", buckets=INFERENCE_BUCKETS_SECONDS)
+VAD_FRAMES = Counter("vad_frames_total", "VAD frames run through the model.")
+VAD_GATED_FRAMES = Counter("vad_gated_frames_total", "VAD frames classified as silence by the energy gate without running the model.")
+VAD_DROPPED_SAMPLES = Counter("vad_dropped_samples_total", "Input samples dropped from the VAD queue without running VAD.")
+VAD_SPEECH_PROBABILITY = Histogram("vad_speech_probability", "Speech probability of each VAD frame.", buckets=PROBABILITY_BUCKETS)
+VAD_LAG_MS = Gauge("vad_lag_ms", "How far VAD processing trails the audio clock, by stream.", ("stream",))
+SPECULATIVE_ENDS = Counter("heuristic_speculative_ends_total", "Likely ends reported before the VAD silence window closed, and how many were confirmed or retracted.", ("outcome",))
+SPECULATIVE_LEAD = Histogram("heuristic_speculative_lead_ms", "Time from a likely end to its confirmation by VAD.")
+SINK_DROPPED_UTTERANCES = Counter("sink_dropped_utterances_total", "Completed utterances dropped from a full sink queue.", ("sink",))
+SINK_ERRORS = Counter("sink_errors_total", "Completed utterances a sink failed to deliver.", ("sink",))
+
+
+class MetricsServer:
+    """
+    MetricsServer serves a registry over HTTP for Prometheus to scrape, from a background thread.
+    """
+
+    def __init__(self, port: int, host: str = "127.0.0.1", registry: Registry = None):
+        """
+        Initializes the MetricsServer.
+
+        Args:
+            port (int): Port to listen on; 0 picks a free port.
+            host (str): Interface to listen on.
+            registry (Registry, optional): Registry to serve. Defaults to REGISTRY.
+        """
+        registry = registry or REGISTRY
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
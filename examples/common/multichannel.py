@@ -0,0 +1,131 @@
+import heapq
+
+from common.history import BoundedHistory
+
+
+DISPLAY_HISTORY_SIZE = 100 # Merged events and utterances handed to the display
+
+
+def event_channel(event: dict) -> int:
+    """
+    Returns the input channel an event belongs to.
+
+    Args:
+        event (dict): A heuristic event. Deepgram results carry the channel when multichannel is
+            enabled; VAD events carry it under "channel" in their data.
+
+    Returns:
+        int: The channel index, or None for events that apply to every channel, e.g. "tick".
+    """
+    data = event.get("data")
+    event_type = event.get("event_type")
+    if event_type == "transcript":
+        return data.channel_index[0] if data.channel_index else 0
+    if event_type == "utterance_end":
+        return data.channel[0] if data.channel else 0
+    if event_type == "vad_frames":
+        return data.channel
+    if isinstance(data, dict):
+        return data.get("channel")
+    return None
+
+
+class MultichannelHeuristic:
+    """
+    MultichannelHeuristic endpoints each channel of a multichannel stream, e.g. the agent and the
+    customer of a stereo call, with its own heuristic. It stands in for a single heuristic in
+    front of an EventDispatcher: events are routed to their channel's heuristic, events without a
+    channel (such as "tick") go to all of them, and the audio cursor is shared.
+
+    Records logged by a channel's heuristic are stamped with the channel index, so merged logs
+    and archived utterances can be told apart. With a single channel nothing is stamped, and the
+    output is the same as that of the heuristic alone.
+    """
+
+    def __init__(self, heuristics: list):
+        """
+        Initializes the MultichannelHeuristic.
+
+        Args:
+            heuristics (list): One heuristic per channel, in channel order.
+        """
+        self.heuristics = heuristics
+        self.last_channel = 0
+        self._audio_cursor = 0.0
+        self._stamped_events = [0] * len(heuristics)
+        if len(heuristics) > 1:
+            # Completed utterances are stamped by the heuristic itself, before they reach its sinks
+            for channel, heuristic in enumerate(heuristics):
+                heuristic.channel = channel
+
+    @property
+    def audio_cursor(self) -> float:
+        return self._audio_cursor
+
+    @audio_cursor.setter
+    def audio_cursor(self, audio_cursor: float):
+        self._audio_cursor = audio_cursor
+        for heuristic in self.heuristics:
+            heuristic.audio_cursor = audio_cursor
+
+    def process(self, event: dict):
+        """
+        Routes an event to its channel's heuristic, or to every heuristic if it has no channel.
+        """
+        channel = event_channel(event)
+        if channel is None:
+            for index, heuristic in enumerate(self.heuristics):
+                heuristic.process(event)
+                self._stamp(index)
+            return
+
+        self.heuristics[channel].process(event)
+        self._stamp(channel)
+        self.last_channel = channel
+
+    def _stamp(self, channel: int):
+        if len(self.heuristics) == 1:
+            return
+        events = self.heuristics[channel].events
+        for record in events.tail(events.appended - self._stamped_events[channel]):
+            record.channel = channel
+        self._stamped_events[channel] = events.appended
+
+    def get_display_data(self) -> dict:
+        """
+        Retrieves the state of every channel merged for display: logs in time order, and current
+        utterances and metrics labelled by channel. Merging copies the channels' histories, so
+        call it when a display needs a frame (see TerminalRenderer.refresh), not per event.
+
+        Returns:
+            dict: Same keys as the channel heuristics' get_display_data().
+        """
+        channels = [heuristic.get_display_data() for heuristic in self.heuristics]
+        if len(channels) == 1:
+            return channels[0]
+
+        events = BoundedHistory(DISPLAY_HISTORY_SIZE)
+        events.extend(heapq.merge(
+            *(data['events'].tail(DISPLAY_HISTORY_SIZE) for data in channels),
+            key=lambda event: event.audio_cursor
+        ))
+        completed_utterances = BoundedHistory(DISPLAY_HISTORY_SIZE)
+        completed_utterances.extend(heapq.merge(
+            *(data['completed_utterances'].tail(DISPLAY_HISTORY_SIZE) for data in channels),
+            key=lambda utterance: utterance.start_time or 0
+        ))
+
+        last = channels[self.last_channel]['metrics']
+        return {
+            'completed_utterances': completed_utterances,
+            'events': events,
+            'current_utterance': " ".join(f"[{index}] {data['current_utterance']}" for index, data in enumerate(channels)),
+            'current_utterance_start': " ".join(f"[{index}] {data['current_utterance_start']}" for index, data in enumerate(channels)),
+            'current_interim_utterance': " ".join(f"[{index}] {data['current_interim_utterance']}" for index, data in enumerate(channels)),
+            'current_interim_utterance_start': " ".join(f"[{index}] {data['current_interim_utterance_start']}" for index, data in enumerate(channels)),
+            'metrics': {
+                'spot_interim_latency': last['spot_interim_latency'],
+                'spot_endpoint_latency': last['spot_endpoint_latency'],
+                'vad_speech_detected': [data['metrics']['vad_speech_detected'] for data in channels]
+            }
+        }
@@ -0,0 +1,98 @@
+from collections import deque
+import numpy as np
+
+
+PAUSE_WINDOW = 200 # Recent pauses the estimates are computed from
+MIN_PAUSES = 20 # Pauses observed before the estimates move away from the configured values
+PAUSE_FLOOR = 0.1 # Gaps between words shorter than this (seconds) are not pauses
+PAUSE_QUANTILE = 90 # Percentile of a speaker's pauses that pause_threshold is set above
+PAUSE_MARGIN = 1.5 # pause_threshold as a multiple of that percentile
+SILENCE_QUANTILE = 50 # Percentile of a speaker's pauses that the VAD silence duration is set above
+SILENCE_MARGIN = 1.5 # VAD silence duration as a multiple of that percentile
+
+
+class PauseEstimator:
+    """
+    PauseEstimator tunes the endpointing thresholds of one stream to its speaker. It tracks the
+    recent distribution of pauses inside speech, from the gaps between consecutive words and
+    from the silences between VAD speech segments, and derives:
+
+    - pause_threshold: PAUSE_MARGIN times the PAUSE_QUANTILE percentile, so a fast talker is
+      endpointed sooner while a slow talker's usual pauses stay below the threshold.
+    - min_silence_duration_ms: SILENCE_MARGIN times the median pause between words, applied to
+      the stream's VAD trigger so VAD ends speech on a pause longer than the speaker usually makes.
+
+    VAD silences only inform pause_threshold. VAD only reports silences at least as long as its
+    current silence duration, so they would hold the median above that duration and the estimate
+    could only ever grow; pauses between words are seen whatever the VAD settings are.
+
+    Gaps longer than the current pause_threshold are taken to be the end of a turn rather than a
+    pause inside one, and are not counted. The threshold therefore rises for a speaker whose
+    pauses often come close to it, and falls for one whose pauses stay well below it. Both
+    estimates stay within the configured bounds, and keep their initial values until MIN_PAUSES
+    pauses have been seen.
+    """
+
+    def __init__(self, pause_threshold: float, min_silence_duration_ms: float, pause_bounds: tuple = (0.5, 2.0), silence_bounds_ms: tuple = (192, 640), vad_trigger=None):
+        """
+        Initializes the PauseEstimator.
+
+        Args:
+            pause_threshold (float): Initial pause threshold in seconds.
+            min_silence_duration_ms (float): Initial VAD silence duration in milliseconds.
+            pause_bounds (tuple): (min, max) pause threshold in seconds.
+            silence_bounds_ms (tuple): (min, max) VAD silence duration in milliseconds.
+            vad_trigger (VADTrigger, optional): The stream's VAD trigger, updated with each new
+                silence duration. A VADIterator or a BatchedVADEngine session's trigger.
+        """
+        self.pause_threshold = pause_threshold
+        self.min_silence_duration_ms = min_silence_duration_ms
+        self.pause_bounds = pause_bounds
+        self.silence_bounds_ms = silence_bounds_ms
+        self.vad_trigger = vad_trigger
+        self.pauses = deque(maxlen=PAUSE_WINDOW) # Pauses between words and between VAD segments
+        self.word_pauses = deque(maxlen=PAUSE_WINDOW) # Pauses between words only
+        self._last_word_end = None
+
+    def observe_words(self, words: list):
+        """
+        Records the pauses before and between the words of a final transcription result.
+
+        Args:
+            words (list): Word objects with `start` and `end` in seconds, in order.
+        """
+        observed = False
+        for word in words:
+            if self._last_word_end is not None:
+                observed |= self._add(word.start - self._last_word_end, between_words=True)
+            self._last_word_end = max(word.end, self._last_word_end or 0.0)
+        if observed:
+            self._update()
+
+    def observe_silence(self, duration: float):
+        """
+        Records the silence between two VAD speech segments.
+
+        Args:
+            duration (float): Seconds from the end of one segment to the start of the next.
+        """
+        if self._add(duration):
+            self._update()
+
+    def _add(self, gap: float, between_words: bool = False) -> bool:
+        if gap < PAUSE_FLOOR or gap > self.pause_threshold:
+            return False
+        self.pauses.append(gap)
+        if between_words:
+            self.word_pauses.append(gap)
+        return True
+
+    def _update(self):
+        if len(self.pauses) >= MIN_PAUSES:
+            pause_quantile = np.percentile(self.pauses, PAUSE_QUANTILE)
+            self.pause_threshold = float(np.clip(pause_quantile * PAUSE_MARGIN, *self.pause_bounds))
+        if len(self.word_pauses) >= MIN_PAUSES:
+            silence_quantile = np.percentile(self.word_pauses, SILENCE_QUANTILE)
+            self.min_silence_duration_ms = float(np.clip(silence_quantile * SILENCE_MARGIN * 1000, *self.silence_bounds_ms))
+            if self.vad_trigger is not None:
+                self.vad_trigger.set_min_silence_duration(self.min_silence_duration_ms)
@@ -0,0 +1,131 @@
+import glob
+import json
+import os
+import threading
+import wave
+from dataclasses import dataclass, field
+import numpy as np
+from deepgram import LiveResultResponse, UtteranceEndResponse
+
+
+# Deepgram response types that can be recorded and replayed, keyed by heuristic event type
+RESPONSE_TYPES = {
+    "transcript": LiveResultResponse,
+    "utterance_end": UtteranceEndResponse,
+}
+
+
+@dataclass
+class RecordedEvent:
+    audio_cursor: float # Audio cursor when the message arrived
+    event_type: str
+    data: object # LiveResultResponse or UtteranceEndResponse
+    raw: dict # The message as received from the API
+
+
+@dataclass
+class Recording:
+    sample_rate: int
+    audio: np.ndarray # int16 mono PCM
+    events: list = field(default_factory=list)
+    speech_segments: list = None # (start, end) of each speech segment, when known (synthetic fixtures)
+
+    @property
+    def duration(self) -> float:
+        return len(self.audio) / self.sample_rate
+
+
+class SessionRecorder:
+    """
+    SessionRecorder captures a live session for offline replay: the microphone audio goes to a WAV
+    file and every Deepgram message goes to a JSONL file together with the audio cursor at the
+    moment it arrived.
+    """
+
+    def __init__(self, path_prefix: str, sample_rate: int, channels: int = 1):
+        """
+        Initializes the SessionRecorder and opens `<path_prefix>.wav` and `<path_prefix>.jsonl`.
+
+        Args:
+            path_prefix (str): Path of the recording without extension.
+            sample_rate (int): Sample rate of the int16 audio.
+            channels (int): Interleaved channels of the audio. Only mono recordings can be replayed.
+        """
+        self._wav = wave.open(f"{path_prefix}.wav", "wb")
+        self._wav.setnchannels(channels)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(sample_rate)
+        self._events = open(f"{path_prefix}.jsonl", "w")
+        self._lock = threading.Lock()
+
+    def write_audio(self, data: bytes):
+        self._wav.writeframes(data)
+
+    def write_event(self, event_type: str, audio_cursor: float, response):
+        """
+        Appends a Deepgram message to the event log.
+
+        Args:
+            event_type (str): Heuristic event type, e.g. "transcript" or "utterance_end".
+            audio_cursor (float): Audio cursor when the message arrived.
+            response: The SDK response object.
+        """
+        line = json.dumps({"audio_cursor": audio_cursor, "event_type": event_type, "data": response.to_dict()})
+        with self._lock:
+            self._events.write(line + "\n")
+
+    def close(self):
+        self._wav.close()
+        self._events.close()
+
+
+def load_recording(path_prefix: str) -> Recording:
+    """
+    Loads a recording written by SessionRecorder.
+
+    Args:
+        path_prefix (str): Path of the recording without extension.
+
+    Returns:
+        Recording: Audio and events, with events sorted by arrival.
+    """
+    with wave.open(f"{path_prefix}.wav", "rb") as wav:
+        if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+            raise ValueError(f"{path_prefix}.wav must be 16-bit mono PCM")
+        sample_rate = wav.getframerate()
+        audio = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+
+    events = []
+    with open(f"{path_prefix}.jsonl") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response_type = RESPONSE_TYPES[entry["event_type"]]
+            events.append(RecordedEvent(
+                audio_cursor=entry["audio_cursor"],
+                event_type=entry["event_type"],
+                data=response_type.from_dict(entry["data"]),
+                raw=entry["data"]
+            ))
+    events.sort(key=lambda event: event.audio_cursor)
+
+    return Recording(sample_rate, audio, events)
+
+
+def find_recordings(paths: list) -> list:
+    """
+    Expands recording paths: a directory stands for every `<name>.wav` inside it with a matching
+    `<name>.jsonl`; any other path is a recording prefix, with or without extension.
+    """
+    prefixes = []
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = sorted(glob.glob(os.path.join(path, "*.wav")))
+        else:
+            candidates = [path]
+        for candidate in candidates:
+            prefix = os.path.splitext(candidate)[0]
+            if os.path.exists(f"{prefix}.jsonl"):
+                prefixes.append(prefix)
+    return prefixes
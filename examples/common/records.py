@@ -0,0 +1,115 @@
+def _format_time(value) -> str:
+    return f"{value:.2f}" if value is not None else "-"
+
+
+def _label_channel(text: str, channel: int) -> str:
+    return f"[{channel}] {text}" if channel is not None else text
+
+
+class EventRecord:
+    """
+    EventRecord is one entry of a heuristic's event log. It holds raw numeric values; strings for
+    display are only built by `display()`, when something actually renders the event.
+    """
+
+    __slots__ = ("audio_cursor", "transcript_cursor", "event_type", "latency", "endpoint_latency", "speech_start_time", "speech_end_time", "content", "channel")
+
+    def __init__(self, audio_cursor: float, event_type: str, content: str, transcript_cursor: float = None, latency: int = None, endpoint_latency: int = None, speech_start_time: float = None, speech_end_time: float = None):
+        """
+        Initializes the EventRecord. Values that do not apply to the event are None.
+
+        Args:
+            audio_cursor (float): Audio cursor when the event was processed, in seconds.
+            event_type (str): The type of event, e.g. "interim_transcript" or "vad_event_end".
+            content (str): Transcript or description of the event.
+            transcript_cursor (float, optional): End of the audio covered by the transcript, in seconds.
+            latency (int, optional): Transcription or detection latency in milliseconds.
+            endpoint_latency (int, optional): Endpoint latency in milliseconds, shown next to `latency`.
+            speech_start_time (float, optional): Start of the first word or of detected speech, in seconds.
+            speech_end_time (float, optional): End of the last word or of detected speech, in seconds.
+        """
+        self.audio_cursor = audio_cursor
+        self.transcript_cursor = transcript_cursor
+        self.event_type = event_type
+        self.latency = latency
+        self.endpoint_latency = endpoint_latency
+        self.speech_start_time = speech_start_time
+        self.speech_end_time = speech_end_time
+        self.content = content
+        self.channel = None # Input channel, set for multichannel streams (see MultichannelHeuristic)
+
+    def display(self) -> dict:
+        """
+        Formats the event for display.
+
+        Returns:
+            dict: The event's fields as strings, with "-" for missing values.
+        """
+        if self.latency is None:
+            latency = "-"
+        elif self.endpoint_latency is None:
+            latency = f"{self.latency}"
+        else:
+            latency = f"{self.latency} ({self.endpoint_latency})"
+        return {
+            "audio_cursor": _format_time(self.audio_cursor),
+            "transcript_cursor": _format_time(self.transcript_cursor),
+            "event_type": self.event_type,
+            "latency": latency,
+            "speech_start_time": _format_time(self.speech_start_time),
+            "speech_end_time": _format_time(self.speech_end_time),
+            "content": _label_channel(self.content, self.channel)
+        }
+
+
+class UtteranceRecord:
+    """
+    UtteranceRecord is one completed utterance, with raw numeric timestamps and latency.
+    """
+
+    __slots__ = ("start_time", "end_time", "latency", "completed_by", "transcript", "channel")
+
+    def __init__(self, start_time: float, end_time: float, latency: int, completed_by: str, transcript: str):
+        """
+        Initializes the UtteranceRecord.
+
+        Args:
+            start_time (float): Start of the first word in seconds, or None if unknown.
+            end_time (float): End of the last word in seconds, or None if unknown.
+            latency (int): Endpoint latency in milliseconds, or None if unknown.
+            completed_by (str): Reason for completion, e.g. "speech_final" or "vad_interim".
+            transcript (str): The transcribed text.
+        """
+        self.start_time = start_time
+        self.end_time = end_time
+        self.latency = latency
+        self.completed_by = completed_by
+        self.transcript = transcript
+        self.channel = None # Input channel, set for multichannel streams (see MultichannelHeuristic)
+
+    def to_dict(self) -> dict:
+        utterance = {
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "latency": self.latency,
+            "completed_by": self.completed_by,
+            "transcript": self.transcript
+        }
+        if self.channel is not None:
+            utterance["channel"] = self.channel
+        return utterance
+
+    def display(self) -> dict:
+        """
+        Formats the utterance for display.
+
+        Returns:
+            dict: The utterance's fields as strings, with "-" for missing values.
+        """
+        return {
+            "start_time": _format_time(self.start_time),
+            "end_time": _format_time(self.end_time),
+            "latency": f"{self.latency}" if self.latency is not None else "-",
+            "completed_by": self.completed_by,
+            "transcript": _label_channel(self.transcript, self.channel)
+        }
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import threading
+import numpy as np
+import websockets
+
+from common.audio_clock import AudioClock
+from common.base_heuristic import Heuristic
+from common.recording import Recording
+from common.vad import VADStream, VAD_CHUNK_DURATION
+
+
+# Matches the live pipeline's packet size at 48 kHz (3 VAD chunks)
+DEFAULT_PACKET_DURATION = 3 * VAD_CHUNK_DURATION
+# Tolerance when comparing recorded arrival cursors to the replayed cursor
+CURSOR_EPSILON = 1e-6
+
+
+def replay_recording(recording: Recording, heuristic: Heuristic, vad_iterator=None, packet_duration: float = DEFAULT_PACKET_DURATION, on_event=None) -> Heuristic:
+    """
+    Drives a heuristic from a recording as fast as the CPU allows. The audio is cut into packets
+    that advance `heuristic.audio_cursor` exactly like the live microphone callback, each packet
+    is followed by a "tick" event, VAD runs synchronously on each packet and its frames are
+    delivered as a "vad_frames" event, and each recorded
+    Deepgram message is delivered once the cursor reaches the offset at which it originally
+    arrived.
+
+    Args:
+        recording (Recording): The recording to replay.
+        heuristic (Heuristic): The heuristic to drive; its audio_cursor should start at 0.
+        vad_iterator (optional): VAD iterator fed with the audio. VAD is skipped when None.
+        packet_duration (float): Duration of each replayed audio packet in seconds.
+        on_event (Callable, optional): Called with every event after the heuristic processed it.
+
+    Returns:
+        Heuristic: The driven heuristic.
+    """
+    vad_stream = VADStream(recording.sample_rate, vad_iterator) if vad_iterator is not None else None
+    packet_size = int(recording.sample_rate * packet_duration)
+    events = recording.events
+    next_event = 0
+    clock = AudioClock(recording.sample_rate)
+
+    def dispatch(event):
+        heuristic.process(event)
+        if on_event:
+            on_event(event)
+
+    for offset in range(0, len(recording.audio), packet_size):
+        packet = recording.audio[offset:offset + packet_size]
+        clock.advance(len(packet))
+        heuristic.audio_cursor = clock.seconds
+        dispatch({"event_type": "tick", "audio_cursor": heuristic.audio_cursor, "data": None})
+
+        if vad_stream is not None:
+            for speech_dict in vad_stream.process(packet):
+                dispatch({"event_type": "vad_event", "audio_cursor": heuristic.audio_cursor, "data": speech_dict})
+            frames = vad_stream.take_frames()
+            if frames is not None:
+                dispatch({"event_type": "vad_frames", "audio_cursor": heuristic.audio_cursor, "data": frames})
+
+        while next_event < len(events) and events[next_event].audio_cursor <= heuristic.audio_cursor + CURSOR_EPSILON:
+            event = events[next_event]
+            dispatch({"event_type": event.event_type, "audio_cursor": heuristic.audio_cursor, "data": event.data})
+            next_event += 1
+
+    # Messages that arrived after the recorded audio ended
+    for event in events[next_event:]:
+        heuristic.audio_cursor = max(heuristic.audio_cursor, event.audio_cursor)
+        dispatch({"event_type": event.event_type, "audio_cursor": heuristic.audio_cursor, "data": event.data})
+
+    return heuristic
+
+
+class FakeDeepgramServer:
+    """
+    FakeDeepgramServer is a local stand-in for the Deepgram live transcription websocket. It
+    accepts a streaming connection from the Deepgram SDK, counts the audio it receives, and sends
+    each recorded message once as much audio has arrived as had when the message was recorded.
+
+    The server runs its own event loop on a background thread, so it can be used from synchronous
+    code such as the live pipeline in main.py.
+    """
+
+    def __init__(self, recording: Recording, host: str = "127.0.0.1", port: int = 0):
+        """
+        Initializes the FakeDeepgramServer.
+
+        Args:
+            recording (Recording): The recording whose messages are replayed.
+            host (str): Interface to listen on.
+            port (int): Port to listen on; 0 picks a free port.
+        """
+        self.recording = recording
+        self.host = host
+        self.port = port
+        self._loop = asyncio.new_event_loop()
+        self._thread = None
+        self._started = threading.Event()
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        """
+        Base URL to pass as DeepgramClientOptions(url=...).
+        """
+        return f"ws://{self.host}:{self.port}"
+
+    async def _handle(self, websocket):
+        sample_rate = self.recording.sample_rate
+        events = self.recording.events
+        received_samples = 0
+        next_event = 0
+
+        async for message in websocket:
+            if isinstance(message, str):
+                if json.loads(message).get("type") == "CloseStream":
+                    break
+                continue
+
+            received_samples += len(message) // np.dtype(np.int16).itemsize
+            audio_cursor = received_samples / sample_rate
+            while next_event < len(events) and events[next_event].audio_cursor <= audio_cursor + CURSOR_EPSILON:
+                await websocket.send(json.dumps(events[next_event].raw))
+                next_event += 1
+
+        for event in events[next_event:]:
+            await websocket.send(json.dumps(event.raw))
+        await websocket.close()
+
+    async def _serve(self):
+        self._server = await websockets.serve(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        await self._server.wait_closed()
+
+    def start(self) -> str:
+        """
+        Starts serving on a background thread.
+
+        Returns:
+            str: The server's base URL.
+        """
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self._serve(),), daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self.url
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._server.close)
+        self._thread.join()
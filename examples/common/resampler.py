@@ -0,0 +1,176 @@
+from math import gcd
+
+import numpy as np
+
+
+# Filter design defaults
+ZERO_CROSSINGS = 16 # Sinc zero crossings on each side of the filter center
+ROLLOFF = 0.9 # Cutoff as a fraction of the output Nyquist frequency
+KAISER_BETA = 8.6
+DEFAULT_MAX_INPUT_SAMPLES = 4096
+
+
+class StreamingResampler:
+    """
+    StreamingResampler converts a continuous stream of audio packets between two sample rates
+    with a polyphase windowed-sinc filter. Filter history is carried across packets, so packet
+    boundaries do not introduce edge artifacts and the output is identical to resampling the
+    whole stream at once.
+
+    Input, output and filter index buffers are preallocated; only rational ratios other than
+    integer decimation gather one temporary array of filter windows per packet. The array
+    returned by `process` is a view into the output buffer and is only valid until the next call.
+    """
+
+    def __init__(self, orig_sr: int, target_sr: int, max_input_samples: int = DEFAULT_MAX_INPUT_SAMPLES):
+        """
+        Initializes the StreamingResampler and designs its polyphase filter bank.
+
+        Args:
+            orig_sr (int): Sample rate of the incoming audio.
+            target_sr (int): Sample rate of the produced audio.
+            max_input_samples (int): Expected largest packet size; buffers grow if it is exceeded.
+        """
+        divisor = gcd(orig_sr, target_sr)
+        self.orig_sr = orig_sr
+        self.target_sr = target_sr
+        self.up = target_sr // divisor
+        self.down = orig_sr // divisor
+        self.passthrough = self.up == self.down
+
+        self.phases = self._design_phases()
+        self.taps_per_phase = self.phases.shape[1]
+        # Group delay of the filter in upsampled samples, compensated so that output sample n
+        # lines up with input time n * down / up
+        self.delay = (self.taps_per_phase * self.up - 1) // 2
+
+        self._history_size = self.taps_per_phase - 1
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._output = np.zeros(0, dtype=np.float32)
+        self._allocate(max_input_samples)
+        self.reset()
+
+    def _design_phases(self) -> np.ndarray:
+        """
+        Designs a Kaiser-windowed sinc low-pass filter at the upsampled rate and splits it into
+        `up` polyphase components, each reversed so it can be applied as a dot product.
+
+        Returns:
+            np.ndarray: Array of shape (up, taps_per_phase) with float32 coefficients.
+        """
+        if self.passthrough:
+            return np.ones((1, 1), dtype=np.float32)
+
+        factor = max(self.up, self.down)
+        cutoff = ROLLOFF / (2 * factor)
+        half_length = ZERO_CROSSINGS * factor
+        taps_per_phase = -(-(2 * half_length + 1) // self.up)
+        num_taps = taps_per_phase * self.up
+
+        n = np.arange(num_taps) - (num_taps - 1) / 2
+        taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(num_taps, KAISER_BETA)
+        taps *= self.up / taps.sum()
+
+        phases = taps.reshape(taps_per_phase, self.up).T
+        return np.ascontiguousarray(phases[:, ::-1], dtype=np.float32)
+
+    def _allocate(self, max_input_samples: int):
+        """
+        (Re)allocates the input, output and scratch buffers for packets of up to
+        `max_input_samples`, preserving the filter history.
+        """
+        buffer = np.zeros(self._history_size + max_input_samples, dtype=np.float32)
+        buffer[:self._history_size] = self._buffer[:self._history_size] if len(self._buffer) else 0.0
+        self._buffer = buffer
+        max_output_samples = max_input_samples * self.up // self.down + 2
+        self._output = np.zeros(max_output_samples, dtype=np.float32)
+        self.max_input_samples = max_input_samples
+
+        # Row j is the filter window ending at buffer index j + taps_per_phase - 1
+        self._windows = np.lib.stride_tricks.sliding_window_view(self._buffer, self.taps_per_phase)
+        if self.up > 1 and not self.passthrough:
+            # The phase used by output n only depends on n % up, so a table of phase rows a
+            # period longer than any packet's output covers every packet with a contiguous slice
+            outputs = np.arange(max_output_samples + self.up)
+            self._phase_table = np.ascontiguousarray(self.phases[(outputs * self.down + self.delay) % self.up])
+            self._output_steps = np.arange(max_output_samples, dtype=np.int64) * self.down
+            self._rows = np.zeros(max_output_samples, dtype=np.int64)
+
+    def reset(self):
+        """
+        Clears the filter history and restarts the output timeline at zero.
+        """
+        self._buffer[:self._history_size] = 0.0
+        # Absolute input index of the first sample held after the history
+        self._input_index = 0
+        # Absolute index of the next output sample to produce
+        self._output_index = 0
+
+    def process(self, samples: np.ndarray, scale: float = 1.0) -> np.ndarray:
+        """
+        Resamples the next packet of the stream.
+
+        Args:
+            samples (np.ndarray): The next input samples, any real dtype (e.g. int16 PCM).
+            scale (float): Factor applied while copying into the float32 input buffer, e.g.
+                1 / 32768 to normalize int16 PCM.
+
+        Returns:
+            np.ndarray: View of the resampled float32 samples produced by this packet.
+        """
+        num_samples = len(samples)
+        if num_samples > self.max_input_samples:
+            self._allocate(num_samples)
+
+        history = self._history_size
+        window = self._buffer[history:history + num_samples]
+        np.multiply(samples, scale, out=window, casting="unsafe")
+
+        if self.passthrough:
+            self._input_index += num_samples
+            self._output_index += num_samples
+            return window
+
+        count = self._filter(num_samples)
+
+        # Keep the tail of the input as history for the next packet
+        self._buffer[:history] = self._buffer[num_samples:num_samples + history]
+        self._input_index += num_samples
+        return self._output[:count]
+
+    def _filter(self, num_samples: int) -> int:
+        """
+        Computes every output sample whose filter window is fully available in the buffer.
+
+        Returns:
+            int: Number of samples written to the output buffer.
+        """
+        taps = self.taps_per_phase
+        up, down = self.up, self.down
+        last_input = self._input_index + num_samples - 1
+
+        # Output n needs input index (n * down + delay) // up
+        last_output = (last_input * up + up - 1 - self.delay) // down
+        count = max(last_output - self._output_index + 1, 0)
+        if not count:
+            return 0
+
+        # Row j of `windows` ends at absolute input index j + base
+        windows = self._windows
+        first_t = self._output_index * down + self.delay
+        base = self._input_index - self._history_size + taps - 1
+
+        if up == 1:
+            # Integer decimation: every output uses the same phase at a fixed input stride
+            start = first_t - base
+            np.dot(windows[start:start + count * down:down], self.phases[0], out=self._output[:count])
+        else:
+            rows = self._rows[:count]
+            np.add(self._output_steps[:count], first_t, out=rows)
+            np.floor_divide(rows, up, out=rows)
+            np.subtract(rows, base, out=rows)
+            phase_start = self._output_index % up
+            np.einsum("ij,ij->i", windows[rows], self._phase_table[phase_start:phase_start + count], out=self._output[:count])
+
+        self._output_index += count
+        return count
@@ -0,0 +1,73 @@
+import heapq
+import itertools
+
+
+class AudioScheduler:
+    """
+    AudioScheduler runs callbacks when the audio cursor reaches a deadline, so checks such as the
+    pause threshold fire as soon as enough audio has arrived instead of on the next transcript.
+    Deadlines are in audio seconds, not wall-clock time, which keeps replayed sessions
+    deterministic; the owner drives the scheduler by calling `advance` whenever the cursor moves,
+    e.g. on the "tick" events pushed for every audio packet.
+
+    Timers are named: scheduling a name that is already pending replaces its deadline. A heuristic
+    only holds a handful of timers, so they are kept in a heap with lazy deletion.
+    """
+
+    def __init__(self):
+        self._heap = [] # (deadline, sequence, name)
+        self._timers = {} # name -> (deadline, sequence, callback)
+        self._sequence = itertools.count() # Keeps timers with equal deadlines in scheduling order
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def schedule(self, name: str, deadline: float, callback):
+        """
+        Schedules a callback, replacing any pending timer with the same name.
+
+        Args:
+            name (str): Timer name.
+            deadline (float): Audio cursor in seconds at which the timer fires.
+            callback (Callable): Called with the deadline once the cursor reaches it.
+        """
+        sequence = next(self._sequence)
+        self._timers[name] = (deadline, sequence, callback)
+        heapq.heappush(self._heap, (deadline, sequence, name))
+
+    def cancel(self, name: str):
+        self._timers.pop(name, None)
+
+    def deadline(self, name: str) -> float:
+        """
+        Returns:
+            float: Deadline of the pending timer with this name, or None.
+        """
+        timer = self._timers.get(name)
+        return timer[0] if timer else None
+
+    def advance(self, audio_cursor: float) -> int:
+        """
+        Fires every timer due at `audio_cursor`, in deadline order. Callbacks may schedule new
+        timers; those fire in the same call if they are already due.
+
+        Args:
+            audio_cursor (float): The current audio cursor in seconds.
+
+        Returns:
+            int: Number of timers fired.
+        """
+        fired = 0
+        while self._heap and self._heap[0][0] <= audio_cursor:
+            deadline, sequence, name = heapq.heappop(self._heap)
+            timer = self._timers.get(name)
+            if timer is None or timer[1] != sequence:
+                continue # Cancelled or rescheduled
+            del self._timers[name]
+            timer[2](deadline)
+            fired += 1
+        return fired
+
+    def clear(self):
+        self._heap.clear()
+        self._timers.clear()
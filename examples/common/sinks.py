@@ -0,0 +1,280 @@
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+from common.metrics import SINK_DROPPED_UTTERANCES, SINK_ERRORS
+
+
+SINK_QUEUE_SIZE = 1000 # Utterances waiting per sink before the oldest are dropped
+SOCKET_CLIENT_BUFFER_BYTES = 64 * 1024 # Unsent bytes a UNIX socket client may fall behind before it is dropped
+
+
+class UtteranceSink:
+    """
+    UtteranceSink delivers completed utterances to a downstream consumer, e.g. an agent deciding
+    when to take its turn. The heuristic calls `publish` on its own thread, which only appends the
+    utterance to a deque and wakes the sink's thread, so a slow or stalled consumer never delays
+    endpointing. Each sink has its own thread and queue, so one slow sink does not hold up the
+    others; once a queue is full the oldest utterances are dropped.
+
+    Subclasses implement `emit`, which runs on the sink's thread, and optionally `close_sink`.
+    """
+
+    name = "sink"
+
+    def __init__(self, queue_size: int = SINK_QUEUE_SIZE):
+        """
+        Initializes the UtteranceSink and starts its thread.
+
+        Args:
+            queue_size (int): Utterances waiting for delivery before the oldest are dropped.
+        """
+        self._pending = deque()
+        self._queue_size = queue_size
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def publish(self, utterance: dict):
+        """
+        Queues an utterance for delivery without blocking. Safe to call from any thread.
+
+        Args:
+            utterance (dict): The utterance, as built by utterance_payload.
+        """
+        if len(self._pending) >= self._queue_size:
+            try:
+                self._pending.popleft()
+                SINK_DROPPED_UTTERANCES.labels(self.name).inc()
+            except IndexError:
+                pass
+        self._pending.append(utterance)
+        self._wakeup.set()
+
+    def emit(self, utterance: dict):
+        """
+        Delivers one utterance. Runs on the sink's thread.
+        """
+        raise NotImplementedError
+
+    def close_sink(self):
+        """
+        Releases the sink's resources once every queued utterance has been delivered.
+        """
+
+    def close(self):
+        """
+        Delivers the utterances already queued, then stops the sink's thread.
+        """
+        self._stop_event.set()
+        self._wakeup.set()
+        self._thread.join()
+        self.close_sink()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self._deliver_pending()
+        self._deliver_pending()
+
+    def _deliver_pending(self):
+        while self._pending:
+            utterance = self._pending.popleft()
+            try:
+                self.emit(utterance)
+            except Exception as error:
+                SINK_ERRORS.labels(self.name).inc()
+                print(f"Utterance sink {self.name} failed: {error}")
+
+
+class JSONLSink(UtteranceSink):
+    """
+    JSONLSink appends each utterance to a file as a JSON line, flushed as it is written so tools
+    tailing the file see it immediately.
+    """
+
+    name = "jsonl"
+
+    def __init__(self, path: str, queue_size: int = SINK_QUEUE_SIZE):
+        """
+        Initializes the JSONLSink.
+
+        Args:
+            path (str): File to append to.
+            queue_size (int): Utterances waiting for delivery before the oldest are dropped.
+        """
+        self._file = open(path, "a")
+        super().__init__(queue_size)
+
+    def emit(self, utterance: dict):
+        self._file.write(json.dumps(utterance) + "\n")
+        self._file.flush()
+
+    def close_sink(self):
+        self._file.close()
+
+
+class CallbackSink(UtteranceSink):
+    """
+    CallbackSink hands each utterance to a function in the same process, e.g. an agent's
+    turn-taking logic. The callback runs on the sink's thread, not the heuristic's.
+    """
+
+    name = "callback"
+
+    def __init__(self, callback, queue_size: int = SINK_QUEUE_SIZE):
+        """
+        Initializes the CallbackSink.
+
+        Args:
+            callback (Callable): Called with each utterance dict.
+            queue_size (int): Utterances waiting for delivery before the oldest are dropped.
+        """
+        self._callback = callback
+        super().__init__(queue_size)
+
+    def emit(self, utterance: dict):
+        self._callback(utterance)
+
+
+class UnixSocketSink(UtteranceSink):
+    """
+    UnixSocketSink serves utterances on a local UNIX socket: every connected client receives each
+    utterance as a JSON line, e.g. `socat - UNIX-CONNECT:/tmp/utterances.sock`. Utterances are not
+    replayed to clients connecting later.
+
+    Sends never block: each client has a buffer of bytes the socket has not taken yet, which is
+    retried on the next utterance. A client that disconnects, or falls more than
+    `max_buffered_bytes` behind, is dropped, so one stalled client cannot delay the others.
+    """
+
+    name = "unix_socket"
+
+    def __init__(self, path: str, queue_size: int = SINK_QUEUE_SIZE, max_buffered_bytes: int = SOCKET_CLIENT_BUFFER_BYTES):
+        """
+        Initializes the UnixSocketSink and starts listening on `path`.
+
+        Args:
+            path (str): Socket path; a stale socket file at this path is replaced.
+            queue_size (int): Utterances waiting for delivery before the oldest are dropped.
+            max_buffered_bytes (int): Unsent bytes a client may fall behind before it is dropped.
+        """
+        if os.path.exists(path):
+            os.unlink(path)
+        self.path = path
+        self._max_buffered_bytes = max_buffered_bytes
+        self._clients = {} # Client socket to its unsent bytes
+        self._clients_lock = threading.Lock()
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(path)
+        self._server.listen()
+        self._accept_thread = threading.Thread(target=self._accept, daemon=True)
+        self._accept_thread.start()
+        super().__init__(queue_size)
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                break # Server socket closed
+            client.setblocking(False)
+            with self._clients_lock:
+                self._clients[client] = bytearray()
+
+    def emit(self, utterance: dict):
+        line = (json.dumps(utterance) + "\n").encode()
+        with self._clients_lock:
+            clients = list(self._clients.items())
+        for client, buffered in clients:
+            buffered += line
+            try:
+                sent = client.send(buffered)
+            except BlockingIOError:
+                sent = 0
+            except OSError:
+                self._drop(client)
+                continue
+            del buffered[:sent]
+            if len(buffered) > self._max_buffered_bytes:
+                self._drop(client)
+
+    def _drop(self, client: socket.socket):
+        client.close()
+        with self._clients_lock:
+            del self._clients[client]
+
+    def close_sink(self):
+        self._server.close()
+        with self._clients_lock:
+            for client in self._clients:
+                client.close()
+            self._clients = {}
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def utterance_payload(utterance, audio_cursor: float) -> dict:
+    """
+    Builds the dict published to sinks for a completed utterance.
+
+    Args:
+        utterance (UtteranceRecord): The completed utterance.
+        audio_cursor (float): Audio cursor at the endpoint decision.
+
+    Returns:
+        dict: The utterance's fields, the audio cursor, and the wall-clock time of the decision,
+            so consumers can measure how long delivery took.
+    """
+    return {
+        "type": "utterance",
+        **utterance.to_dict(),
+        "audio_cursor": audio_cursor,
+        "endpointed_at": time.time()
+    }
+
+
+def turn_payload(event_type: str, transcript: str, speech_end_time: float, audio_cursor: float) -> dict:
+    """
+    Builds the dict published to sinks for a speculative turn event.
+
+    Args:
+        event_type (str): "likely_end", "confirm" or "retract".
+        transcript (str): The transcript pending when the event fired.
+        speech_end_time (float): End of speech in seconds, as reported by VAD.
+        audio_cursor (float): Audio cursor when the event fired.
+
+    Returns:
+        dict: The event's fields and its wall-clock time.
+    """
+    return {
+        "type": event_type,
+        "transcript": transcript,
+        "speech_end_time": speech_end_time,
+        "audio_cursor": audio_cursor,
+        "emitted_at": time.time()
+    }
+
+
+def create_sinks(jsonl_path: str = None, socket_path: str = None) -> list:
+    """
+    Creates the sinks configured for an example script.
+
+    Args:
+        jsonl_path (str, optional): File receiving each utterance as a JSON line.
+        socket_path (str, optional): UNIX socket path serving each utterance as a JSON line.
+
+    Returns:
+        list: The started sinks; empty if neither is set.
+    """
+    sinks = []
+    if jsonl_path:
+        sinks.append(JSONLSink(jsonl_path))
+    if socket_path:
+        sinks.append(UnixSocketSink(socket_path))
+    return sinks
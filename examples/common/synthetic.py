@@ -0,0 +1,128 @@
+import numpy as np
+from deepgram import LiveResultResponse, UtteranceEndResponse
+
+from common.recording import Recording, RecordedEvent
+
+
+# Vowel formants (frequency Hz, bandwidth Hz) used to synthesize speech-like audio
+VOWEL_FORMANTS = [
+    ((700, 80), (1200, 90), (2600, 120)),
+    ((500, 80), (900, 90), (2400, 120)),
+    ((300, 60), (2200, 100), (3000, 120)),
+    ((400, 70), (800, 80), (2500, 120)),
+]
+WORD_DURATION = 0.25 # Seconds per synthetic word
+WORD_GAP = 0.05 # Seconds between words inside a segment
+INTERIM_INTERVAL = 1.0 # Seconds of audio between interim results
+ENDPOINTING_DELAY = 0.3 # Silence before the synthetic API marks speech_final
+UTTERANCE_END_GAP = 1.0 # Silence before the synthetic API sends UtteranceEnd
+NOISE_FLOOR = 0.001
+
+
+def synthesize_vowel(duration: float, sample_rate: int, formants, f0: float, rng: np.random.Generator) -> np.ndarray:
+    """
+    Synthesizes a voiced, vowel-like sound: a vibrato glottal pulse train shaped by formant
+    resonators applied in the frequency domain.
+
+    Returns:
+        np.ndarray: float64 samples with peak amplitude 0.5.
+    """
+    num_samples = int(duration * sample_rate)
+    t = np.arange(num_samples) / sample_rate
+    phase = np.cumsum(f0 * (1 + 0.1 * np.sin(2 * np.pi * 4 * t)) / sample_rate)
+    source = (np.diff(np.floor(phase), prepend=0) > 0).astype(float) + 0.02 * rng.standard_normal(num_samples)
+
+    omega = np.exp(-2j * np.pi * np.fft.rfftfreq(num_samples, 1 / sample_rate) / sample_rate)
+    response = np.ones_like(omega)
+    for frequency, bandwidth in formants:
+        r = np.exp(-np.pi * bandwidth / sample_rate)
+        theta = 2 * np.pi * frequency / sample_rate
+        response /= 1 - 2 * r * np.cos(theta) * omega + r * r * omega * omega
+
+    vowel = np.fft.irfft(np.fft.rfft(source) * response, num_samples)
+    return vowel / np.abs(vowel).max() * 0.5
+
+
+def _result(start: float, duration: float, words: list, is_final: bool, speech_final: bool) -> LiveResultResponse:
+    return LiveResultResponse.from_dict({
+        "type": "Results",
+        "channel_index": [0, 1],
+        "duration": duration,
+        "start": start,
+        "is_final": is_final,
+        "speech_final": speech_final,
+        "channel": {"alternatives": [{
+            "transcript": " ".join(word["word"] for word in words),
+            "confidence": 0.9,
+            "words": words
+        }]},
+        "metadata": {"request_id": "synthetic", "model_info": {"name": "synthetic", "version": "0", "arch": "synthetic"}, "model_uuid": "synthetic"}
+    })
+
+
+def synthetic_recording(duration: float, sample_rate: int = 16000, latency: float = 0.1, seed: int = 0, with_audio: bool = True) -> Recording:
+    """
+    Builds a Recording of speech-like audio and the Deepgram messages a live session would have
+    produced for it: growing interim results, a final speech_final result after each segment
+    and UtteranceEnd after longer pauses, each arriving `latency` seconds (plus jitter) after
+    the audio it describes.
+
+    Args:
+        duration (float): Approximate length of the recording in seconds.
+        sample_rate (int): Sample rate of the audio.
+        latency (float): Mean transcription latency in seconds.
+        seed (int): Seed for segment lengths, pauses and jitter.
+        with_audio (bool): Synthesize the audio. When False the recording has no audio, which
+            keeps very long transcript-only fixtures cheap; `speech_segments` still describes it.
+
+    Returns:
+        Recording: The synthetic recording.
+    """
+    rng = np.random.default_rng(seed)
+    parts = [NOISE_FLOOR * rng.standard_normal(int(0.5 * sample_rate))]
+    segments = []
+    cursor = 0.5
+    while cursor < duration:
+        length = float(rng.uniform(0.4, 3.0))
+        f0 = float(rng.uniform(100, 180))
+        if with_audio:
+            formants = VOWEL_FORMANTS[len(segments) % len(VOWEL_FORMANTS)]
+            parts.append(synthesize_vowel(length, sample_rate, formants, f0, rng))
+        segments.append((cursor, cursor + length))
+        cursor += length
+
+        pause = float(rng.choice([0.2, 0.5, 1.5, 2.5]))
+        if with_audio:
+            parts.append(NOISE_FLOOR * rng.standard_normal(int(pause * sample_rate)))
+        cursor += pause
+    audio = (np.concatenate(parts) * 32767).astype(np.int16) if with_audio else np.zeros(0, dtype=np.int16)
+
+    messages = []
+    word_index = 0
+    for index, (start, end) in enumerate(segments):
+        words = []
+        word_start = start
+        while word_start < end - WORD_GAP:
+            word_end = min(word_start + WORD_DURATION, end)
+            words.append({"word": f"word{word_index}", "start": round(word_start, 2), "end": round(word_end, 2), "confidence": 0.9})
+            word_index += 1
+            word_start = word_end + WORD_GAP
+
+        for interim_end in np.arange(start + INTERIM_INTERVAL, end, INTERIM_INTERVAL):
+            interim_words = [word for word in words if word["end"] <= interim_end]
+            messages.append((interim_end + latency, _result(start, interim_end - start, interim_words, False, False)))
+
+        final_arrival = end + ENDPOINTING_DELAY + latency * float(rng.uniform(0.5, 1.5))
+        messages.append((final_arrival, _result(start, end - start + ENDPOINTING_DELAY, words, True, True)))
+
+        next_start = segments[index + 1][0] if index + 1 < len(segments) else float("inf")
+        if next_start - end > UTTERANCE_END_GAP:
+            utterance_end = UtteranceEndResponse.from_dict({"type": "UtteranceEnd", "channel": [0, 1], "last_word_end": words[-1]["end"]})
+            messages.append((end + UTTERANCE_END_GAP + latency, utterance_end))
+
+    events = []
+    for arrival, response in sorted(messages, key=lambda message: message[0]):
+        event_type = "transcript" if isinstance(response, LiveResultResponse) else "utterance_end"
+        events.append(RecordedEvent(arrival, event_type, response, response.to_dict()))
+
+    return Recording(sample_rate, audio, events, speech_segments=segments)
@@ -0,0 +1,149 @@
+import sys
+import os
+import threading
+
+RENDER_FPS = 15 # Maximum screen redraws per second
+LINE_LENGTH = 150
+COMPLETED_ROWS = 10 # Completed utterances shown
+EVENT_ROWS = 100 # Events copied per snapshot; the terminal height decides how many are shown
+
+class TerminalRenderer:
+    """
+    TerminalRenderer draws the heuristic's state on its own thread. `update` copies the tail of
+    the heuristic's histories into a snapshot on the caller's thread, so the render thread never
+    reads a history the heuristic is appending to. The render thread redraws at most RENDER_FPS
+    times per second and rewrites only the lines that changed since the previous frame.
+
+    Pass `refresh` as the EventDispatcher's `on_processed` callback: it only asks the heuristic
+    for its display data when the render thread is ready for a new frame, so most events cost
+    the dispatcher nothing for display.
+    """
+
+    def __init__(self, fps: float = RENDER_FPS):
+        self.completed_utterances = []
+        self.events = []
+        self.current_utterance = ""
+        self.current_utterance_start = ""
+        self.current_interim_utterance = ""
+        self.current_interim_utterance_start = ""
+        self.prev_lines = []
+        self.spot_interim_latency = 0
+        self.spot_endpoint_latency = 0
+        self.vad_speech_detected = False
+        self.fps = fps
+        self._dirty = threading.Event()
+        self._requested = threading.Event() # Set when the render thread is ready for a new snapshot
+        self._requested.set()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def refresh(self, heuristic):
+        """
+        Takes a snapshot of the heuristic's display data if the render thread is ready for one.
+        Call from the thread that runs the heuristic.
+        """
+        if self._requested.is_set():
+            self.update(**heuristic.get_display_data())
+
+    def update(self, completed_utterances, events, current_utterance, current_utterance_start, current_interim_utterance, current_interim_utterance_start, metrics):
+        """
+        Takes a snapshot of display data. Call from the thread that runs the heuristic; the
+        histories are copied here, so the render thread only reads the copies.
+        """
+        self._requested.clear()
+        self.completed_utterances = completed_utterances.tail(COMPLETED_ROWS)
+        self.events = events.tail(EVENT_ROWS)
+        self.current_utterance = current_utterance
+        self.current_utterance_start = current_utterance_start
+        self.current_interim_utterance = current_interim_utterance
+        self.current_interim_utterance_start = current_interim_utterance_start
+        self.spot_interim_latency = metrics.get('spot_interim_latency', 0)
+        self.spot_endpoint_latency = metrics.get('spot_endpoint_latency', 0)
+        self.vad_speech_detected = metrics.get('vad_speech_detected', False)
+        self._dirty.set()
+
+    def start(self):
+        """
+        Starts the render thread.
+        """
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the render thread and draws the final state.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._dirty.is_set():
+            self._dirty.clear()
+            self.render()
+
+    def _run(self):
+        frame_interval = 1 / self.fps
+        while not self._stop_event.wait(frame_interval):
+            if self._dirty.is_set():
+                self._dirty.clear()
+                self.render()
+            self._requested.set()
+
+    def build_lines(self, terminal_size: os.terminal_size) -> list:
+        lines = [""]
+        lines.append("=" * LINE_LENGTH)
+        lines.append("Completed Utterances:")
+        lines.append("=" * LINE_LENGTH)
+
+        for utterance in self.completed_utterances:
+            utterance = utterance.display()
+            transcript = utterance.get('transcript', 'N/A')  # Safeguard against missing key
+            latency = utterance.get('latency', '0')
+            lines.append(f"[{utterance.get('start_time', '-')} - {utterance.get('end_time', '-')} ({latency} ms - {utterance.get('completed_by', 'Unknown')})]  {transcript}")
+
+        lines.append("")
+        lines.append("=" * LINE_LENGTH)
+        lines.append("")
+        lines.append(f"Current utterance ({self.current_utterance_start} - ): " + self.current_utterance)
+        lines.append(f"Current interim utterance ({self.current_interim_utterance_start} - ): " + self.current_interim_utterance)
+        lines.append("Real-time Events Log:")
+        lines.append("-" * LINE_LENGTH)
+        metrics_row = f"Spot Interim Latency: {self.spot_interim_latency} ms | Spot Endpoint Latency: {self.spot_endpoint_latency} ms | VAD Speech detected: {self.vad_speech_detected}"
+        lines.append(f"{metrics_row:^150}")
+        lines.append("-" * LINE_LENGTH)
+        lines.append(f"{'Audio Cursor':^15}|{'Transcript Cursor':^20}| {'Event Type':<30}|{'Latency':^20}|{'Words Start':^15}|{'Words End':^15}| {'Content':<60}")
+        lines.append("-" * LINE_LENGTH)
+
+        num_rows = terminal_size.lines - len(lines) - 1  # -1 to account for input
+        for event in self.events[-num_rows:] if num_rows > 0 else []:
+            event = event.display()
+            audio_cursor = event.get('audio_cursor', '-')
+            transcript_cursor = event.get('transcript_cursor', '-')
+            event_type = event.get('event_type', '-')
+            latency = event.get('latency', '-')
+            speech_start_time = event.get('speech_start_time', '-')
+            speech_end_time = event.get('speech_end_time', '-')
+            content = event.get('content', '-')
+            lines.append(f"{audio_cursor:^15}|{transcript_cursor:^20}| {event_type:<30}|{latency:^20}|{speech_start_time:^15}|{speech_end_time:^15}| {content:<60}")
+
+        # Lines wider than the terminal would wrap and shift every row below them
+        return [line[:terminal_size.columns] for line in lines]
+
+    def render(self):
+        lines = self.build_lines(os.get_terminal_size())
+
+        # Move to the top of the previous frame and rewrite only the lines that changed
+        output = [f"\x1b[{len(self.prev_lines)}F"] if self.prev_lines else []
+        for index, line in enumerate(lines):
+            if index < len(self.prev_lines) and self.prev_lines[index] == line:
+                output.append("\n")
+            else:
+                output.append(line + "\x1b[K\n")
+        if len(lines) < len(self.prev_lines):
+            output.append("\x1b[0J")
+
+        sys.stdout.write("".join(output))
+        sys.stdout.flush()
+
+        self.prev_lines = lines
@@ -0,0 +1,69 @@
+class UtteranceBuilder:
+    """
+    UtteranceBuilder accumulates the transcript of an utterance that has not been endpointed yet.
+    Each transcription result adds a segment of text and its Deepgram word objects to lists, and
+    the transcript is only joined when it is read, e.g. at the endpoint or when the display
+    renders; the joined text is cached until the next segment arrives. Appending is O(1), so
+    utterances that run for minutes without an endpoint, such as dictation or voicemail, do not
+    become quadratic as repeated string concatenation does.
+
+    The words keep their timestamps, so the utterance's start and end are word-accurate without
+    rescanning the transcript.
+    """
+
+    __slots__ = ("words", "_segments", "_text")
+
+    def __init__(self):
+        self.words = []
+        self._segments = []
+        self._text = ""
+
+    def __bool__(self) -> bool:
+        return bool(self._segments)
+
+    def append(self, transcript: str, words: list = ()):
+        """
+        Adds one transcription result to the utterance.
+
+        Args:
+            transcript (str): The result's transcript.
+            words (list): The result's word objects, with `start` and `end` in seconds.
+        """
+        self._segments.append(transcript)
+        self.words.extend(words)
+        self._text = None
+
+    def extend(self, other: "UtteranceBuilder"):
+        """
+        Adds every segment of another builder, e.g. an interim result merged into the utterance.
+        """
+        self._segments.extend(other._segments)
+        self.words.extend(other.words)
+        self._text = None
+
+    def clear(self):
+        self.words.clear()
+        self._segments.clear()
+        self._text = ""
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = " ".join(self._segments)
+        return self._text
+
+    @property
+    def start(self) -> float:
+        """
+        Returns:
+            float: Start of the first word in seconds, or None if there are no words.
+        """
+        return self.words[0].start if self.words else None
+
+    @property
+    def end(self) -> float:
+        """
+        Returns:
+            float: End of the last word in seconds, or None if there are no words.
+        """
+        return self.words[-1].end if self.words else None
@@ -1,58 +1,330 @@
 import queue
 from typing import Callable
 import threading
+import time
 import numpy as np
-import librosa
-import torch
+
+from common.frame_buffer import FrameBuffer
+from common.audio_clock import AudioClock
+from common.audio_queue import AudioQueue
+from common.energy_gate import EnergyGate, GatedFrames
+from common.metrics import VAD_INFERENCE_SECONDS, VAD_FRAMES, VAD_GATED_FRAMES, VAD_LAG_MS
+from common.resampler import StreamingResampler
+from common.vad_backends import VADBackend, get_vad_backend
+from common.vad_frames import FrameRecorder, VADFrames
 
 
 # Constants
 VAD_SAMPLE_RATE = 16000
 VAD_CHUNK = 512
 VAD_CHUNK_DURATION = VAD_CHUNK / VAD_SAMPLE_RATE
+VAD_CONTEXT = 64 # Samples of the previous chunk that silero-vad prepends to each 16 kHz chunk
+VAD_STATE_SIZE = 128
+
+
+class VADTrigger:
+    """
+    VADTrigger turns per-chunk speech probabilities into speech start/end events, using the same
+    triggering rules as silero-vad's VADIterator but without owning a model. This lets many
+    streams share one model while keeping their triggering state separate.
+
+    In speculative mode the trigger also reports when the silence window opens, as soon as the
+    probability drops during speech ({'likely_end': ...}), and when speech resumes before the
+    window closes ({'resume': ...}). The 'end' event then confirms a likely end. Set
+    `on_probability` to receive every chunk's raw speech probability.
+    """
+
+    def __init__(self, threshold: float = 0.4, sampling_rate: int = VAD_SAMPLE_RATE, min_silence_duration_ms: float = 100, speech_pad_ms: float = 0, speculative: bool = False):
+        """
+        Initializes the VADTrigger.
+
+        Args:
+            threshold (float): Speech probability above which a chunk counts as speech.
+            sampling_rate (int): Sample rate of the audio the probabilities were computed on.
+            min_silence_duration_ms (float): Silence required before speech is considered ended.
+            speech_pad_ms (float): Padding applied to reported start and end times.
+            speculative (bool): Also report likely ends and resumed speech.
+        """
+        self.threshold = threshold
+        self.speculative = speculative
+        self.on_probability = None # Called with (speech_prob, current_sample) for every chunk run through update()
+        self.sampling_rate = sampling_rate
+        self.min_silence_samples = sampling_rate * min_silence_duration_ms / 1000
+        self.speech_pad_samples = sampling_rate * speech_pad_ms / 1000
+        self.reset_states()
+
+    def reset_states(self):
+        self.triggered = False
+        self.temp_end = 0
+        self.current_sample = 0
+
+    def set_min_silence_duration(self, min_silence_duration_ms: float):
+        """
+        Changes the silence required before speech is considered ended, e.g. as a PauseEstimator
+        adapts it to the speaker. Takes effect on the next chunk, including for a silence already
+        in progress. Safe to call from another thread.
+        """
+        self.min_silence_samples = self.sampling_rate * min_silence_duration_ms / 1000
+
+    def update(self, speech_prob: float, window_size_samples: int = VAD_CHUNK, return_seconds: bool = False, time_resolution: int = 1):
+        """
+        Advances the trigger by one chunk.
+
+        Args:
+            speech_prob (float): Speech probability of the chunk.
+            window_size_samples (int): Number of samples in the chunk.
+            return_seconds (bool): Report timestamps in seconds instead of samples.
+            time_resolution (int): Decimal places for timestamps in seconds.
+
+        Returns:
+            dict: {'start': ...} or {'end': ...} when speech starts or ends, {'likely_end': ...} or
+                {'resume': ...} in speculative mode, otherwise None.
+        """
+        self.current_sample += window_size_samples
+        if self.on_probability is not None:
+            self.on_probability(speech_prob, self.current_sample)
+
+        if (speech_prob >= self.threshold) and self.temp_end:
+            self.temp_end = 0
+            if self.speculative:
+                return {'resume': self._timestamp(self.current_sample - window_size_samples, return_seconds, time_resolution)}
+
+        if (speech_prob >= self.threshold) and not self.triggered:
+            self.triggered = True
+            speech_start = max(0, self.current_sample - self.speech_pad_samples - window_size_samples)
+            return {'start': int(speech_start) if not return_seconds else round(speech_start / self.sampling_rate, time_resolution)}
+
+        if (speech_prob < self.threshold - 0.15) and self.triggered:
+            if not self.temp_end:
+                self.temp_end = self.current_sample
+                if self.speculative and self.min_silence_samples > 0:
+                    return {'likely_end': self._timestamp(self.temp_end + self.speech_pad_samples - window_size_samples, return_seconds, time_resolution)}
+            if self.current_sample - self.temp_end < self.min_silence_samples:
+                return None
+            speech_end = self.temp_end + self.speech_pad_samples - window_size_samples
+            self.temp_end = 0
+            self.triggered = False
+            return {'end': int(speech_end) if not return_seconds else round(speech_end / self.sampling_rate, time_resolution)}
+
+        return None
+
+    def _timestamp(self, sample: float, return_seconds: bool, time_resolution: int):
+        return int(sample) if not return_seconds else round(sample / self.sampling_rate, time_resolution)
+
+    def skip(self, num_samples: int, return_seconds: bool = False, time_resolution: int = 1):
+        """
+        Advances the trigger over audio that was not run through the model, treating it as
+        silence: the result is the same as updating with zero probability for each chunk, except
+        that no likely end is reported and `on_probability` is not called.
+
+        Args:
+            num_samples (int): Number of skipped samples.
+            return_seconds (bool): Report timestamps in seconds instead of samples.
+            time_resolution (int): Decimal places for timestamps in seconds.
+
+        Returns:
+            dict: {'end': ...} if the skipped silence ends the current speech, otherwise None.
+        """
+        if num_samples <= 0:
+            return None
+        if self.triggered and not self.temp_end:
+            self.temp_end = self.current_sample + VAD_CHUNK
+        self.current_sample += num_samples
+        if not self.triggered or self.current_sample - self.temp_end < self.min_silence_samples:
+            return None
+        speech_end = self.temp_end + self.speech_pad_samples - VAD_CHUNK
+        self.temp_end = 0
+        self.triggered = False
+        return {'end': int(speech_end) if not return_seconds else round(speech_end / self.sampling_rate, time_resolution)}
+
+
+class VADIterator(VADTrigger):
+    """
+    Drop-in replacement for silero-vad's VADIterator for a single stream, running inference
+    through a VADBackend instead of a model loaded from torch.hub.
+
+    With an EnergyGate, chunks the gate classifies as obvious silence skip the model while speech
+    is not triggered and advance the trigger with probability 0. The gated chunks themselves
+    cannot start speech, but the model's recurrent state no longer sees the whole silence, so
+    the probabilities of later chunks, and with them start and end events, can differ from an
+    ungated run (see EnergyGate).
+    """
+
+    def __init__(self, backend: VADBackend, threshold: float = 0.4, sampling_rate: int = VAD_SAMPLE_RATE, min_silence_duration_ms: float = 100, speech_pad_ms: float = 0, gate: EnergyGate = None, speculative: bool = False):
+        self.backend = backend
+        self.gate = gate
+        self._gated = GatedFrames(VAD_CHUNK)
+        self._input = np.zeros((1, VAD_CONTEXT + VAD_CHUNK), dtype=np.float32)
+        super().__init__(threshold, sampling_rate, min_silence_duration_ms, speech_pad_ms, speculative)
+
+    def reset_states(self):
+        super().reset_states()
+        self._input[:] = 0.0
+        self._state = np.zeros((2, 1, VAD_STATE_SIZE), dtype=np.float32)
+        if self.gate is not None:
+            self.gate.reset()
+        self._gated.clear()
+
+    def __call__(self, x: np.ndarray, return_seconds: bool = False, time_resolution: int = 1):
+        """
+        Runs the model on one 512-sample chunk and advances the trigger.
 
-# Load Silero VAD model
-model, utils = torch.hub.load(repo_or_dir='snakers4/silero-vad',
-                              model='silero_vad',
-                              force_reload=True)
-
-(get_speech_timestamps,
- save_audio,
- read_audio,
- VADIterator,
- collect_chunks) = utils
-
-# vad_iterator = VADIterator(
-#     model,
-#     threshold=0.4,
-#     sampling_rate=VAD_SAMPLE_RATE,
-#     min_silence_duration_ms=10 * VAD_CHUNK_DURATION * 1000,
-#     speech_pad_ms=0
-# )
-
-def create_vad_iterator(min_silence_duration_ms):
+        Args:
+            x (np.ndarray): float32 chunk of VAD_CHUNK samples at VAD_SAMPLE_RATE.
+            return_seconds (bool): Report timestamps in seconds instead of samples.
+            time_resolution (int): Decimal places for timestamps in seconds.
+
+        Returns:
+            dict: {'start': ...} or {'end': ...} when speech starts or ends, otherwise None.
+        """
+        # The gate sees every chunk to keep its hysteresis current, but only skips inference outside speech
+        if self.gate is not None and self.gate.is_silence(x) and not self.triggered:
+            VAD_GATED_FRAMES.inc()
+            self._gated.append(x)
+            self._shift_in(x)
+            return self.update(0.0, len(x), return_seconds, time_resolution)
+
+        if self._gated:
+            # Replay the silence leading into this chunk to warm up the recurrent state
+            self._input[:] = 0.0
+            for chunk in self._gated:
+                self._shift_in(chunk)
+                self._forward()
+            self._gated.clear()
+
+        self._shift_in(x)
+        speech_prob = self._forward()
+        return self.update(float(speech_prob[0]), len(x), return_seconds, time_resolution)
+
+    def _shift_in(self, x: np.ndarray):
+        # Shift the previous chunk's tail into the context slot, then append the new chunk
+        self._input[0, :VAD_CONTEXT] = self._input[0, -VAD_CONTEXT:]
+        self._input[0, VAD_CONTEXT:] = x
+
+    def _forward(self) -> np.ndarray:
+        start = time.perf_counter()
+        speech_prob, self._state = self.backend.forward(self._input, self._state)
+        VAD_INFERENCE_SECONDS.observe(time.perf_counter() - start)
+        VAD_FRAMES.inc()
+        return speech_prob
+
+    def skip(self, num_samples: int, return_seconds: bool = False, time_resolution: int = 1):
+        # The next chunk does not follow on from the last one the model saw
+        self._input[:] = 0.0
+        self._gated.clear()
+        self._state = np.zeros((2, 1, VAD_STATE_SIZE), dtype=np.float32)
+        return super().skip(num_samples, return_seconds, time_resolution)
+
+
+def create_vad_iterator(min_silence_duration_ms, backend: VADBackend = None, energy_gate: bool = False, speculative: bool = False):
     return VADIterator(
-        model,
+        backend or get_vad_backend(),
         threshold=0.4,
         sampling_rate=VAD_SAMPLE_RATE,
         min_silence_duration_ms=min_silence_duration_ms,
-        speech_pad_ms=0
+        speech_pad_ms=0,
+        gate=EnergyGate() if energy_gate else None,
+        speculative=speculative
     )
 
-def vad_worker(vad_queue: queue.Queue, process_vad_event: Callable, stop_event: threading.Event, input_sample_rate: int, vad_iterator):
+
+class VADStream:
+    """
+    VADStream runs VAD over one continuous stream of int16 PCM packets of any size: packets are
+    resampled to VAD_SAMPLE_RATE, framed into VAD_CHUNK samples and fed to a VAD iterator.
+
+    The stream records every frame's speech probability through the iterator's `on_probability`
+    hook; `take_frames` returns them as VADFrames, e.g. once per packet.
+    """
+
+    def __init__(self, input_sample_rate: int, vad_iterator):
+        # Stateful resampler keeps filter history across packets, avoiding edge artifacts at packet boundaries
+        self.resampler = StreamingResampler(input_sample_rate, VAD_SAMPLE_RATE)
+        # Leftover samples that do not fill a VAD chunk are carried over to the next packet
+        self.frame_buffer = FrameBuffer(VAD_CHUNK)
+        self.vad_iterator = vad_iterator
+        self.input_sample_rate = input_sample_rate
+        self.samples_processed = 0 # Input samples consumed, including skipped ones
+        self.frame_recorder = FrameRecorder(VAD_SAMPLE_RATE)
+        vad_iterator.on_probability = self.frame_recorder
+
+    def process(self, audio_int16: np.ndarray):
+        """
+        Runs VAD over the next packet of the stream.
+
+        Args:
+            audio_int16 (np.ndarray): The next int16 PCM samples at the input sample rate.
+
+        Yields:
+            dict: Speech start/end dicts, timestamps in seconds from the start of the stream.
+        """
+        self.samples_processed += len(audio_int16)
+        self.frame_buffer.write(self.resampler.process(audio_int16, scale=1 / 32768.0))
+
+        for chunk in self.frame_buffer.frames():
+            speech_dict = self.vad_iterator(chunk, return_seconds=True)
+            if speech_dict:
+                yield speech_dict
+
+    def skip(self, num_samples: int):
+        """
+        Accounts for input samples that were dropped without running VAD, so that timestamps of
+        later events stay aligned with the input. The dropped audio is treated as silence and
+        audio still waiting in the resampler or frame buffer is discarded with it.
+
+        Args:
+            num_samples (int): Number of dropped samples at the input sample rate.
+
+        Returns:
+            dict: {'end': ...} if the skipped silence ends the current speech, otherwise None.
+        """
+        self.samples_processed += num_samples
+        self.resampler.reset()
+        self.frame_buffer.reset()
+        vad_samples = self.samples_processed * VAD_SAMPLE_RATE // self.input_sample_rate
+        return self.vad_iterator.skip(vad_samples - self.vad_iterator.current_sample, return_seconds=True)
+
+    def take_frames(self) -> VADFrames:
+        """
+        Returns:
+            VADFrames: Probabilities of the frames run since the last call, or None if there are none.
+        """
+        return self.frame_recorder.take()
+
+
+def vad_worker(vad_queue: AudioQueue, process_vad_event: Callable, stop_event: threading.Event, input_sample_rate: int, vad_iterator, clock: AudioClock = None, process_vad_frames: Callable = None, stream: str = "default"):
+    """
+    Runs VAD over the packets of an AudioQueue until `stop_event` is set.
+
+    Args:
+        vad_queue (AudioQueue): Queue of int16 PCM packets.
+        process_vad_event (Callable): Called with each speech start/end dict.
+        stop_event (threading.Event): Stops the worker.
+        input_sample_rate (int): Sample rate of the packets.
+        vad_iterator: The stream's VAD iterator.
+        clock (AudioClock, optional): The stream's audio clock; when given, VAD lag behind it is
+            published as the vad_lag_ms metric.
+        process_vad_frames (Callable, optional): Called with the VADFrames of each packet.
+        stream (str): The stream's label in the vad_lag_ms metric.
+    """
+    vad_stream = VADStream(input_sample_rate, vad_iterator)
+    lag = VAD_LAG_MS.labels(stream)
+
     while not stop_event.is_set():
         try:
-            data = vad_queue.get(timeout=2*VAD_CHUNK_DURATION)
+            data, skipped = vad_queue.get(timeout=2*VAD_CHUNK_DURATION)
         except queue.Empty:
             continue
 
-        audio_int16 = np.frombuffer(data, dtype=np.int16)
-        audio_float32 = audio_int16.astype(np.float32) / 32768.0
-        audio_resampled = librosa.resample(audio_float32, orig_sr=input_sample_rate, target_sr=VAD_SAMPLE_RATE)
-        
-        for i in range(0, len(audio_resampled), VAD_CHUNK):
-            chunk = audio_resampled[i:i+VAD_CHUNK]
-            if len(chunk) == VAD_CHUNK:
-                speech_dict = vad_iterator(chunk, return_seconds=True)
-                if speech_dict:
-                    process_vad_event(speech_dict)
\ No newline at end of file
+        if skipped:
+            speech_dict = vad_stream.skip(skipped)
+            if speech_dict:
+                process_vad_event(speech_dict)
+        for speech_dict in vad_stream.process(np.frombuffer(data, dtype=np.int16)):
+            process_vad_event(speech_dict)
+        frames = vad_stream.take_frames()
+        if frames is not None and process_vad_frames is not None:
+            process_vad_frames(frames)
+
+        if clock is not None:
+            lag.set((clock.samples - vad_stream.samples_processed) * 1000 / input_sample_rate)
\ No newline at end of file
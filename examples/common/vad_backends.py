@@ -0,0 +1,174 @@
+import importlib.util
+import os
+import threading
+import numpy as np
+
+
+VAD_BACKEND_ENV = "VAD_BACKEND"
+VAD_MODEL_PATH_ENV = "VAD_MODEL_PATH"
+DEFAULT_BACKEND = "onnx"
+MODEL_SAMPLE_RATE = 16000 # Backends run the 16 kHz silero-vad network
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models") # Ships silero_vad.onnx; other model files can be placed here
+
+
+def default_model_path(filename: str) -> str:
+    """
+    Locates a silero-vad model file without touching the network. `common/models/<filename>` is
+    used when present; the ONNX model ships there, so the default backend needs neither torch
+    nor the silero-vad package. Other files, such as the TorchScript model, are taken from the
+    silero-vad pip package if it is installed (see requirements-torchscript.txt); the package is
+    only located, not imported.
+
+    Args:
+        filename (str): Model file name, e.g. "silero_vad.onnx".
+
+    Returns:
+        str: Path to the model file.
+    """
+    local = os.path.join(MODEL_DIR, filename)
+    if os.path.exists(local):
+        return local
+    spec = importlib.util.find_spec("silero_vad")
+    if spec is not None and spec.origin:
+        bundled = os.path.join(os.path.dirname(spec.origin), "data", filename)
+        if os.path.exists(bundled):
+            return bundled
+    return local
+
+
+class VADBackend:
+    """
+    VADBackend runs the 16 kHz silero-vad network with explicit recurrent state, so a single
+    loaded model can serve any number of independent streams.
+
+    Subclasses load their model lazily on the first call to `forward`, keeping process start-up
+    cheap for workers that may never run inference.
+    """
+
+    model_filename = None
+
+    def __init__(self, model_path: str = None):
+        """
+        Initializes the backend without loading the model.
+
+        Args:
+            model_path (str, optional): Path to the model file. Defaults to the bundled model.
+        """
+        self.model_path = model_path or default_model_path(self.model_filename)
+        self._model = None
+        self._load_lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    self._model = self._load()
+
+    def _load(self):
+        raise NotImplementedError
+
+    def forward(self, x: np.ndarray, state: np.ndarray) -> tuple:
+        """
+        Runs one step of the network over a batch of chunks.
+
+        Args:
+            x (np.ndarray): float32 array of shape (batch, context + chunk) holding each chunk
+                prefixed with the trailing context samples of the stream's previous chunk.
+            state (np.ndarray): float32 recurrent state of shape (2, batch, 128).
+
+        Returns:
+            tuple: (speech probabilities of shape (batch,), new state of shape (2, batch, 128))
+        """
+        raise NotImplementedError
+
+
+class OnnxVADBackend(VADBackend):
+    """
+    VADBackend running the silero-vad ONNX model with ONNX Runtime.
+    """
+
+    model_filename = "silero_vad.onnx"
+
+    def __init__(self, model_path: str = None, num_threads: int = 1):
+        """
+        Initializes the backend without loading the model.
+
+        Args:
+            model_path (str, optional): Path to the ONNX model. Defaults to the bundled model.
+            num_threads (int): Intra- and inter-op threads for the ONNX Runtime session.
+        """
+        super().__init__(model_path)
+        self.num_threads = num_threads
+        self._sample_rate = np.array(MODEL_SAMPLE_RATE, dtype=np.int64)
+
+    def _load(self):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.inter_op_num_threads = self.num_threads
+        options.intra_op_num_threads = self.num_threads
+        return onnxruntime.InferenceSession(self.model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+    def forward(self, x: np.ndarray, state: np.ndarray) -> tuple:
+        self._ensure_loaded()
+        out, new_state = self._model.run(None, {"input": x, "state": state, "sr": self._sample_rate})
+        return out[:, 0], new_state
+
+
+class TorchScriptVADBackend(VADBackend):
+    """
+    VADBackend running the silero-vad TorchScript model. torch is only imported on first use, and
+    is not in requirements.txt: install requirements-torchscript.txt to use this backend.
+    """
+
+    model_filename = "silero_vad.jit"
+
+    def _load(self):
+        import torch
+
+        model = torch.jit.load(self.model_path, map_location="cpu")
+        model.eval()
+        # The packaged model wraps separate 8 kHz and 16 kHz networks; only the 16 kHz one is used
+        return model._model
+
+    def forward(self, x: np.ndarray, state: np.ndarray) -> tuple:
+        import torch
+
+        self._ensure_loaded()
+        with torch.inference_mode():
+            out, new_state = self._model(torch.from_numpy(x), torch.from_numpy(np.ascontiguousarray(state)))
+        return out.numpy()[:, 0], new_state.numpy()
+
+
+VAD_BACKENDS = {
+    "onnx": OnnxVADBackend,
+    "torchscript": TorchScriptVADBackend,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_vad_backend(name: str = None, model_path: str = None) -> VADBackend:
+    """
+    Returns the shared backend instance for a backend name and model path, creating it if needed.
+
+    Args:
+        name (str, optional): "onnx" or "torchscript". Defaults to the VAD_BACKEND environment
+            variable, then "onnx".
+        model_path (str, optional): Model file path. Defaults to the VAD_MODEL_PATH environment
+            variable, then the bundled model.
+
+    Returns:
+        VADBackend: The backend; its model is loaded on first use.
+    """
+    name = name or os.getenv(VAD_BACKEND_ENV, DEFAULT_BACKEND)
+    model_path = model_path or os.getenv(VAD_MODEL_PATH_ENV)
+    if name not in VAD_BACKENDS:
+        raise ValueError(f"Unknown VAD backend '{name}' (supported: {', '.join(VAD_BACKENDS)})")
+
+    key = (name, model_path)
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = VAD_BACKENDS[name](model_path)
+        return _backends[key]
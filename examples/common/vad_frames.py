@@ -0,0 +1,133 @@
+import numpy as np
+
+from common.metrics import VAD_SPEECH_PROBABILITY
+
+
+class VADFrames:
+    """
+    VADFrames holds the speech probability of every VAD frame (512 samples at 16 kHz, 32 ms) run
+    for one audio packet, with the time at which each frame ends. It is published as the
+    "vad_frames" event next to the start/end events, so heuristics and metrics can use the
+    model's confidence, smooth it or apply their own thresholds without running the model again.
+    """
+
+    __slots__ = ("probabilities", "timestamps", "channel")
+
+    def __init__(self, probabilities: np.ndarray, timestamps: np.ndarray, channel: int = None):
+        """
+        Initializes the VADFrames.
+
+        Args:
+            probabilities (np.ndarray): float32 speech probability per frame; 0 for frames the
+                energy gate classified as silence.
+            timestamps (np.ndarray): float64 end of each frame in seconds from the start of the stream.
+            channel (int, optional): Input channel of a multichannel stream.
+        """
+        self.probabilities = probabilities
+        self.timestamps = timestamps
+        self.channel = channel
+
+    def __len__(self) -> int:
+        return len(self.probabilities)
+
+
+class FrameRecorder:
+    """
+    FrameRecorder collects the probabilities a VADTrigger sees through its `on_probability` hook
+    and hands them out as VADFrames, e.g. once per packet. Taken frames are also recorded in the
+    vad_speech_probability metric, so the metric costs no extra inference either.
+    """
+
+    def __init__(self, sampling_rate: int, channel: int = None):
+        """
+        Initializes the FrameRecorder.
+
+        Args:
+            sampling_rate (int): Sample rate of the trigger's sample counts.
+            channel (int, optional): Input channel the frames are stamped with.
+        """
+        self.sampling_rate = sampling_rate
+        self.channel = channel
+        self._probabilities = []
+        self._samples = []
+
+    def __call__(self, speech_prob: float, current_sample: int):
+        self._probabilities.append(speech_prob)
+        self._samples.append(current_sample)
+
+    def take(self) -> VADFrames:
+        """
+        Returns:
+            VADFrames: The frames recorded since the last call, or None if there are none.
+        """
+        if not self._probabilities:
+            return None
+        VAD_SPEECH_PROBABILITY.observe_many(self._probabilities)
+        frames = VADFrames(
+            np.array(self._probabilities, dtype=np.float32),
+            np.array(self._samples, dtype=np.float64) / self.sampling_rate,
+            self.channel
+        )
+        self._probabilities.clear()
+        self._samples.clear()
+        return frames
+
+
+class ProbabilitySmoother:
+    """
+    ProbabilitySmoother applies a moving average over the last `window` frames to a stream of
+    probability arrays, carrying the tail of each array over to the next so that packet
+    boundaries do not change the result.
+    """
+
+    def __init__(self, window: int = 3):
+        self.window = window
+        self._tail = np.zeros(0, dtype=np.float32)
+
+    def process(self, probabilities: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            probabilities (np.ndarray): The next frames' probabilities.
+
+        Returns:
+            np.ndarray: Smoothed probability per input frame. Until `window` frames have been
+                seen, frames are averaged over the frames available.
+        """
+        values = np.concatenate((self._tail, probabilities))
+        cumulative = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+        ends = np.arange(len(self._tail) + 1, len(values) + 1)
+        starts = np.maximum(ends - self.window, 0)
+        smoothed = ((cumulative[ends] - cumulative[starts]) / (ends - starts)).astype(np.float32)
+        self._tail = values[-(self.window - 1):] if self.window > 1 else values[:0]
+        return smoothed
+
+
+class Hysteresis:
+    """
+    Hysteresis turns a stream of probability arrays into a speech/non-speech decision per frame,
+    vectorized over each array: a frame at or above `on` switches to speech, one below `off`
+    switches to non-speech, and frames in between keep the previous decision. The defaults match
+    VADTrigger's thresholds.
+    """
+
+    def __init__(self, on: float = 0.4, off: float = 0.25, speech: bool = False):
+        self.on = on
+        self.off = off
+        self.speech = speech
+
+    def process(self, probabilities: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            probabilities (np.ndarray): The next frames' probabilities.
+
+        Returns:
+            np.ndarray: bool speech decision per frame.
+        """
+        if len(probabilities) == 0:
+            return np.zeros(0, dtype=bool)
+        decided = (probabilities >= self.on) | (probabilities < self.off)
+        # Each frame takes the decision of the last deciding frame up to it, or the carried state
+        last_decided = np.maximum.accumulate(np.where(decided, np.arange(len(probabilities)), -1))
+        speech = np.where(last_decided >= 0, probabilities[np.maximum(last_decided, 0)] >= self.on, self.speech)
+        self.speech = bool(speech[-1])
+        return speech
@@ -0,0 +1,394 @@
+import multiprocessing
+import os
+import queue
+import threading
+from multiprocessing import shared_memory
+from typing import Callable, Hashable
+import numpy as np
+
+from common.batched_vad import BatchedVADEngine
+from common.metrics import VAD_DROPPED_SAMPLES, VAD_QUEUE_DEPTH
+from common.vad import VAD_CHUNK_DURATION
+from common.vad_backends import get_vad_backend
+
+
+RING_SECONDS = 10 # Seconds of input audio each session's ring holds before packets are dropped
+RING_MIN_PACKET = VAD_CHUNK_DURATION # Shortest packet duration the ring reserves record headers for
+RECORD_HEADER = 8 # Bytes stored before each packet: its length and the samples dropped before it
+BYTES_PER_SAMPLE = 2 # int16
+
+
+class SharedRing:
+    """
+    SharedRing is a single-producer, single-consumer queue of byte packets in a shared memory
+    segment, so audio reaches a worker process as a copy into shared memory instead of a pickled
+    message. The segment starts with four uint64 counters: bytes written, bytes read, packets
+    written and packets read. Each counter has a single writer, and the producer only advances
+    its counters after the packet is in place, so no lock is needed across processes.
+
+    Packets are stored with a header and wrap around the end of the data region. The header holds
+    the packet's length and a count of samples the producer dropped just before it, so the
+    consumer can keep its timestamps aligned with the input.
+    """
+
+    def __init__(self, capacity: int, name: str = None):
+        """
+        Creates a new ring, or attaches to an existing one by name.
+
+        Args:
+            capacity (int): Bytes in the data region. Must match the creator's when attaching.
+            name (str, optional): Name of the shared memory segment to attach to.
+        """
+        self.capacity = capacity
+        self._owner = name is None
+        size = 4 * 8 + capacity
+        if self._owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            # Spawned workers share the creator's resource tracker, so attaching registers nothing new
+            self._shm = shared_memory.SharedMemory(name=name)
+        self._counters = np.ndarray(4, dtype=np.uint64, buffer=self._shm.buf)
+        self._data = np.ndarray(capacity, dtype=np.uint8, buffer=self._shm.buf, offset=4 * 8)
+        if self._owner:
+            self._counters[:] = 0
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def qsize(self) -> int:
+        """
+        Returns:
+            int: Packets written and not read yet.
+        """
+        return int(self._counters[2]) - int(self._counters[3])
+
+    def write(self, data: bytes, skipped: int = 0) -> bool:
+        """
+        Appends a packet. Only one process may write to a ring.
+
+        Args:
+            data (bytes): The packet.
+            skipped (int): Samples dropped since the previous packet that was written.
+
+        Returns:
+            bool: False if the ring has no room for the packet, which is then not written.
+        """
+        size = RECORD_HEADER + len(data)
+        write_pos = int(self._counters[0])
+        if size > self.capacity - (write_pos - int(self._counters[1])):
+            return False
+        header = len(data).to_bytes(RECORD_HEADER // 2, "little") + skipped.to_bytes(RECORD_HEADER // 2, "little")
+        self._copy_in(write_pos, header)
+        self._copy_in(write_pos + RECORD_HEADER, data)
+        self._counters[0] = write_pos + size
+        self._counters[2] += 1
+        return True
+
+    def read(self) -> tuple:
+        """
+        Removes the oldest packet. Only one process may read from a ring.
+
+        Returns:
+            tuple: The packet and the samples dropped just before it, or None if the ring is empty.
+        """
+        # Packets are counted after their bytes, so a counted packet is always complete
+        if int(self._counters[2]) == int(self._counters[3]):
+            return None
+        read_pos = int(self._counters[1])
+        header = self._copy_out(read_pos, RECORD_HEADER)
+        length = int.from_bytes(header[:RECORD_HEADER // 2], "little")
+        skipped = int.from_bytes(header[RECORD_HEADER // 2:], "little")
+        data = self._copy_out(read_pos + RECORD_HEADER, length)
+        self._counters[1] = read_pos + RECORD_HEADER + length
+        self._counters[3] += 1
+        return data, skipped
+
+    def _copy_in(self, position: int, data: bytes):
+        offset = position % self.capacity
+        source = np.frombuffer(data, dtype=np.uint8)
+        first = min(len(source), self.capacity - offset)
+        self._data[offset:offset + first] = source[:first]
+        self._data[:len(source) - first] = source[first:]
+
+    def _copy_out(self, position: int, length: int) -> bytes:
+        offset = position % self.capacity
+        first = min(length, self.capacity - offset)
+        if first == length:
+            return self._data[offset:offset + length].tobytes()
+        return self._data[offset:].tobytes() + self._data[:length - first].tobytes()
+
+    def close(self):
+        # The numpy views hold exported pointers into the segment and must go first
+        self._counters = None
+        self._data = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class PoolSession:
+    """
+    PoolSession is the front end's handle on a stream running in a worker process. Its `packets`
+    ring has the same `qsize()` as a VADSession's queue, so callers can apply backpressure the same way.
+
+    Samples dropped because the ring was full are counted in `skipped` until the next packet that
+    fits carries the count to the worker. `lock` keeps the ring from being released while a push
+    is writing to it.
+    """
+
+    def __init__(self, session_id: Hashable, worker: int, ring: SharedRing, process_vad_event: Callable, channels: int = 1, process_vad_frames: Callable = None):
+        self.session_id = session_id
+        self.worker = worker
+        self.channels = channels
+        self.packets = ring
+        self.process_vad_event = process_vad_event
+        self.process_vad_frames = process_vad_frames
+        self.skipped = 0
+        self.lock = threading.Lock()
+        self.released = False
+
+    def release(self):
+        """
+        Closes and unlinks the ring once neither the worker nor a push can be using it.
+        """
+        with self.lock:
+            if not self.released:
+                self.released = True
+                self.packets.close()
+
+
+def _worker_main(commands, results, data_ready, backend_name: str, energy_gate: bool, speculative: bool):
+    """
+    Entry point of a worker process. Runs a BatchedVADEngine over the sessions assigned to this
+    worker, reading their audio from shared rings and sending events to the results queue.
+    A removed session's ring is acknowledged on the results queue once the worker has let go of
+    it, so the front end knows when it can be unlinked.
+    """
+    engine = BatchedVADEngine(get_vad_backend(backend_name), energy_gate=energy_gate, speculative=speculative)
+    rings = {}
+
+    def add_session(session_id, ring_name, ring_capacity, input_sample_rate, min_silence_duration_ms, channels, channel, with_frames):
+        try:
+            rings[session_id] = SharedRing(ring_capacity, ring_name)
+        except FileNotFoundError:
+            # Released by the front end in close() before this worker got to it
+            return
+        engine.add_session(
+            session_id,
+            lambda speech_dict: results.put(("vad_event", session_id, speech_dict)),
+            input_sample_rate,
+            min_silence_duration_ms,
+            channels,
+            channel,
+            (lambda frames: results.put(("vad_frames", session_id, frames))) if with_frames else None
+        )
+
+    def remove_session(session_id, ring_name=None):
+        engine.remove_session(session_id)
+        ring = rings.pop(session_id, None)
+        if ring is not None:
+            ring.close()
+        if ring_name is not None:
+            results.put(("released", session_id, ring_name))
+
+    while True:
+        data_ready.wait(timeout=2*VAD_CHUNK_DURATION)
+        data_ready.clear()
+        # Commands are applied first, so audio is never read for a session this worker has not added
+        while True:
+            try:
+                command, *args = commands.get_nowait()
+            except queue.Empty:
+                break
+            if command == "add":
+                add_session(*args)
+            elif command == "remove":
+                remove_session(*args)
+            elif command == "stop":
+                for session_id in list(rings):
+                    remove_session(session_id)
+                return
+        for session_id, ring in rings.items():
+            while (record := ring.read()) is not None:
+                data, skipped = record
+                if skipped:
+                    # Packets queued before the gap must be run before the trigger jumps over it
+                    engine.tick()
+                    engine.skip(session_id, skipped)
+                engine.push(session_id, data)
+        engine.tick()
+
+
+class VADProcessPool:
+    """
+    VADProcessPool runs VAD for many streams in several worker processes, so inference uses more
+    than one core and does not hold the GIL of the process running the heuristics. It has the
+    same interface as BatchedVADEngine and can replace it.
+
+    Each stream is assigned to the worker with the fewest streams, where a BatchedVADEngine
+    batches it with that worker's other streams. Audio is written to a SharedRing per stream,
+    sized to hold `ring_seconds` of that stream's input, and the worker is woken through an
+    Event. Packets that do not fit are dropped, and the worker skips over them as silence so the
+    stream's timestamps stay aligned. Start/end events and VADFrames are sent back on one
+    results queue; `run` receives them and calls each stream's callbacks in this process.
+
+    A removed stream's ring stays allocated until its worker acknowledges the removal, or
+    until `close`, since the worker may still be reading it.
+
+    Worker processes keep their own metrics, so VAD inference time and frame counts are not in
+    this process's registry; the queue depth, labelled source="pool" and counting packets in the
+    rings, and the dropped samples are.
+    """
+
+    def __init__(self, workers: int = None, backend_name: str = None, energy_gate: bool = False, speculative: bool = False, ring_seconds: float = RING_SECONDS):
+        """
+        Initializes the VADProcessPool and starts its workers.
+
+        Args:
+            workers (int, optional): Worker processes. Defaults to the number of CPUs.
+            backend_name (str, optional): VAD backend each worker loads (see get_vad_backend).
+            energy_gate (bool): Skip inference on obvious silence (see BatchedVADEngine).
+            speculative (bool): Report likely ends and resumed speech as well (see VADTrigger).
+            ring_seconds (float): Seconds of input audio each stream's ring holds; packets that
+                do not fit are dropped.
+        """
+        context = multiprocessing.get_context("spawn")
+        self.ring_seconds = ring_seconds
+        self.sessions = {}
+        self._releasing = {} # Removed sessions whose rings the workers have not released yet
+        self._sessions_lock = threading.Lock()
+        self._results = context.Queue()
+        self._commands = []
+        self._data_ready = []
+        self._processes = []
+        self._load = []
+        for _ in range(workers or os.cpu_count()):
+            commands = context.Queue()
+            data_ready = context.Event()
+            process = context.Process(
+                target=_worker_main,
+                args=(commands, self._results, data_ready, backend_name, energy_gate, speculative),
+                daemon=True
+            )
+            process.start()
+            self._commands.append(commands)
+            self._data_ready.append(data_ready)
+            self._processes.append(process)
+            self._load.append(0)
+
+    def add_session(self, session_id: Hashable, process_vad_event: Callable, input_sample_rate: int, min_silence_duration_ms: float, channels: int = 1, channel: int = 0, process_vad_frames: Callable = None) -> PoolSession:
+        """
+        Registers a new stream; see BatchedVADEngine.add_session. The session id must be picklable.
+
+        Returns:
+            PoolSession: The registered session.
+        """
+        audio_bytes = int(input_sample_rate * channels * BYTES_PER_SAMPLE * self.ring_seconds)
+        capacity = audio_bytes + RECORD_HEADER * int(self.ring_seconds / RING_MIN_PACKET)
+        with self._sessions_lock:
+            worker = self._load.index(min(self._load))
+            self._load[worker] += 1
+            ring = SharedRing(capacity)
+            session = PoolSession(session_id, worker, ring, process_vad_event, channels, process_vad_frames)
+            self.sessions = {**self.sessions, session_id: session}
+        self._commands[worker].put((
+            "add", session_id, ring.name, capacity, input_sample_rate,
+            min_silence_duration_ms, channels, channel, process_vad_frames is not None
+        ))
+        self._data_ready[worker].set()
+        return session
+
+    def remove_session(self, session_id: Hashable):
+        """
+        Unregisters a stream. Its ring is released once the worker acknowledges the removal.
+        """
+        with self._sessions_lock:
+            sessions = dict(self.sessions)
+            session = sessions.pop(session_id, None)
+            self.sessions = sessions
+            if session is None:
+                return
+            self._load[session.worker] -= 1
+            self._releasing[session.packets.name] = session
+        self._commands[session.worker].put(("remove", session_id, session.packets.name))
+        self._data_ready[session.worker].set()
+
+    def push(self, session_id: Hashable, data: bytes):
+        """
+        Queues a packet of int16 PCM audio for a stream. Packets of one stream must be pushed
+        from one thread at a time.
+        """
+        session = self.sessions.get(session_id)
+        if session is None:
+            return
+        with session.lock:
+            if session.released:
+                return
+            if not session.packets.write(data, session.skipped):
+                dropped = len(data) // (BYTES_PER_SAMPLE * session.channels)
+                session.skipped += dropped
+                VAD_DROPPED_SAMPLES.inc(dropped)
+                return
+            session.skipped = 0
+        self._data_ready[session.worker].set()
+
+    def run(self, stop_event: threading.Event):
+        """
+        Delivers events from the workers until `stop_event` is set. Intended as a thread target.
+        """
+        queue_depth = VAD_QUEUE_DEPTH.labels("pool")
+        while not stop_event.is_set():
+            try:
+                event_type, session_id, data = self._results.get(timeout=2*VAD_CHUNK_DURATION)
+            except queue.Empty:
+                continue
+            if event_type == "released":
+                self._release(data)
+                continue
+            sessions = self.sessions
+            queue_depth.set(sum(session.packets.qsize() for session in sessions.values()))
+            session = sessions.get(session_id)
+            if session is None:
+                continue
+            if event_type == "vad_event":
+                session.process_vad_event(data)
+            elif session.process_vad_frames is not None:
+                session.process_vad_frames(data)
+
+    def _release(self, ring_name: str):
+        """
+        Releases the ring of a removed session once its worker has let go of it.
+        """
+        with self._sessions_lock:
+            session = self._releasing.pop(ring_name, None)
+        if session is not None:
+            session.release()
+
+    def close(self):
+        """
+        Stops the workers and releases every stream's ring, including rings of removed streams
+        whose acknowledgements were not received. Call after `run` has returned.
+
+        A worker only exits once everything it put on the results queue has been written to the
+        pipe, so the queue is drained here, discarding events, until every worker has exited.
+        """
+        for commands, data_ready in zip(self._commands, self._data_ready):
+            commands.put(("stop",))
+            data_ready.set()
+        while any(process.is_alive() for process in self._processes):
+            try:
+                event_type, _, data = self._results.get(timeout=2*VAD_CHUNK_DURATION)
+            except queue.Empty:
+                continue
+            if event_type == "released":
+                self._release(data)
+        for process in self._processes:
+            process.join()
+        with self._sessions_lock:
+            sessions, self.sessions = self.sessions, {}
+            releasing, self._releasing = self._releasing, {}
+        for session in sessions.values():
+            session.release()
+        for session in releasing.values():
+            session.release()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The examples import shared code as `common.*` and each implementation's modules by name
+EXAMPLES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, EXAMPLES_DIR)
+sys.path.insert(1, os.path.join(EXAMPLES_DIR, "vad_implementation"))
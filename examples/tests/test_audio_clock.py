@@ -0,0 +1,39 @@
+import pytest
+
+from common.audio_clock import AudioClock
+
+
+def test_cursor_counts_samples_exactly():
+    clock = AudioClock(48000)
+    for _ in range(100000):
+        clock.advance(480)
+    assert clock.samples == 48000000
+    assert clock.seconds == 1000.0
+
+
+def test_extrapolation_is_capped_at_the_last_packet():
+    clock = AudioClock(16000)
+    assert clock.seconds_at(5.0) == 0.0
+    assert clock.monotonic_at(1.0) is None
+
+    clock.advance(16000, monotonic_time=100.0)
+    clock.advance(1600, monotonic_time=101.0)
+    assert clock.seconds_at(101.0) == pytest.approx(1.1)
+    assert clock.seconds_at(101.05) == pytest.approx(1.15)
+    # Past the length of the last packet (0.1 s), the estimate stops growing
+    assert clock.seconds_at(101.1) == pytest.approx(1.2)
+    assert clock.seconds_at(130.0) == pytest.approx(1.2)
+    # Readings from before the last advance do not go back in time
+    assert clock.seconds_at(100.5) == pytest.approx(1.1)
+
+
+def test_monotonic_at_maps_audio_time_to_capture_time():
+    clock = AudioClock(16000)
+    clock.advance(32000, monotonic_time=50.0)
+    assert clock.monotonic_at(2.0) == pytest.approx(50.0)
+    assert clock.monotonic_at(1.5) == pytest.approx(49.5)
+    assert clock.monotonic_at(2.25) == pytest.approx(50.25)
+
+    clock.reset()
+    assert clock.samples == 0
+    assert clock.monotonic_at(1.0) is None
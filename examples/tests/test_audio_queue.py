@@ -0,0 +1,100 @@
+import queue
+import threading
+
+import numpy as np
+import pytest
+
+from common.audio_queue import AudioQueue
+from common.vad import VAD_CHUNK, VADStream, VADTrigger, create_vad_iterator
+
+
+def packet(samples: int, value: int = 0) -> bytes:
+    return np.full(samples, value, dtype=np.int16).tobytes()
+
+
+def drain(audio_queue: AudioQueue) -> list:
+    items = []
+    while not audio_queue.empty():
+        data, skipped = audio_queue.get(timeout=0)
+        items.append((np.frombuffer(data, dtype=np.int16)[0], skipped))
+    return items
+
+
+def test_drop_oldest_keeps_the_bound_and_accounts_for_dropped_samples():
+    audio_queue = AudioQueue(2, "drop_oldest")
+    for value in range(5):
+        audio_queue.put(packet(100, value))
+
+    assert audio_queue.qsize() == 2
+    assert audio_queue.dropped_packets == 3
+    # The samples of the three dropped packets are reported with the first packet after them
+    assert drain(audio_queue) == [(3, 300), (4, 0)]
+
+
+def test_samples_dropped_from_a_drained_queue_go_to_the_next_packet():
+    audio_queue = AudioQueue(1, "drop_oldest", channels=2)
+    audio_queue.put(packet(200, 0))
+    audio_queue.put(packet(200, 1))
+    audio_queue.get(timeout=0)
+    audio_queue.put(packet(200, 2))
+    assert drain(audio_queue) == [(2, 0)]
+
+    audio_queue.put(packet(200, 3))
+    audio_queue.put(packet(200, 4))
+    assert drain(audio_queue) == [(4, 100)] # 200 int16 values of stereo are 100 samples
+
+
+def test_defer_in_speech_grows_during_speech_and_drops_outside_it():
+    speech = False
+    audio_queue = AudioQueue(2, "defer_in_speech", is_speech=lambda: speech)
+    speech = True
+    for value in range(4):
+        audio_queue.put(packet(100, value))
+    assert audio_queue.qsize() == 4
+    assert audio_queue.dropped_packets == 0
+
+    speech = False
+    audio_queue.put(packet(100, 4))
+    assert drain(audio_queue) == [(3, 300), (4, 0)]
+
+
+def test_defer_in_speech_needs_is_speech():
+    with pytest.raises(ValueError):
+        AudioQueue(2, "defer_in_speech")
+    with pytest.raises(ValueError):
+        AudioQueue(2, "skip_everything")
+
+
+def test_block_waits_for_the_consumer():
+    audio_queue = AudioQueue(1, "block")
+    audio_queue.put(packet(100, 0))
+    producer = threading.Thread(target=audio_queue.put, args=(packet(100, 1),))
+    producer.start()
+    producer.join(timeout=0.1)
+    assert producer.is_alive()
+
+    assert audio_queue.get(timeout=1)[1] == 0
+    producer.join(timeout=1)
+    assert not producer.is_alive()
+    assert drain(audio_queue) == [(1, 0)]
+    with pytest.raises(queue.Empty):
+        audio_queue.get(timeout=0)
+
+
+def test_trigger_skip_matches_silent_updates():
+    skipped, updated = (VADTrigger(min_silence_duration_ms=256) for _ in range(2))
+    for trigger in (skipped, updated):
+        trigger.update(0.9)
+    assert skipped.skip(VAD_CHUNK * 10) == {'end': VAD_CHUNK}
+
+    events = [updated.update(0.0) for _ in range(10)]
+    assert [event for event in events if event] == [{'end': VAD_CHUNK}]
+    assert skipped.current_sample == updated.current_sample
+
+
+def test_stream_skip_keeps_timestamps_aligned():
+    vad_stream = VADStream(48000, create_vad_iterator(256))
+    list(vad_stream.process(np.zeros(4800, dtype=np.int16)))
+    vad_stream.skip(48000)
+    assert vad_stream.samples_processed == 52800
+    assert vad_stream.vad_iterator.current_sample == 52800 // 3
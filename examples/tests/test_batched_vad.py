@@ -0,0 +1,146 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from common.audio_clock import AudioClock
+from common.audio_queue import AudioQueue
+from common.batched_vad import BatchedVADEngine, vad_engine_worker
+from common.metrics import VAD_LAG_MS
+from common.synthetic import synthetic_recording
+from common.vad import VADStream, create_vad_iterator
+
+PACKET_SECONDS = 0.096
+
+
+def single_stream_events(audio: np.ndarray, sample_rate: int, channels: int = 1, channel: int = 0) -> list:
+    vad_stream = VADStream(sample_rate, create_vad_iterator(256))
+    events = []
+    packet = int(sample_rate * PACKET_SECONDS) * channels
+    for offset in range(0, len(audio), packet):
+        events.extend(vad_stream.process(audio[offset:offset + packet][channel::channels]))
+    return events
+
+
+@pytest.fixture(scope="module")
+def recordings():
+    return [synthetic_recording(30, sample_rate, seed=seed) for seed, sample_rate in enumerate((16000, 48000, 8000))]
+
+
+def test_batched_events_match_single_stream(recordings):
+    engine = BatchedVADEngine(max_batch_size=2)
+    events = {index: [] for index in range(len(recordings))}
+    for index, recording in enumerate(recordings):
+        engine.add_session(index, events[index].append, recording.sample_rate, 256)
+
+    # Push every stream's packets interleaved, ticking after each round like the engine thread would
+    positions = [0] * len(recordings)
+    while any(position < len(recording.audio) for position, recording in zip(positions, recordings)):
+        for index, recording in enumerate(recordings):
+            packet = int(recording.sample_rate * PACKET_SECONDS)
+            if positions[index] < len(recording.audio):
+                engine.push(index, recording.audio[positions[index]:positions[index] + packet].tobytes())
+                positions[index] += packet
+        engine.tick()
+
+    for index, recording in enumerate(recordings):
+        assert events[index] == single_stream_events(recording.audio, recording.sample_rate)
+    assert any(events.values())
+
+
+def test_multichannel_sessions_match_each_channel(recordings):
+    left, right = recordings[0].audio, recordings[0].audio[::-1].copy()
+    interleaved = np.stack((left, right), axis=1).reshape(-1)
+    engine = BatchedVADEngine()
+    events = ([], [])
+    for channel in range(2):
+        engine.add_session(channel, events[channel].append, 16000, 256, channels=2, channel=channel)
+
+    packet = int(16000 * PACKET_SECONDS) * 2
+    for offset in range(0, len(interleaved), packet):
+        for channel in range(2):
+            engine.push(channel, interleaved[offset:offset + packet].tobytes())
+        engine.tick()
+
+    for channel in range(2):
+        assert events[channel] == single_stream_events(interleaved, 16000, channels=2, channel=channel)
+
+
+def test_removed_session_gets_no_events(recordings):
+    engine = BatchedVADEngine()
+    events = []
+    engine.add_session("a", events.append, 16000, 256)
+    engine.remove_session("a")
+    engine.push("a", recordings[0].audio.tobytes())
+    assert engine.tick() == 0
+    assert events == []
+
+
+def test_skip_matches_single_stream_skip(recordings):
+    recording = recordings[1]
+    packet = int(recording.sample_rate * PACKET_SECONDS)
+    dropped = range(40 * packet, 60 * packet)
+    engine = BatchedVADEngine()
+    events = []
+    engine.add_session("a", events.append, recording.sample_rate, 256)
+    vad_stream = VADStream(recording.sample_rate, create_vad_iterator(256))
+    expected = []
+
+    for offset in range(0, len(recording.audio), packet):
+        if offset in dropped:
+            engine.tick()
+            engine.skip("a", packet)
+            speech_dict = vad_stream.skip(packet)
+            if speech_dict:
+                expected.append(speech_dict)
+            continue
+        engine.push("a", recording.audio[offset:offset + packet].tobytes())
+        expected.extend(vad_stream.process(recording.audio[offset:offset + packet]))
+    engine.tick()
+
+    assert events == expected
+    assert events != single_stream_events(recording.audio, recording.sample_rate)
+    assert engine.sessions["a"].samples_processed == vad_stream.samples_processed
+
+
+def test_engine_worker_skips_audio_dropped_by_the_queue(recordings):
+    left, right = recordings[0].audio, recordings[0].audio[::-1].copy()
+    interleaved = np.stack((left, right), axis=1).reshape(-1)
+    packet = int(16000 * PACKET_SECONDS)
+    engine = BatchedVADEngine()
+    events = ([], [])
+    for channel in range(2):
+        engine.add_session(channel, events[channel].append, 16000, 256, channels=2, channel=channel)
+    vad_queue = AudioQueue(4, "drop_oldest", channels=2)
+    clock = AudioClock(16000)
+    streams = [VADStream(16000, create_vad_iterator(256)) for _ in range(2)]
+    expected = ([], [])
+
+    # Each round overflows the queue by six packets, then lets the worker drain it
+    for offset in range(0, len(left), 10 * packet):
+        for index in range(10):
+            start = offset + index * packet
+            data = interleaved[2 * start:2 * (start + packet)]
+            vad_queue.put(data.tobytes())
+            clock.advance(len(data) // 2)
+            for channel, vad_stream in enumerate(streams):
+                if index < 6:
+                    speech_dict = vad_stream.skip(len(data) // 2)
+                    expected[channel].extend([speech_dict] if speech_dict else [])
+                else:
+                    expected[channel].extend(vad_stream.process(data[channel::2]))
+        stop_event = threading.Event()
+        worker = threading.Thread(target=vad_engine_worker, args=(vad_queue, engine, [0, 1], stop_event, clock))
+        worker.start()
+        while not vad_queue.empty():
+            time.sleep(0.001)
+        stop_event.set()
+        worker.join()
+
+    assert vad_queue.dropped_samples > 0
+    for channel in range(2):
+        assert events[channel] == expected[channel]
+        assert engine.sessions[channel].samples_processed == clock.samples
+    assert any(events)
+    assert VAD_LAG_MS.labels("default").value == 0
@@ -0,0 +1,49 @@
+from common.audio_clock import AudioClock
+from common.dispatcher import EventDispatcher
+
+
+class RecordingHeuristic:
+    def __init__(self):
+        self.audio_cursor = 0.0
+        self.processed = []
+
+    def process(self, event: dict):
+        # The cursor is set per event before the heuristic sees it
+        assert self.audio_cursor == event["audio_cursor"]
+        self.processed.append((event["event_type"], event["audio_cursor"], event["data"]))
+
+
+def test_events_are_applied_by_cursor_then_arrival():
+    heuristic = RecordingHeuristic()
+    clock = AudioClock(16000)
+    dispatcher = EventDispatcher(heuristic, clock)
+
+    clock.advance(16000)
+    dispatcher.push("vad_event", "late", 1.5)
+    dispatcher.push("transcript", "first at 1.0")
+    dispatcher.push("transcript", "early", 0.5)
+    dispatcher.push("vad_event", "second at 1.0", 1.0)
+    dispatcher.dispatch_pending()
+
+    assert heuristic.processed == [
+        ("transcript", 0.5, "early"),
+        ("transcript", 1.0, "first at 1.0"),
+        ("vad_event", 1.0, "second at 1.0"),
+        ("vad_event", 1.5, "late"),
+    ]
+    assert heuristic.audio_cursor == 1.5
+
+
+def test_thread_delivers_queued_events_on_stop():
+    heuristic = RecordingHeuristic()
+    clock = AudioClock(8000)
+    processed = []
+    dispatcher = EventDispatcher(heuristic, clock, on_processed=lambda h: processed.append(h.audio_cursor))
+    dispatcher.start()
+    for packet in range(5):
+        clock.advance(800)
+        dispatcher.push("tick", packet)
+    dispatcher.stop()
+
+    assert [data for _, _, data in heuristic.processed] == list(range(5))
+    assert processed == [0.1, 0.2, 0.3, 0.4, 0.5]
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from common.batched_vad import BatchedVADEngine
+from common.energy_gate import HANGOVER_FRAMES, EnergyGate
+from common.synthetic import synthetic_recording
+from common.vad import VAD_CHUNK, VAD_CONTEXT, VADIterator, VADStream
+from common.vad_backends import VADBackend
+
+
+class LevelBackend(VADBackend):
+    """
+    Stateless stand-in for the model: the speech probability follows the chunk's level, so the
+    only state that gating could change is the trigger's.
+    """
+
+    def __init__(self):
+        super().__init__("unused")
+        self.frames = 0
+
+    def forward(self, x: np.ndarray, state: np.ndarray) -> tuple:
+        self.frames += len(x)
+        rms = np.sqrt(np.mean(x[:, VAD_CONTEXT:] ** 2, axis=1))
+        return np.clip(rms * 20, 0, 1).astype(np.float32), state
+
+
+def level_events(audio: np.ndarray, sample_rate: int, gate: bool) -> tuple:
+    backend = LevelBackend()
+    vad_stream = VADStream(sample_rate, VADIterator(backend, min_silence_duration_ms=256, gate=EnergyGate() if gate else None))
+    events = []
+    for offset in range(0, len(audio), 1536):
+        events.extend(vad_stream.process(audio[offset:offset + 1536]))
+    return events, backend.frames
+
+
+@pytest.fixture(scope="module")
+def recording():
+    # Digital silence between the speech segments, so the gate closes in every pause
+    recording = synthetic_recording(30, 16000, seed=1)
+    speech = np.zeros(len(recording.audio), dtype=bool)
+    for start, end in recording.speech_segments:
+        speech[int(start * 16000):int(end * 16000)] = True
+    recording.audio = np.where(speech, recording.audio, 0).astype(np.int16)
+    return recording
+
+
+def test_gate_closes_after_hangover_and_reopens_at_once():
+    gate = EnergyGate()
+    silence = np.zeros(VAD_CHUNK, dtype=np.float32)
+    loud = np.full(VAD_CHUNK, 0.1, dtype=np.float32)
+
+    assert [gate.is_silence(silence) for _ in range(HANGOVER_FRAMES)] == [False] * (HANGOVER_FRAMES - 1) + [True]
+    assert not gate.is_silence(loud)
+    assert not gate.closed
+
+
+def test_quiet_fricative_noise_does_not_close_the_gate():
+    gate = EnergyGate()
+    # White noise at about -60 dBFS: below the close threshold, above the fricative floor, high zero-crossing rate
+    noise = 0.001 * np.random.default_rng(0).standard_normal(VAD_CHUNK).astype(np.float32)
+    assert not any(gate.is_silence(noise) for _ in range(3 * HANGOVER_FRAMES))
+
+
+def test_gate_does_not_change_trigger_decisions(recording):
+    # With a stateless model, skipping inference on gated chunks must leave every event unchanged
+    ungated, ungated_frames = level_events(recording.audio, recording.sample_rate, gate=False)
+    gated, gated_frames = level_events(recording.audio, recording.sample_rate, gate=True)
+
+    assert gated == ungated
+    assert ungated
+    assert gated_frames < ungated_frames
+
+
+def test_batched_gate_matches_single_stream_gate(recording):
+    events = []
+    backend = LevelBackend()
+    engine = BatchedVADEngine(backend, energy_gate=True)
+    engine.add_session(0, events.append, recording.sample_rate, 256)
+    for offset in range(0, len(recording.audio), 1536):
+        engine.push(0, recording.audio[offset:offset + 1536].tobytes())
+        engine.tick()
+
+    assert events == level_events(recording.audio, recording.sample_rate, gate=True)[0]
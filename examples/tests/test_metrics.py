@@ -0,0 +1,59 @@
+import pytest
+
+from common.audio_queue import AudioQueue
+from common.batched_vad import BatchedVADEngine
+from common.metrics import Counter, Gauge, Histogram, Registry, VAD_QUEUE_DEPTH
+
+
+def test_render_text_format():
+    registry = Registry()
+    endpoints = Counter("endpoints_total", "Completed utterances.", ("completed_by",), registry=registry)
+    depth = Gauge("queue_depth", "Packets waiting.", registry=registry)
+    latency = Histogram("latency_ms", "Endpoint latency.", buckets=(100, 50), registry=registry)
+    endpoints.labels("speech_final").inc()
+    endpoints.labels("speech_final").inc(2)
+    endpoints.labels('say "hi"\n').inc()
+    depth.set(3)
+    latency.observe(20)
+    latency.observe(75)
+    latency.observe(500)
+
+    assert registry.render() == "\n".join([
+        "# HELP endpoints_total Completed utterances.",
+        "# TYPE endpoints_total counter",
+        'endpoints_total{completed_by="speech_final"} 3',
+        'endpoints_total{completed_by="say \\"hi\\"\\n"} 1',
+        "# HELP queue_depth Packets waiting.",
+        "# TYPE queue_depth gauge",
+        "queue_depth 3",
+        "# HELP latency_ms Endpoint latency.",
+        "# TYPE latency_ms histogram",
+        'latency_ms_bucket{le="50.0"} 1',
+        'latency_ms_bucket{le="100.0"} 2',
+        'latency_ms_bucket{le="+Inf"} 3',
+        "latency_ms_sum 595.0",
+        "latency_ms_count 3",
+    ]) + "\n"
+
+
+def test_labels_are_cached_and_checked():
+    registry = Registry()
+    endpoints = Counter("endpoints_total", "Completed utterances.", ("completed_by",), registry=registry)
+    assert endpoints.labels("vad_interim") is endpoints.labels("vad_interim")
+    assert endpoints.labels("vad_interim") is not endpoints.labels("speech_final")
+    with pytest.raises(ValueError):
+        endpoints.labels()
+    with pytest.raises(ValueError):
+        Gauge("endpoints_total", "Duplicate.", registry=registry)
+
+
+def test_queue_depth_is_kept_per_source():
+    audio_queue = AudioQueue(8, name="test_queue")
+    engine = BatchedVADEngine(name="test_engine")
+    engine.add_session("a", lambda speech_dict: None, 16000, 256)
+    for _ in range(3):
+        audio_queue.put(bytes(320))
+        engine.push("a", bytes(320))
+    engine.tick()
+    assert VAD_QUEUE_DEPTH.labels("test_queue").value == 3
+    assert VAD_QUEUE_DEPTH.labels("test_engine").value == 3
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from common.pause_estimator import MIN_PAUSES, PauseEstimator
+from common.vad import VADTrigger
+
+
+class Word:
+    def __init__(self, start: float, end: float):
+        self.start = start
+        self.end = end
+
+
+def speak(estimator: PauseEstimator, gaps, vad_silences: bool = True):
+    """
+    Feeds one final result per pause, with the pause before its only word, plus the VAD silence
+    the pause produces when it is at least the trigger's current silence duration.
+    """
+    cursor = 0.0
+    for gap in gaps:
+        cursor += gap
+        estimator.observe_words([Word(cursor, cursor + 0.3)])
+        if vad_silences and gap * 1000 >= estimator.min_silence_duration_ms:
+            estimator.observe_silence(gap)
+        cursor += 0.3
+
+
+@pytest.mark.parametrize("low, high, initial_ms, expected_ms", [
+    (0.12, 0.2, 320, 240), # Fast talker: the silence duration falls
+    (0.35, 0.55, 256, 675), # Slow talker: it rises, up to the bound
+])
+def test_silence_duration_converges_both_ways(low, high, initial_ms, expected_ms):
+    trigger = VADTrigger(min_silence_duration_ms=initial_ms)
+    estimator = PauseEstimator(1.0, initial_ms, vad_trigger=trigger)
+    gaps = np.random.default_rng(0).uniform(low, high, 200)
+
+    speak(estimator, gaps)
+
+    expected_ms = min(expected_ms, estimator.silence_bounds_ms[1])
+    assert estimator.min_silence_duration_ms == pytest.approx(expected_ms, rel=0.1)
+    assert trigger.min_silence_samples == pytest.approx(trigger.sampling_rate * estimator.min_silence_duration_ms / 1000)
+
+
+def test_vad_silences_do_not_ratchet_the_silence_duration():
+    estimator = PauseEstimator(1.0, 256)
+    # Every silence VAD can report is at least the current duration
+    for _ in range(10):
+        for gap in np.linspace(estimator.min_silence_duration_ms / 1000, 0.6, MIN_PAUSES):
+            estimator.observe_silence(gap)
+    assert estimator.min_silence_duration_ms == 256
+    assert len(estimator.pauses) > MIN_PAUSES
+
+
+def test_pause_threshold_converges_both_ways():
+    rng = np.random.default_rng(1)
+    fast = PauseEstimator(1.0, 256)
+    speak(fast, rng.uniform(0.1, 0.3, 200), vad_silences=False)
+    assert fast.pause_threshold == fast.pause_bounds[0] # 1.5 x p90 of 0.28 s, held at the lower bound
+
+    slow = PauseEstimator(1.0, 256)
+    speak(slow, rng.uniform(0.3, 1.0, 200), vad_silences=False)
+    assert slow.pause_threshold > 1.0
+
+
+def test_estimates_hold_until_enough_pauses():
+    estimator = PauseEstimator(1.0, 256)
+    speak(estimator, [0.15] * (MIN_PAUSES - 1))
+    assert estimator.pause_threshold == 1.0
+    assert estimator.min_silence_duration_ms == 256
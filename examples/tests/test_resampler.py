@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from common.resampler import StreamingResampler
+
+
+def _resample_in_packets(samples: np.ndarray, orig_sr: int, target_sr: int, packet_sizes) -> np.ndarray:
+    resampler = StreamingResampler(orig_sr, target_sr, max_input_samples=64)
+    output = []
+    position = 0
+    for size in packet_sizes:
+        # process() returns a view into the resampler's buffer, valid until the next call
+        output.append(resampler.process(samples[position:position + size]).copy())
+        position += size
+    return np.concatenate(output)
+
+
+@pytest.mark.parametrize("orig_sr, target_sr", [(48000, 16000), (44100, 16000), (8000, 16000), (16000, 16000)])
+def test_output_does_not_depend_on_packet_boundaries(orig_sr, target_sr):
+    rng = np.random.default_rng(0)
+    samples = rng.standard_normal(orig_sr).astype(np.float32)
+
+    whole = _resample_in_packets(samples, orig_sr, target_sr, [len(samples)])
+    sizes = rng.integers(1, 3000, size=len(samples))
+    sizes = sizes[np.cumsum(sizes) <= len(samples)].tolist()
+    sizes.append(len(samples) - sum(sizes))
+    chunked = _resample_in_packets(samples, orig_sr, target_sr, sizes)
+
+    np.testing.assert_allclose(chunked, whole, atol=1e-6)
+    # Output trails the input by the filter's group delay
+    expected = len(samples) * target_sr / orig_sr
+    assert expected - 64 <= len(whole) <= expected + 1
+
+
+def test_downsampled_tone_keeps_frequency_and_level():
+    orig_sr, target_sr = 48000, 16000
+    t = np.arange(orig_sr) / orig_sr
+    tone = np.sin(2 * np.pi * 440 * t).astype(np.float32)
+
+    output = _resample_in_packets(tone, orig_sr, target_sr, [960] * 50)
+
+    # Skip the filter's start-up transient
+    steady = output[1000:]
+    spectrum = np.abs(np.fft.rfft(steady))
+    peak_hz = np.argmax(spectrum) * target_sr / len(steady)
+    assert abs(peak_hz - 440) < 2
+    assert np.sqrt(np.mean(steady ** 2)) == pytest.approx(np.sqrt(0.5), rel=0.02)
+
+
+def test_int16_scale():
+    resampler = StreamingResampler(16000, 16000)
+    samples = np.array([16384, -32768], dtype=np.int16)
+    np.testing.assert_allclose(resampler.process(samples, scale=1 / 32768.0), [0.5, -1.0])
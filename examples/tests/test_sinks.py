@@ -0,0 +1,76 @@
+import json
+import socket
+import threading
+import time
+
+from common.metrics import SINK_ERRORS
+from common.sinks import CallbackSink, JSONLSink, UnixSocketSink
+
+UTTERANCES = [{"type": "utterance", "transcript": f"utterance {index}", "end_time": index * 1.5} for index in range(20)]
+
+
+def test_jsonl_sink_round_trip(tmp_path):
+    path = tmp_path / "utterances.jsonl"
+    sink = JSONLSink(str(path))
+    for utterance in UTTERANCES:
+        sink.publish(utterance)
+    sink.close()
+
+    assert [json.loads(line) for line in path.read_text().splitlines()] == UTTERANCES
+
+
+def test_callback_sink_delivers_in_order_and_survives_errors():
+    received = []
+
+    def callback(utterance: dict):
+        if utterance["transcript"] == "utterance 3":
+            raise ValueError("bad utterance")
+        received.append(utterance)
+
+    errors = SINK_ERRORS.labels(CallbackSink.name).value
+    sink = CallbackSink(callback)
+    for utterance in UTTERANCES:
+        sink.publish(utterance)
+    sink.close()
+
+    assert received == UTTERANCES[:3] + UTTERANCES[4:]
+    assert SINK_ERRORS.labels(CallbackSink.name).value == errors + 1
+
+
+def _wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_unix_socket_sink_drops_a_stalled_client(tmp_path):
+    path = str(tmp_path / "utterances.sock")
+    sink = UnixSocketSink(path, max_buffered_bytes=64 * 1024)
+    stalled = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stalled.connect(path)
+    reader = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    reader.connect(path)
+    _wait_for(lambda: len(sink._clients) == 2)
+
+    received = bytearray()
+    read_thread = threading.Thread(target=lambda: [received.extend(data) for data in iter(lambda: reader.recv(65536), b"")], daemon=True)
+    read_thread.start()
+
+    # Far more than the socket and the client buffer hold, so the client that never reads falls
+    # behind; the reader takes each utterance before the next is published
+    utterances = [{"type": "utterance", "transcript": "x" * 10000, "index": index} for index in range(200)]
+    slowest = 0.0
+    for count, utterance in enumerate(utterances, 1):
+        started = time.monotonic()
+        sink.publish(utterance)
+        _wait_for(lambda: received.count(b"\n") == count)
+        slowest = max(slowest, time.monotonic() - started)
+    assert len(sink._clients) == 1
+    assert slowest < 0.25 # Sends to the stalled client never block delivery to the reader
+    sink.close()
+    read_thread.join(timeout=5)
+
+    assert [json.loads(line)["index"] for line in received.splitlines()] == list(range(200))
+    stalled.close()
+    reader.close()
@@ -0,0 +1,49 @@
+import os
+
+from common.audio_clock import AudioClock
+from common.dispatcher import EventDispatcher
+from common.multichannel import MultichannelHeuristic
+from common.records import EventRecord
+from common.terminal_renderer import TerminalRenderer
+from heuristic import VADHeuristic
+
+TERMINAL = os.terminal_size((150, 40))
+
+
+class CountingHeuristic(MultichannelHeuristic):
+    display_calls = 0
+
+    def get_display_data(self) -> dict:
+        self.display_calls += 1
+        return super().get_display_data()
+
+
+def test_update_snapshots_the_histories():
+    heuristic = VADHeuristic()
+    heuristic.events.append(EventRecord(0.1, "tick", "first"))
+    renderer = TerminalRenderer()
+    renderer.update(**heuristic.get_display_data())
+
+    heuristic.events.append(EventRecord(0.2, "tick", "second"))
+
+    assert [event.content for event in renderer.events] == ["first"]
+    assert any("first" in line for line in renderer.build_lines(TERMINAL))
+    assert not any("second" in line for line in renderer.build_lines(TERMINAL))
+
+
+def test_dispatcher_only_builds_display_data_when_a_frame_is_due():
+    heuristic = CountingHeuristic([VADHeuristic(), VADHeuristic()])
+    renderer = TerminalRenderer()
+    dispatcher = EventDispatcher(heuristic, AudioClock(16000), on_processed=renderer.refresh)
+
+    for index in range(50):
+        dispatcher.push("vad_event", {"start": index * 0.1, "channel": index % 2}, index * 0.1)
+    dispatcher.dispatch_pending()
+
+    # The render thread is not running, so only the first event's snapshot was requested
+    assert heuristic.display_calls == 1
+    renderer._requested.set()
+    dispatcher.push("tick", None, 5.0)
+    dispatcher.dispatch_pending()
+    assert heuristic.display_calls == 2
+    assert len(renderer.events) > 1
@@ -0,0 +1,63 @@
+import importlib.util
+import os
+
+import pytest
+
+from common.replay import replay_recording
+from common.synthetic import _result, synthetic_recording
+
+# Loaded by path, since vad_implementation has a module named heuristic as well
+_spec = importlib.util.spec_from_file_location(
+    "transcript_heuristic",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "transcript_implementation", "heuristic.py")
+)
+_module = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_module)
+TranscriptHeuristic = _module.TranscriptHeuristic
+
+
+def word(text: str, start: float, end: float) -> dict:
+    return {"word": text, "start": start, "end": end, "confidence": 0.9}
+
+
+def deliver(heuristic: TranscriptHeuristic, audio_cursor: float, result):
+    heuristic.audio_cursor = audio_cursor
+    heuristic.process({"event_type": "transcript", "audio_cursor": audio_cursor, "data": result})
+
+
+@pytest.mark.parametrize("seed", [0, 3])
+def test_latency_does_not_cut_utterances(seed):
+    # With 1 s of transcription latency, the live cursor runs past last_word_end + pause_threshold
+    # during speech; only transcribed audio may count as a pause
+    recording = synthetic_recording(120, latency=1.0, seed=seed)
+    heuristic = TranscriptHeuristic(pause_threshold=1.0, utterance_history_size=None)
+    replay_recording(recording, heuristic)
+
+    utterances = list(heuristic.completed_utterances)
+    assert len(utterances) == len(recording.speech_segments)
+    for utterance, (start, end) in zip(utterances, recording.speech_segments):
+        assert utterance.end_time >= end - 0.3
+
+
+def test_local_utt_end_fires_on_transcribed_silence():
+    heuristic = TranscriptHeuristic(pause_threshold=1.0)
+    deliver(heuristic, 1.5, _result(0.0, 1.2, [word("hello", 0.2, 0.5), word("there", 0.6, 1.0)], True, False))
+
+    # Two seconds of live audio have passed, but only 1.8 s of it is transcribed
+    deliver(heuristic, 3.0, _result(1.2, 0.6, [], False, False))
+    assert not heuristic.completed_utterances
+
+    deliver(heuristic, 3.2, _result(1.2, 0.9, [], False, False))
+    assert [utterance.completed_by for utterance in heuristic.completed_utterances] == ["local_utt_end"]
+    assert heuristic.completed_utterances[0].transcript == "hello there"
+
+
+def test_stable_interim_fires_after_half_the_pause():
+    heuristic = TranscriptHeuristic(pause_threshold=1.0)
+    words = [word("hello", 0.2, 0.5)]
+    for cursor, duration in ((0.8, 0.6), (1.0, 0.8), (1.4, 0.95)):
+        deliver(heuristic, cursor, _result(0.0, duration, words, False, False))
+    assert not heuristic.completed_utterances
+
+    deliver(heuristic, 1.5, _result(0.0, 1.0, words, False, False))
+    assert [utterance.completed_by for utterance in heuristic.completed_utterances] == ["stable_interim"]
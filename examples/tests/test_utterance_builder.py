@@ -0,0 +1,56 @@
+from common.synthetic import _result
+from common.utterance_builder import UtteranceBuilder
+from heuristic import VADHeuristic
+
+
+def word(text: str, start: float, end: float) -> dict:
+    return {"word": text, "start": start, "end": end, "confidence": 0.9}
+
+
+def result_words(*words) -> list:
+    return _result(0.0, 1.0, list(words), True, False).channel.alternatives[0].words
+
+
+def test_text_is_joined_once_and_invalidated_by_changes():
+    builder = UtteranceBuilder()
+    assert not builder
+    assert builder.text == ""
+    assert builder.start is None and builder.end is None
+
+    builder.append("hello there", result_words(word("hello", 0.2, 0.5), word("there", 0.6, 1.0)))
+    text = builder.text
+    assert text == "hello there"
+    assert builder.text is text
+
+    builder.append("general", result_words(word("general", 1.4, 1.9)))
+    assert builder.text == "hello there general"
+    assert (builder.start, builder.end) == (0.2, 1.9)
+
+    interim = UtteranceBuilder()
+    interim.append("kenobi", result_words(word("kenobi", 2.0, 2.5)))
+    builder.extend(interim)
+    assert builder.text == "hello there general kenobi"
+    assert builder.end == 2.5
+    assert interim.text == "kenobi"
+
+    builder.clear()
+    assert not builder
+    assert builder.text == ""
+    assert builder.start is None
+
+
+def test_speech_final_after_several_finals_starts_at_the_first_word():
+    heuristic = VADHeuristic(pause_threshold=5.0)
+    results = [
+        (1.0, _result(0.0, 0.8, [word("hello", 0.2, 0.5), word("there", 0.55, 0.7)], True, False)),
+        (2.0, _result(0.8, 1.0, [word("general", 1.0, 1.6)], True, False)),
+        (3.0, _result(1.8, 0.9, [word("kenobi", 2.0, 2.4)], True, True)),
+    ]
+    for audio_cursor, result in results:
+        heuristic.audio_cursor = audio_cursor
+        heuristic.process({"event_type": "transcript", "audio_cursor": audio_cursor, "data": result})
+
+    [utterance] = heuristic.completed_utterances
+    assert utterance.completed_by == "speech_final"
+    assert utterance.transcript == "hello there general kenobi"
+    assert (utterance.start_time, utterance.end_time) == (0.2, 2.4)
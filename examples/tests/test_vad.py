@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from common.synthetic import synthetic_recording
+from common.vad import VAD_CHUNK, VADStream, VADTrigger, create_vad_iterator
+
+
+def stream_events(audio: np.ndarray, sample_rate: int, packet_samples: int) -> list:
+    vad_stream = VADStream(sample_rate, create_vad_iterator(256))
+    events = []
+    for offset in range(0, len(audio), packet_samples):
+        events.extend(vad_stream.process(audio[offset:offset + packet_samples]))
+    return events
+
+
+@pytest.fixture(scope="module")
+def recording():
+    return synthetic_recording(30, 48000, seed=1)
+
+
+def test_starts_fall_in_speech_segments(recording):
+    events = stream_events(recording.audio, recording.sample_rate, 4608)
+
+    starts = [event["start"] for event in events if "start" in event]
+    assert starts
+    for start in starts:
+        assert any(begin - 0.1 <= start <= end for begin, end in recording.speech_segments)
+
+
+@pytest.mark.parametrize("packet_samples", [160, 1000, 4608, 48000])
+def test_events_do_not_depend_on_packet_size(recording, packet_samples):
+    # Leftover samples are carried across packets, so packets need not be multiples of a VAD chunk
+    reference = stream_events(recording.audio, recording.sample_rate, 4608)
+    assert stream_events(recording.audio, recording.sample_rate, packet_samples) == reference
+
+
+def trigger_events(probabilities: list, speculative: bool) -> list:
+    trigger = VADTrigger(min_silence_duration_ms=256, speculative=speculative)
+    events = [trigger.update(probability) for probability in probabilities]
+    return [(index, event) for index, event in enumerate(events) if event]
+
+
+def test_speculative_dip_that_recovers_reports_likely_end_then_resume():
+    probabilities = [0.9] * 5 + [0.1] * 3 + [0.9] * 3
+    assert trigger_events(probabilities, speculative=True) == [
+        (0, {'start': 0}),
+        (5, {'likely_end': 5 * VAD_CHUNK}),
+        (8, {'resume': 8 * VAD_CHUNK}),
+    ]
+    assert trigger_events(probabilities, speculative=False) == [(0, {'start': 0})]
+
+
+def test_speculative_dip_that_lasts_reports_likely_end_then_end():
+    # 256 ms of silence is 8 chunks; the end confirms the likely end at the same time
+    probabilities = [0.9] * 5 + [0.1] * 3 + [0.9] * 3 + [0.1] * 10
+    speculative = trigger_events(probabilities, speculative=True)
+    assert speculative == [
+        (0, {'start': 0}),
+        (5, {'likely_end': 5 * VAD_CHUNK}),
+        (8, {'resume': 8 * VAD_CHUNK}),
+        (11, {'likely_end': 11 * VAD_CHUNK}),
+        (19, {'end': 11 * VAD_CHUNK}),
+    ]
+    # Speculative events are extra; start and end are unchanged
+    assert trigger_events(probabilities, speculative=False) == [event for event in speculative if set(event[1]) & {'start', 'end'}]
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from common.vad import VAD_CHUNK, VAD_CONTEXT, VAD_STATE_SIZE
+from common.vad_backends import MODEL_DIR, OnnxVADBackend
+
+EXAMPLES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_onnx_model_ships_with_the_examples():
+    assert OnnxVADBackend().model_path == os.path.join(MODEL_DIR, "silero_vad.onnx")
+    assert os.path.exists(os.path.join(MODEL_DIR, "silero_vad.onnx"))
+
+
+def test_onnx_backend_runs_batches_with_explicit_state():
+    backend = OnnxVADBackend()
+    x = np.zeros((3, VAD_CONTEXT + VAD_CHUNK), dtype=np.float32)
+    state = np.zeros((2, 3, VAD_STATE_SIZE), dtype=np.float32)
+    speech_probs, new_state = backend.forward(x, state)
+    assert speech_probs.shape == (3,)
+    assert new_state.shape == state.shape
+    assert (speech_probs < 0.4).all()
+
+
+def test_onnx_inference_does_not_import_torch():
+    # Run in a fresh interpreter, since another test may have imported torch already
+    code = (
+        "import sys, numpy as np\n"
+        "from common.batched_vad import BatchedVADEngine\n"
+        "engine = BatchedVADEngine()\n"
+        "engine.add_session(0, print, 16000, 256)\n"
+        "engine.push(0, np.zeros(16000, dtype=np.int16).tobytes())\n"
+        "assert engine.tick() > 0\n"
+        "assert 'torch' not in sys.modules and 'silero_vad' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=EXAMPLES_DIR, check=True)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from common.synthetic import synthetic_recording
+from common.vad import VAD_CHUNK, VAD_SAMPLE_RATE, VADStream, create_vad_iterator
+from common.vad_frames import Hysteresis, ProbabilitySmoother
+
+SPLITS = [[1000], [1, 999], [300, 300, 400], [2, 3, 995], [500] * 2, [7] * 142 + [6]]
+
+
+def _process_in_packets(processor, probabilities: np.ndarray, packet_sizes) -> np.ndarray:
+    output = []
+    position = 0
+    for size in packet_sizes:
+        output.append(processor.process(probabilities[position:position + size]))
+        position += size
+    return np.concatenate(output)
+
+
+@pytest.fixture(scope="module")
+def probabilities():
+    rng = np.random.default_rng(0)
+    # Runs of speech and silence with noise, so the hysteresis band is crossed often
+    levels = np.repeat(rng.uniform(0, 1, 50), 20)
+    return np.clip(levels + 0.2 * rng.standard_normal(1000), 0, 1).astype(np.float32)
+
+
+@pytest.mark.parametrize("window", [1, 3, 8])
+def test_smoother_does_not_depend_on_packet_boundaries(probabilities, window):
+    whole = ProbabilitySmoother(window).process(probabilities)
+    for sizes in SPLITS:
+        np.testing.assert_array_equal(_process_in_packets(ProbabilitySmoother(window), probabilities, sizes), whole)
+    assert whole[0] == probabilities[0]
+    np.testing.assert_allclose(whole[window:], np.convolve(probabilities, np.ones(window) / window, "valid")[1:], rtol=1e-5)
+
+
+def test_hysteresis_does_not_depend_on_packet_boundaries(probabilities):
+    whole = Hysteresis().process(probabilities)
+    for sizes in SPLITS:
+        np.testing.assert_array_equal(_process_in_packets(Hysteresis(), probabilities, sizes), whole)
+    assert 0 < whole.sum() < len(whole)
+
+
+def test_hysteresis_keeps_the_decision_inside_the_band():
+    hysteresis = Hysteresis(on=0.5, off=0.2)
+    assert hysteresis.process(np.array([0.3, 0.6, 0.3, 0.1, 0.3], dtype=np.float32)).tolist() == [False, True, True, False, False]
+    assert hysteresis.process(np.array([], dtype=np.float32)).tolist() == []
+    assert hysteresis.process(np.array([0.5, 0.3], dtype=np.float32)).tolist() == [True, True]
+    assert hysteresis.speech
+
+
+@pytest.mark.parametrize("sample_rate", [16000, 48000])
+def test_frame_timestamps_are_frame_ends(sample_rate):
+    audio = synthetic_recording(10, sample_rate, seed=1).audio
+    vad_stream = VADStream(sample_rate, create_vad_iterator(256))
+    frames = []
+    packet = int(sample_rate * 0.1)
+    for offset in range(0, len(audio), packet):
+        list(vad_stream.process(audio[offset:offset + packet]))
+        taken = vad_stream.take_frames()
+        if taken is not None:
+            frames.append(taken)
+
+    timestamps = np.concatenate([taken.timestamps for taken in frames])
+    expected = np.arange(1, len(timestamps) + 1) * VAD_CHUNK / VAD_SAMPLE_RATE
+    np.testing.assert_array_equal(timestamps, expected)
+    assert vad_stream.vad_iterator.current_sample == len(timestamps) * VAD_CHUNK
+    # Every full frame of resampled audio was run, so the last one ends within a frame (plus the resampler's delay) of the input
+    assert len(audio) / sample_rate - timestamps[-1] < VAD_CHUNK / VAD_SAMPLE_RATE + 0.01
@@ -0,0 +1,122 @@
+from common.sinks import CallbackSink
+from common.synthetic import _result
+from heuristic import VADHeuristic
+
+
+def word(text: str, start: float, end: float) -> dict:
+    return {"word": text, "start": start, "end": end, "confidence": 0.9}
+
+
+def deliver(heuristic: VADHeuristic, audio_cursor: float, event_type: str, data=None):
+    heuristic.audio_cursor = audio_cursor
+    heuristic.process({"event_type": event_type, "audio_cursor": audio_cursor, "data": data})
+
+
+def completed_by(heuristic: VADHeuristic) -> list:
+    return [utterance.completed_by for utterance in heuristic.completed_utterances]
+
+
+WORDS = [word("hello", 0.2, 0.5), word("there", 0.6, 1.0)]
+
+
+def test_local_utt_end_fires_on_a_tick_without_transcripts():
+    heuristic = VADHeuristic(pause_threshold=1.0)
+    deliver(heuristic, 1.3, "transcript", _result(0.0, 1.2, WORDS, True, False))
+    for cursor in (1.5, 1.9, 1.99):
+        deliver(heuristic, cursor, "tick")
+    assert not heuristic.completed_utterances
+
+    deliver(heuristic, 2.0, "tick")
+    assert completed_by(heuristic) == ["local_utt_end"]
+    assert heuristic.completed_utterances[0].transcript == "hello there"
+
+
+def test_vad_end_endpoints_when_a_final_covers_it():
+    heuristic = VADHeuristic(pause_threshold=2.0)
+    deliver(heuristic, 0.3, "vad_event", {"start": 0.2})
+    deliver(heuristic, 1.3, "transcript", _result(0.0, 1.2, WORDS, True, False))
+    deliver(heuristic, 1.4, "vad_event", {"end": 1.1})
+    assert completed_by(heuristic) == ["vad_is_final"]
+    assert heuristic.completed_utterances[0].transcript == "hello there"
+
+
+def test_vad_end_waits_for_the_transcript_after_an_interim():
+    heuristic = VADHeuristic(pause_threshold=2.0)
+    deliver(heuristic, 0.3, "vad_event", {"start": 0.2})
+    deliver(heuristic, 0.9, "transcript", _result(0.0, 0.6, WORDS[:1], False, False))
+    deliver(heuristic, 1.4, "vad_event", {"end": 1.1})
+    for cursor in (1.5, 2.0, 2.5):
+        deliver(heuristic, cursor, "tick")
+    assert not heuristic.completed_utterances
+
+    deliver(heuristic, 2.6, "transcript", _result(0.0, 1.2, WORDS, False, False))
+    assert completed_by(heuristic) == ["vad_interim"]
+    assert heuristic.completed_utterances[0].transcript == "hello there"
+
+
+def test_vad_end_grace_endpoints_on_the_interim():
+    heuristic = VADHeuristic(pause_threshold=2.0, vad_end_grace=0.5)
+    deliver(heuristic, 0.3, "vad_event", {"start": 0.2})
+    deliver(heuristic, 0.9, "transcript", _result(0.0, 0.6, WORDS[:1], False, False))
+    deliver(heuristic, 1.4, "vad_event", {"end": 1.1})
+    deliver(heuristic, 1.5, "tick")
+    assert not heuristic.completed_utterances
+
+    deliver(heuristic, 1.6, "tick")
+    assert completed_by(heuristic) == ["vad_interim"]
+    assert heuristic.completed_utterances[0].transcript == "hello"
+
+
+def test_vad_speech_resuming_cancels_the_vad_end_timer():
+    heuristic = VADHeuristic(pause_threshold=2.0, vad_end_grace=0.5)
+    deliver(heuristic, 0.3, "vad_event", {"start": 0.2})
+    deliver(heuristic, 0.9, "transcript", _result(0.0, 0.6, WORDS[:1], False, False))
+    deliver(heuristic, 1.4, "vad_event", {"end": 1.1})
+    deliver(heuristic, 1.5, "vad_event", {"start": 1.45})
+    deliver(heuristic, 1.7, "tick")
+    assert not heuristic.completed_utterances
+
+
+def speculative_heuristic(published: list) -> VADHeuristic:
+    heuristic = VADHeuristic(pause_threshold=2.0, sinks=[CallbackSink(published.append)])
+    deliver(heuristic, 0.3, "vad_event", {"start": 0.2})
+    deliver(heuristic, 0.9, "transcript", _result(0.0, 0.6, WORDS[:1], False, False))
+    deliver(heuristic, 1.2, "vad_event", {"likely_end": 1.1})
+    return heuristic
+
+
+def test_confirm_is_logged_before_the_vad_end():
+    published = []
+    heuristic = speculative_heuristic(published)
+    deliver(heuristic, 1.4, "vad_event", {"end": 1.1})
+    heuristic.sinks[0].close()
+
+    event_types = [event.event_type for event in heuristic.events]
+    assert event_types[-3:] == ["likely_end", "confirm", "vad_event_end"]
+    assert heuristic.likely_end_at is None
+    assert [payload["type"] for payload in published] == ["likely_end", "confirm"]
+    assert published[0]["transcript"] == "hello"
+    assert published[1]["speech_end_time"] == 1.1
+
+
+def test_retract_cancels_the_likely_end():
+    published = []
+    heuristic = speculative_heuristic(published)
+    deliver(heuristic, 1.3, "vad_event", {"resume": 1.25})
+    assert heuristic.likely_end_at is None
+
+    # The next VAD end has no likely end of its own, so nothing is confirmed
+    deliver(heuristic, 2.0, "vad_event", {"end": 1.8})
+    heuristic.sinks[0].close()
+    event_types = [event.event_type for event in heuristic.events]
+    assert event_types[-3:] == ["likely_end", "retract", "vad_event_end"]
+    assert "confirm" not in event_types
+    assert [payload["type"] for payload in published] == ["likely_end", "retract"]
+
+
+def test_likely_end_without_a_transcript_is_ignored():
+    heuristic = VADHeuristic(pause_threshold=2.0)
+    deliver(heuristic, 0.3, "vad_event", {"start": 0.2})
+    deliver(heuristic, 1.2, "vad_event", {"likely_end": 1.1})
+    assert heuristic.likely_end_at is None
+    assert heuristic.events[-1].event_type == "vad_event_start"
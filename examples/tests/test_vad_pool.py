@@ -0,0 +1,178 @@
+import threading
+import time
+from multiprocessing import shared_memory
+
+import pytest
+
+from common.batched_vad import BatchedVADEngine
+from common.synthetic import synthetic_recording
+from common.vad import VADStream, create_vad_iterator
+from common.vad_pool import SharedRing, VADProcessPool
+
+PACKET_SECONDS = 0.096
+RING_SECONDS = 1
+
+
+def ring_exists(name: str) -> bool:
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    segment.close()
+    return True
+
+
+def wait_for(condition, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_ring_wraps_around():
+    ring = SharedRing(100)
+    reader = SharedRing(100, ring.name)
+    packets = [bytes([index]) * (index % 30 + 1) for index in range(50)]
+    for packet in packets:
+        assert ring.write(packet)
+        assert reader.read() == (packet, 0)
+    assert reader.read() is None
+    reader.close()
+    ring.close()
+
+
+def test_full_ring_rejects_packets_and_carries_skipped_samples():
+    ring = SharedRing(100)
+    assert ring.write(b"a" * 80)
+    assert not ring.write(b"b" * 20)
+    assert ring.qsize() == 1
+    assert ring.read() == (b"a" * 80, 0)
+    assert ring.write(b"c" * 20, skipped=10)
+    assert ring.read() == (b"c" * 20, 10)
+    ring.close()
+    assert not ring_exists(ring.name)
+
+
+@pytest.fixture(scope="module")
+def recordings():
+    return [synthetic_recording(20, sample_rate, seed=seed) for seed, sample_rate in enumerate((16000, 48000))]
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = VADProcessPool(workers=2, ring_seconds=RING_SECONDS)
+    stop_event = threading.Event()
+    thread = threading.Thread(target=pool.run, args=(stop_event,))
+    thread.start()
+    yield pool
+    stop_event.set()
+    thread.join()
+    pool.close()
+
+
+def push_paced(pool: VADProcessPool, session_id, data: bytes):
+    # Keeps well under the ring's capacity, so only packets that can never fit are dropped
+    wait_for(lambda: pool.sessions[session_id].packets.qsize() < 2)
+    pool.push(session_id, data)
+
+
+def finish(pool: VADProcessPool, session_ids):
+    # The worker acknowledges a removal after every event of the session has been sent
+    for session_id in session_ids:
+        wait_for(lambda: pool.sessions[session_id].packets.qsize() == 0)
+    for session_id in session_ids:
+        pool.remove_session(session_id)
+    wait_for(lambda: not pool._releasing)
+
+
+def test_pool_events_match_engine(pool, recordings):
+    engine = BatchedVADEngine()
+    expected = {index: [] for index in range(len(recordings))}
+    events = {index: [] for index in range(len(recordings))}
+    for index, recording in enumerate(recordings):
+        engine.add_session(index, expected[index].append, recording.sample_rate, 256)
+        pool.add_session(index, events[index].append, recording.sample_rate, 256)
+    assert {session.worker for session in pool.sessions.values()} == {0, 1}
+
+    for index, recording in enumerate(recordings):
+        packet = int(recording.sample_rate * PACKET_SECONDS)
+        for offset in range(0, len(recording.audio), packet):
+            data = recording.audio[offset:offset + packet].tobytes()
+            engine.push(index, data)
+            push_paced(pool, index, data)
+    engine.tick()
+    finish(pool, list(events))
+
+    assert events == expected
+    assert any(events.values())
+
+
+def test_dropped_packet_is_skipped_by_worker(pool, recordings):
+    recording = recordings[0]
+    packet = int(recording.sample_rate * PACKET_SECONDS)
+    gap = (50 * packet, 50 * packet + 2 * RING_SECONDS * recording.sample_rate)
+    events = []
+    pool.add_session("gap", events.append, recording.sample_rate, 256)
+    vad_stream = VADStream(recording.sample_rate, create_vad_iterator(256))
+    expected = []
+
+    offset = 0
+    while offset < len(recording.audio):
+        # The gap is pushed as one packet larger than the ring, so it is always dropped
+        end = gap[1] if offset == gap[0] else offset + packet
+        audio = recording.audio[offset:end]
+        push_paced(pool, "gap", audio.tobytes())
+        if offset == gap[0]:
+            speech_dict = vad_stream.skip(len(audio))
+            if speech_dict:
+                expected.append(speech_dict)
+        else:
+            expected.extend(vad_stream.process(audio))
+        offset = end
+    finish(pool, ["gap"])
+
+    assert events == expected
+    assert any("start" in speech_dict and speech_dict["start"] > gap[1] / recording.sample_rate for speech_dict in events)
+
+
+def test_removed_ring_is_released_after_acknowledgement(pool):
+    session = pool.add_session("removed", lambda speech_dict: None, 16000, 256)
+    name = session.packets.name
+    pool.remove_session("removed")
+    pool.push("removed", bytes(3200))
+    wait_for(lambda: not pool._releasing)
+    assert session.released
+    assert not ring_exists(name)
+
+
+def test_close_releases_unacknowledged_rings():
+    pool = VADProcessPool(workers=1)
+    kept = pool.add_session("kept", lambda speech_dict: None, 16000, 256)
+    removed = pool.add_session("removed", lambda speech_dict: None, 48000, 256, channels=2)
+    assert removed.packets.capacity > kept.packets.capacity * 5
+    pool.remove_session("removed")
+    pool.close()
+    assert not ring_exists(kept.packets.name)
+    assert not ring_exists(removed.packets.name)
+
+
+def test_close_drains_results_of_a_busy_pool(recordings):
+    recording = recordings[1]
+    pool = VADProcessPool(workers=2, ring_seconds=30)
+    frames = []
+    for index in range(8):
+        pool.add_session(index, lambda speech_dict: None, recording.sample_rate, 256, process_vad_frames=frames.append)
+    packet = int(recording.sample_rate * PACKET_SECONDS)
+    for offset in range(0, len(recording.audio), packet):
+        for index in range(8):
+            pool.push(index, recording.audio[offset:offset + packet].tobytes())
+    # Nothing runs `run`, as after the server stops its engine thread
+    wait_for(lambda: all(session.packets.qsize() == 0 for session in pool.sessions.values()))
+    sessions = list(pool.sessions.values())
+
+    closer = threading.Thread(target=pool.close)
+    closer.start()
+    closer.join(timeout=30)
+    assert not closer.is_alive()
+    assert frames == []
+    assert not any(ring_exists(session.packets.name) for session in sessions)
@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from common.recording import load_recording, find_recordings
+from common.replay import replay_recording, DEFAULT_PACKET_DURATION
+from common.vad import create_vad_iterator, VAD_CHUNK_DURATION
+from common.vad_backends import get_vad_backend
+from vad_implementation.heuristic import VADHeuristic
+from heuristic import TranscriptHeuristic
+
+VAD_BACKEND = os.getenv("VAD_BACKEND", "onnx") # "onnx" or "torchscript"; model path can be set with VAD_MODEL_PATH
+MIN_SILENCE_DURATION_MULTIPLIER = 8 # Multiples of 32 ms, as in vad_implementation/main.py
+
+
+def run_vad(recording, pause_threshold: float, packet_duration: float) -> list:
+    heuristic = VADHeuristic(pause_threshold=pause_threshold, utterance_history_size=None)
+    vad_iterator = create_vad_iterator(MIN_SILENCE_DURATION_MULTIPLIER * VAD_CHUNK_DURATION * 1000, get_vad_backend(VAD_BACKEND))
+    replay_recording(recording, heuristic, vad_iterator, packet_duration)
+    return list(heuristic.completed_utterances)
+
+
+def run_transcript(recording, pause_threshold: float, packet_duration: float) -> list:
+    heuristic = TranscriptHeuristic(pause_threshold=pause_threshold, utterance_history_size=None)
+    replay_recording(recording, heuristic, packet_duration=packet_duration)
+    return list(heuristic.completed_utterances)
+
+
+def summarize(utterances: list) -> dict:
+    latencies = np.array([u.latency for u in utterances if u.latency is not None], dtype=float)
+    completed_by = {}
+    for utterance in utterances:
+        completed_by[utterance.completed_by] = completed_by.get(utterance.completed_by, 0) + 1
+    return {
+        "utterances": len(utterances),
+        "p50": np.percentile(latencies, 50) if len(latencies) else float("nan"),
+        "p90": np.percentile(latencies, 90) if len(latencies) else float("nan"),
+        "completed_by": completed_by,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare TranscriptHeuristic with VADHeuristic on recorded sessions.")
+    parser.add_argument("recordings", nargs="+", help="Recording prefixes, .wav files or directories of recordings")
+    parser.add_argument("--pause-threshold", type=float, default=1.0, help="PAUSE_THRESHOLD used by both heuristics")
+    parser.add_argument("--packet-ms", type=float, default=DEFAULT_PACKET_DURATION * 1000, help="Replayed audio packet size in ms")
+    args = parser.parse_args()
+
+    prefixes = find_recordings(args.recordings)
+    if not prefixes:
+        print("No recordings found")
+        return
+
+    recordings = [load_recording(prefix) for prefix in prefixes]
+    audio_duration = sum(recording.duration for recording in recordings)
+    packet_duration = args.packet_ms / 1000
+
+    print(f"{'Heuristic':^12}|{'Utterances':^12}|{'p50 Latency':^13}|{'p90 Latency':^13}|{'CPU (ms/min)':^14}| Completed By")
+    for name, run in (("vad", run_vad), ("transcript", run_transcript)):
+        start = time.process_time()
+        utterances = [utterance for recording in recordings for utterance in run(recording, args.pause_threshold, packet_duration)]
+        cpu_ms_per_minute = (time.process_time() - start) * 1000 / (audio_duration / 60)
+
+        summary = summarize(utterances)
+        print(f"{name:^12}|{summary['utterances']:^12}|{summary['p50']:^13.0f}|{summary['p90']:^13.0f}|{cpu_ms_per_minute:^14.1f}| {summary['completed_by']}")
+
+
+if __name__ == "__main__":
+    main()
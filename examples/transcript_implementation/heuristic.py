@@ -0,0 +1,195 @@
+from common.base_heuristic import Heuristic, EVENT_HISTORY_SIZE, UTTERANCE_HISTORY_SIZE
+from common.records import EventRecord, UtteranceRecord
+from common.metrics import ENDPOINTS, ENDPOINT_LATENCY, TRANSCRIPTION_LATENCY
+from common.scheduler import AudioScheduler
+
+STABLE_INTERIM_COUNT = 2 # Consecutive identical interim results that count as a stable transcript
+STABLE_INTERIM_PAUSE_RATIO = 0.5 # Fraction of pause_threshold after which a stable interim result is endpointed
+
+
+def _join_words(words: list) -> str:
+    return " ".join(word.punctuated_word or word.word for word in words)
+
+
+class TranscriptHeuristic(Heuristic):
+    """
+    TranscriptHeuristic endpoints utterances from transcription results alone, with no local VAD.
+    It combines Deepgram's speech_final and UtteranceEnd signals with word timestamps, interim
+    result stability and a pause timer on the audio cursor:
+
+    - speech_final: Deepgram's endpointing detected silence after the words.
+    - utterance_end: Deepgram's UtteranceEnd arrived for words not yet endpointed.
+    - stable_interim: the interim transcript stopped changing and no word has ended for
+      STABLE_INTERIM_PAUSE_RATIO * pause_threshold seconds of transcribed audio.
+    - local_utt_end: no word has ended for pause_threshold seconds of transcribed audio.
+
+    Without local VAD, only transcribed audio shows that nobody spoke: audio past the end of the
+    latest result may hold words Deepgram has not returned yet. The last two checks are
+    therefore timers on the transcript cursor, the end of the audio covered by the results so
+    far (see AudioScheduler), rather than on the live audio cursor, so transcription latency
+    and the gaps between interim results never count as a pause. They fire on the result that
+    carries the transcript cursor past their deadline.
+    """
+
+    def __init__(self, pause_threshold: float = 1.0, event_history_size: int = EVENT_HISTORY_SIZE, utterance_history_size: int = UTTERANCE_HISTORY_SIZE, on_utterance_evicted=None, sinks: list = None):
+        """
+        Initializes the TranscriptHeuristic.
+
+        Args:
+            pause_threshold (float): Allowed pause between words in seconds for utterance end detection.
+            event_history_size (int): Number of logged events kept; None keeps all of them.
+            utterance_history_size (int): Number of completed utterances kept; None keeps all of them.
+            on_utterance_evicted (Callable, optional): Called with each completed utterance dropped from the history.
+            sinks (list, optional): UtteranceSinks receiving every completed utterance as it is endpointed.
+        """
+        super().__init__(pause_threshold, event_history_size, utterance_history_size, on_utterance_evicted, sinks)
+        # self.utterance holds the words of final results not yet endpointed
+        self.interim_words = [] # Words of the latest interim result past the final words
+        self.interim_transcript = ""
+        self.stable_interims = 0
+        self.endpointed_through = 0.0 # End of the last word of the last completed utterance
+        self.last_word_end = 0.0
+        self.transcript_cursor = 0.0 # End of the audio covered by the results so far
+        # Pause timers, keyed on the transcript cursor rather than the audio cursor
+        self.transcript_scheduler = AudioScheduler()
+        self.spot_interim_latency = 0
+        self.spot_endpoint_latency = 0
+
+
+    @Heuristic.event_handler("transcript")
+    def handle_transcript(self, event):
+        """
+        Handles transcription events, tracking words that have not been endpointed yet.
+
+        Args:
+            event (dict): The transcription event containing transcription data and audio cursor position.
+        """
+        result = event.get("data", {})
+        transcript_cursor = result.start + result.duration
+        self.transcript_cursor = max(self.transcript_cursor, transcript_cursor)
+        alternative = result.channel.alternatives[0]
+        # Words of results covering audio that was already endpointed on an interim result
+        words = [word for word in alternative.words if word.end > self.endpointed_through]
+        transcription_latency = int((self.audio_cursor - transcript_cursor) * 1000)
+
+        if words:
+            self.last_word_end = max(self.last_word_end, words[-1].end)
+
+        if result.is_final:
+            event_type = "speech_final_transcript" if result.speech_final else "final_transcript"
+            if words:
+                self.utterance.append(_join_words(words), words)
+            self.interim_words = []
+            self.interim_transcript = ""
+            self.stable_interims = 0
+        else:
+            event_type = "interim_transcript"
+            self.spot_interim_latency = transcription_latency
+            self.stable_interims = self.stable_interims + 1 if words and alternative.transcript == self.interim_transcript else 0
+            self.interim_words = words
+            self.interim_transcript = alternative.transcript
+        TRANSCRIPTION_LATENCY.labels(event_type).observe(transcription_latency)
+
+        self.events.append(EventRecord(
+            self.audio_cursor,
+            event_type,
+            alternative.transcript,
+            transcript_cursor=transcript_cursor,
+            latency=transcription_latency,
+            speech_start_time=words[0].start if words else None,
+            speech_end_time=words[-1].end if words else None
+        ))
+
+        if result.speech_final and self.utterance:
+            self.endpoint("speech_final")
+            return
+
+        if self.utterance or self.interim_words:
+            self.transcript_scheduler.schedule("local_utt_end", self.last_word_end + self.pause_threshold, self._on_pause_deadline)
+        if self.stable_interims >= STABLE_INTERIM_COUNT:
+            self.transcript_scheduler.schedule("stable_interim", self.last_word_end + self.pause_threshold * STABLE_INTERIM_PAUSE_RATIO, self._on_stable_interim_deadline)
+        else:
+            self.transcript_scheduler.cancel("stable_interim")
+        self.transcript_scheduler.advance(self.transcript_cursor)
+
+    @Heuristic.event_handler("utterance_end")
+    def handle_utterance_end(self, event):
+        """
+        Handles utterance_end events, endpointing any words that are still pending.
+
+        Args:
+            event (dict): The utterance_end event containing data (UtteranceEndResponse) and audio cursor position.
+        """
+        last_word_end = event.get("data", {}).last_word_end
+        endpoint_latency = int((self.audio_cursor - last_word_end) * 1000)
+        self.events.append(EventRecord(
+            self.audio_cursor,
+            "utterance_end",
+            f"Utterance end for word at {last_word_end:.2f} s",
+            latency=endpoint_latency,
+            speech_end_time=last_word_end
+        ))
+        self.endpoint("utterance_end")
+
+    def _on_pause_deadline(self, deadline: float):
+        self.endpoint("local_utt_end")
+
+    def _on_stable_interim_deadline(self, deadline: float):
+        self.endpoint("stable_interim")
+
+    def endpoint(self, completed_by: str):
+        """
+        Completes the pending words as an utterance, if there are any.
+
+        Args:
+            completed_by (str): Reason for completion.
+        """
+        if not self.utterance and not self.interim_words:
+            return
+
+        start_time = self.utterance.start if self.utterance else self.interim_words[0].start
+        end_time = self.interim_words[-1].end if self.interim_words else self.utterance.end
+        latency = int((self.audio_cursor - end_time) * 1000)
+        transcript = " ".join(filter(None, (self.utterance.text, _join_words(self.interim_words))))
+
+        self.events.append(EventRecord(
+            self.audio_cursor,
+            completed_by,
+            transcript,
+            latency=latency,
+            speech_start_time=start_time,
+            speech_end_time=end_time
+        ))
+        self._complete_utterance(UtteranceRecord(start_time, end_time, latency, completed_by, transcript))
+        ENDPOINTS.labels(completed_by).inc()
+        ENDPOINT_LATENCY.labels(completed_by).observe(latency)
+        self.spot_endpoint_latency = latency
+
+        self.endpointed_through = end_time
+        self.transcript_scheduler.cancel("local_utt_end")
+        self.transcript_scheduler.cancel("stable_interim")
+        self.utterance.clear()
+        self.interim_words = []
+        self.interim_transcript = ""
+        self.stable_interims = 0
+
+    def get_display_data(self) -> dict:
+        """
+        Retrieves the current state data for display purposes.
+
+        Returns:
+            dict: Contains completed utterances, events, current utterance states, and metrics.
+        """
+        return {
+            'completed_utterances': self.completed_utterances,
+            'events': self.events,
+            'current_utterance': self.utterance.text,
+            'current_utterance_start': self.utterance.start if self.utterance else "",
+            'current_interim_utterance': self.interim_transcript,
+            'current_interim_utterance_start': self.interim_words[0].start if self.interim_words else "",
+            'metrics': {
+                'spot_interim_latency': self.spot_interim_latency,
+                'spot_endpoint_latency': self.spot_endpoint_latency,
+                'vad_speech_detected': False
+            }
+        }
@@ -0,0 +1,137 @@
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from deepgram import DeepgramClient, LiveOptions, LiveTranscriptionEvents, Microphone
+from common.recording import SessionRecorder
+from common.dispatcher import EventDispatcher
+from common.audio_clock import AudioClock
+from common.metrics import MetricsServer
+from common.sinks import create_sinks
+from common.terminal_renderer import TerminalRenderer
+from heuristic import TranscriptHeuristic
+
+DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
+RECORD_PATH = os.getenv("RECORD_PATH") # Optional path prefix; records <prefix>.wav and <prefix>.jsonl for compare.py
+METRICS_PORT = os.getenv("METRICS_PORT") # Optional port serving Prometheus metrics at http://127.0.0.1:<port>/metrics
+UTTERANCE_ARCHIVE_PATH = os.getenv("UTTERANCE_ARCHIVE_PATH") # Optional JSONL file receiving completed utterances as they leave the history
+UTTERANCE_SINK_PATH = os.getenv("UTTERANCE_SINK_PATH") # Optional JSONL file receiving each utterance as soon as it is endpointed
+UTTERANCE_SOCKET_PATH = os.getenv("UTTERANCE_SOCKET_PATH") # Optional UNIX socket serving each utterance as a JSON line as soon as it is endpointed
+
+# These three can be changed
+INPUT_SAMPLE_RATE = 48000 # Microphone sample rate Note: Must manually provide this
+ENDPOINTING_MS = 300 # Silence required for Deepgram's endpointing (speech_final)
+PAUSE_THRESHOLD = 1.0 # Allowed pause between words in seconds, for local utterance_end
+
+# Avoid changing these directly
+INPUT_CHUNK_DURATION = 0.096 # Same packet size as the VAD implementation
+INPUT_CHUNK_SIZE = int(INPUT_SAMPLE_RATE * INPUT_CHUNK_DURATION) # samples at INPUT_SAMPLE_RATE
+BYTES_PER_SAMPLE = 2 # int16 mono
+
+
+def main():
+    deepgram = DeepgramClient(DEEPGRAM_API_KEY)
+    dg_connection = deepgram.listen.websocket.v("1")
+
+    metrics_server = MetricsServer(int(METRICS_PORT)) if METRICS_PORT else None
+    if metrics_server:
+        metrics_server.start()
+
+    archive = open(UTTERANCE_ARCHIVE_PATH, "a") if UTTERANCE_ARCHIVE_PATH else None
+
+    def archive_utterance(utterance):
+        archive.write(json.dumps(utterance.to_dict()) + "\n")
+
+    sinks = create_sinks(UTTERANCE_SINK_PATH, UTTERANCE_SOCKET_PATH)
+    heuristic = TranscriptHeuristic(pause_threshold=PAUSE_THRESHOLD, on_utterance_evicted=archive_utterance if archive else None, sinks=sinks)
+    terminal_renderer = TerminalRenderer()
+    terminal_renderer.start()
+    # Only the dispatcher thread touches the heuristic; the other threads push events to it
+    clock = AudioClock(INPUT_SAMPLE_RATE)
+    dispatcher = EventDispatcher(heuristic, clock, on_processed=terminal_renderer.refresh)
+    dispatcher.start()
+
+    recorder = SessionRecorder(RECORD_PATH, INPUT_SAMPLE_RATE) if RECORD_PATH else None
+    streaming = True
+
+    def on_message(self, result, **kwargs):
+        audio_cursor = dispatcher.audio_cursor
+        if recorder:
+            recorder.write_event("transcript", audio_cursor, result)
+        dispatcher.push("transcript", result, audio_cursor)
+
+    def on_utterance_end(self, utterance_end, **kwargs):
+        audio_cursor = dispatcher.audio_cursor
+        if recorder:
+            recorder.write_event("utterance_end", audio_cursor, utterance_end)
+        dispatcher.push("utterance_end", utterance_end, audio_cursor)
+
+    def on_error(_, error, **__):
+        print(f"Error: {error}")
+
+    dg_connection.on(LiveTranscriptionEvents.Transcript, on_message)
+    dg_connection.on(LiveTranscriptionEvents.UtteranceEnd, on_utterance_end)
+    dg_connection.on(LiveTranscriptionEvents.Error, on_error)
+
+    options = LiveOptions(
+        model="nova-2",
+        language="en",
+        smart_format=True,
+        interim_results=True,
+        utterance_end_ms=max(1000, int(PAUSE_THRESHOLD * 1000)),
+        endpointing=ENDPOINTING_MS,
+        encoding="linear16",
+        channels=1,
+        sample_rate=INPUT_SAMPLE_RATE
+    )
+
+    if dg_connection.start(options) is False:
+        dispatcher.stop()
+        for sink in sinks:
+            sink.close()
+        terminal_renderer.stop()
+        print("Failed to connect to Deepgram")
+        return
+
+    def process_mic_data(data):
+        if streaming:
+            clock.advance(len(data) // BYTES_PER_SAMPLE)
+            # Lets the heuristic's timers fire while no transcripts arrive
+            dispatcher.push("tick", None)
+            dg_connection.send(data)
+            if recorder:
+                recorder.write_audio(data)
+
+    microphone = Microphone(
+        process_mic_data,
+        rate=INPUT_SAMPLE_RATE,
+        chunk=INPUT_CHUNK_SIZE,
+    )
+
+    microphone.start()
+
+    print("\nPress Enter to stop streaming...\n")
+    input("")
+    streaming = False
+
+    microphone.finish()
+    dg_connection.finish()
+    dispatcher.stop()
+    for sink in sinks:
+        sink.close()
+    # The dispatcher has stopped, so the final state can be read from this thread
+    terminal_renderer.update(**heuristic.get_display_data())
+    terminal_renderer.stop()
+    if metrics_server:
+        metrics_server.stop()
+    if recorder:
+        recorder.close()
+    if archive:
+        heuristic.completed_utterances.evict_all()
+        archive.close()
+    print("Finished")
+
+if __name__ == "__main__":
+    main()
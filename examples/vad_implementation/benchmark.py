@@ -0,0 +1,229 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from common.audio_queue import AudioQueue
+from common.recording import load_recording
+from common.replay import replay_recording, DEFAULT_PACKET_DURATION
+from common.synthetic import synthetic_recording
+from common.vad import vad_worker, create_vad_iterator, VAD_SAMPLE_RATE, VAD_CHUNK, VAD_CHUNK_DURATION
+from common.vad_backends import get_vad_backend
+from heuristic import VADHeuristic
+
+VAD_BACKEND = os.getenv("VAD_BACKEND", "onnx") # "onnx" or "torchscript"; model path can be set with VAD_MODEL_PATH
+MIN_SILENCE_DURATION_MS = 8 * VAD_CHUNK_DURATION * 1000
+PAUSE_THRESHOLD = 1.0
+
+SYNTHETIC_DURATION = 120 # Seconds of synthetic audio for the VAD and heuristic benchmarks
+SYNTHETIC_SAMPLE_RATE = 48000
+LONG_SESSION_DURATION = 2 * 3600 # Seconds of transcript-only synthetic session for the memory benchmark
+MEMORY_SAMPLES = 8 # Memory measurements taken across the long session
+
+# Whether a larger value of each metric is better, used when comparing against a baseline
+HIGHER_IS_BETTER = {
+    "vad_frames_per_second": True,
+    "vad_realtime_factor": True,
+    "vad_gated_realtime_factor": True,
+}
+
+
+def bench_vad_throughput(recording, packet_duration: float, energy_gate: bool = False) -> dict:
+    """
+    Measures frames per second through vad_worker, fed from a pre-filled queue.
+    """
+    packet_size = int(recording.sample_rate * packet_duration)
+    vad_queue = AudioQueue(len(recording.audio) // packet_size + 1, policy="block")
+    for offset in range(0, len(recording.audio), packet_size):
+        vad_queue.put(recording.audio[offset:offset + packet_size].tobytes())
+
+    vad_iterator = create_vad_iterator(MIN_SILENCE_DURATION_MS, get_vad_backend(VAD_BACKEND), energy_gate)
+    # Load the model before timing
+    vad_iterator(np.zeros(VAD_CHUNK, dtype=np.float32))
+    vad_iterator.reset_states()
+
+    stop_event = threading.Event()
+    vad_thread = threading.Thread(target=vad_worker, args=(vad_queue, lambda speech_dict: None, stop_event, recording.sample_rate, vad_iterator))
+
+    start = time.perf_counter()
+    vad_thread.start()
+    while not vad_queue.empty():
+        time.sleep(0.001)
+    stop_event.set()
+    vad_thread.join()
+    elapsed = time.perf_counter() - start
+
+    frames = len(recording.audio) * VAD_SAMPLE_RATE // recording.sample_rate // VAD_CHUNK
+    return {
+        "vad_frames_per_second": frames / elapsed,
+        "vad_realtime_factor": recording.duration / elapsed,
+    }
+
+
+def collect_vad_events(recording, packet_duration: float) -> list:
+    """
+    Runs the replay once with VAD and returns every event in dispatch order, so later benchmarks
+    can time the heuristic alone.
+    """
+    events = []
+    heuristic = VADHeuristic(pause_threshold=PAUSE_THRESHOLD)
+    vad_iterator = create_vad_iterator(MIN_SILENCE_DURATION_MS, get_vad_backend(VAD_BACKEND))
+    replay_recording(recording, heuristic, vad_iterator, packet_duration, on_event=events.append)
+    return events
+
+
+def segment_events(recording) -> list:
+    """
+    Builds the event stream for a transcript-only recording, with VAD events derived from its
+    known speech segments as an ideal VAD would report them.
+    """
+    events = []
+    for start, end in recording.speech_segments:
+        events.append((start + VAD_CHUNK_DURATION, {"event_type": "vad_event", "data": {"start": round(start, 1)}}))
+        events.append((end + MIN_SILENCE_DURATION_MS / 1000, {"event_type": "vad_event", "data": {"end": round(end, 1)}}))
+    for event in recording.events:
+        events.append((event.audio_cursor, {"event_type": event.event_type, "data": event.data}))
+    events.sort(key=lambda event: event[0])
+    return [{**event, "audio_cursor": audio_cursor} for audio_cursor, event in events]
+
+
+def run_heuristic(heuristic, events: list, timings: dict = None):
+    for event in events:
+        heuristic.audio_cursor = event["audio_cursor"]
+        if timings is None:
+            heuristic.process(event)
+            continue
+        start = time.perf_counter_ns()
+        heuristic.process(event)
+        timings.setdefault(event["event_type"], []).append(time.perf_counter_ns() - start)
+
+
+def bench_heuristic(event_streams: list, repeats: int = 5) -> dict:
+    """
+    Measures microseconds per heuristic event, by event type.
+    """
+    timings = {}
+    for _ in range(repeats):
+        for events in event_streams:
+            run_heuristic(VADHeuristic(pause_threshold=PAUSE_THRESHOLD), events, timings)
+
+    results = {}
+    for event_type, values in timings.items():
+        values = np.array(values) / 1000
+        results[f"{event_type}_us_p50"] = float(np.percentile(values, 50))
+        results[f"{event_type}_us_p99"] = float(np.percentile(values, 99))
+    return results
+
+
+def bench_endpoint_latency(event_streams: list) -> dict:
+    """
+    Collects the endpoint latency of every completed utterance, overall and per completion path.
+    """
+    by_reason = {}
+    for events in event_streams:
+        heuristic = VADHeuristic(pause_threshold=PAUSE_THRESHOLD, utterance_history_size=None)
+        run_heuristic(heuristic, events)
+        for utterance in heuristic.completed_utterances:
+            if utterance.latency is not None:
+                by_reason.setdefault("all", []).append(utterance.latency)
+                by_reason.setdefault(utterance.completed_by, []).append(utterance.latency)
+
+    results = {}
+    for reason, latencies in by_reason.items():
+        for percentile in (50, 95, 99):
+            results[f"endpoint_latency_{reason}_ms_p{percentile}"] = float(np.percentile(latencies, percentile))
+    return results
+
+
+def bench_memory(seed: int) -> dict:
+    """
+    Measures memory retained by a heuristic over a long transcript-only session.
+    """
+    recording = synthetic_recording(LONG_SESSION_DURATION, seed=seed, with_audio=False)
+    events = segment_events(recording)
+    heuristic = VADHeuristic(pause_threshold=PAUSE_THRESHOLD)
+
+    tracemalloc.start()
+    step = max(len(events) // MEMORY_SAMPLES, 1)
+    samples = []
+    for offset in range(0, len(events), step):
+        run_heuristic(heuristic, events[offset:offset + step])
+        samples.append(tracemalloc.get_traced_memory()[0])
+    tracemalloc.stop()
+
+    hours = LONG_SESSION_DURATION / 3600
+    return {
+        "memory_retained_kib": samples[-1] / 1024,
+        "memory_growth_kib_per_hour": (samples[-1] - samples[0]) / 1024 / hours,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Returns a description of every metric that regressed by more than `tolerance` (a fraction).
+    """
+    regressions = []
+    for name, value in results.items():
+        if name not in baseline or not baseline[name]:
+            continue
+        change = (value - baseline[name]) / abs(baseline[name])
+        if HIGHER_IS_BETTER.get(name, False):
+            change = -change
+        if change > tolerance:
+            regressions.append(f"{name}: {baseline[name]:.2f} -> {value:.2f} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark VAD throughput, heuristic cost, memory growth and endpoint latency.")
+    parser.add_argument("recordings", nargs="*", help="Recording prefixes to benchmark instead of the synthetic fixture")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic fixtures")
+    parser.add_argument("--packet-ms", type=float, default=DEFAULT_PACKET_DURATION * 1000, help="Audio packet size in ms")
+    parser.add_argument("--save", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against; exits non-zero on regression")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative regression when comparing")
+    args = parser.parse_args()
+
+    packet_duration = args.packet_ms / 1000
+    if args.recordings:
+        recordings = [load_recording(prefix) for prefix in args.recordings]
+    else:
+        recordings = [synthetic_recording(SYNTHETIC_DURATION, SYNTHETIC_SAMPLE_RATE, seed=args.seed)]
+
+    results = {}
+    throughput = [bench_vad_throughput(recording, packet_duration) for recording in recordings]
+    for name in throughput[0]:
+        results[name] = float(np.mean([result[name] for result in throughput]))
+    gated = [bench_vad_throughput(recording, packet_duration, energy_gate=True) for recording in recordings]
+    results["vad_gated_realtime_factor"] = float(np.mean([result["vad_realtime_factor"] for result in gated]))
+
+    event_streams = [collect_vad_events(recording, packet_duration) for recording in recordings]
+    results.update(bench_heuristic(event_streams))
+    results.update(bench_endpoint_latency(event_streams))
+    results.update(bench_memory(args.seed))
+
+    for name, value in results.items():
+        print(f"{name:<48}{value:>14.2f}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
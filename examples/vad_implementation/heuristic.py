@@ -1,33 +1,62 @@
-from common.base_heuristic import Heuristic
+from common.base_heuristic import Heuristic, EVENT_HISTORY_SIZE, UTTERANCE_HISTORY_SIZE
+from common.records import EventRecord, UtteranceRecord
+from common.metrics import ENDPOINTS, ENDPOINT_LATENCY, TRANSCRIPTION_LATENCY, SPECULATIVE_ENDS, SPECULATIVE_LEAD
+from common.sinks import turn_payload
+from common.utterance_builder import UtteranceBuilder
+
+VAD_END_GRACE = None # Seconds after the end of VAD speech before endpointing on an interim result; None waits for the next transcript
+
 
 class VADHeuristic(Heuristic):
     """
     VADHeuristic processes Voice Activity Detection (VAD) events and transcription results
     to manage speech utterances, handle endpointing, and maintain event logs for display.
+
+    The pause threshold is checked by a timer on the audio cursor, armed by transcripts and by the
+    end of VAD speech, so a local utterance end fires on the first audio packet past the deadline
+    instead of on the next transcript; "tick" events sent per audio packet drive the timers. The
+    VAD end is checked by a second timer: it endpoints as soon as VAD speech ends when a final
+    result already covers the end of speech. Otherwise the next transcript endpoints, since it
+    carries the words up to the end of speech; with `vad_end_grace`, the timer endpoints on the
+    latest interim result that long after the end of speech if no transcript came first.
+
+    With a speculative VAD (see VADTrigger), the heuristic also reports a likely end of the turn
+    as soon as the speech probability drops, before the silence window closes: a "likely_end"
+    event is logged and published to the sinks, followed by "confirm" when VAD ends speech or
+    "retract" when speech resumes. Downstream work can start on the likely end and be cancelled
+    on a retract.
     """
 
-    def __init__(self, pause_threshold: float = 1.2):
+    def __init__(self, pause_threshold: float = 1.2, event_history_size: int = EVENT_HISTORY_SIZE, utterance_history_size: int = UTTERANCE_HISTORY_SIZE, on_utterance_evicted=None, sinks: list = None, pause_estimator=None, vad_end_grace: float = VAD_END_GRACE):
         """
         Initializes the VADHeuristic with default parameters and state variables.
 
         Args:
             pause_threshold (float): Allowed pause between words in seconds for utterance end detection.
-        """
-        super().__init__(pause_threshold)
-        self.current_interim_utterance = ""
-        self.current_interim_utterance_start = 0.0
+            event_history_size (int): Number of logged events kept; None keeps all of them.
+            utterance_history_size (int): Number of completed utterances kept; None keeps all of them.
+            on_utterance_evicted (Callable, optional): Called with each completed utterance dropped from the history.
+            sinks (list, optional): UtteranceSinks receiving every completed utterance as it is endpointed.
+            pause_estimator (PauseEstimator, optional): Adapts pause_threshold, and the VAD silence
+                duration, to the speaker's pauses. pause_threshold stays fixed when None.
+            vad_end_grace (float, optional): Seconds after the end of VAD speech at which the
+                utterance is endpointed on the latest interim result if no transcript arrived
+                since. None waits for the next transcript unless a final result covers the end.
+        """
+        super().__init__(pause_threshold, event_history_size, utterance_history_size, on_utterance_evicted, sinks)
+        self.interim = UtteranceBuilder() # Latest interim result past the final results
         self.interim_endpointed = False
         self.spot_interim_latency = 0
         self.spot_endpoint_latency = 0
         self.vad_speech_detected = False
         self.vad_speech_end_at = None
-        self.completed_utterances = []
-        self.events = []
         self.last_word_end = 0.0
-        self.current_utterance = ""
-        self.current_utterance_start = None
         self.current_result = None
         self.audio_cursor = 0.0
+        self.pause_estimator = pause_estimator
+        self.vad_end_grace = vad_end_grace
+        self.likely_end_at = None # Speech end of the pending likely end, until it is confirmed or retracted
+        self._likely_end_cursor = None
 
     @Heuristic.event_handler("vad_event")
     def handle_vad_event(self, event):
@@ -44,6 +73,10 @@ class VADHeuristic(Heuristic):
             self._handle_vad_start(speech_dict["start"], event_audio_cursor)
         elif "end" in speech_dict:
             self._handle_vad_end(speech_dict["end"], event_audio_cursor)
+        elif "likely_end" in speech_dict:
+            self._handle_vad_likely_end(speech_dict["likely_end"], event_audio_cursor)
+        elif "resume" in speech_dict:
+            self._handle_vad_resume(speech_dict["resume"], event_audio_cursor)
 
     def _handle_vad_start(self, start_time: float, audio_cursor: float):
         """
@@ -54,19 +87,19 @@ class VADHeuristic(Heuristic):
             audio_cursor (float): The current position of the audio cursor.
         """
         self.vad_speech_detected = True
+        if self.pause_estimator is not None and self.vad_speech_end_at is not None:
+            self.pause_estimator.observe_silence(start_time - self.vad_speech_end_at)
+            self.pause_threshold = self.pause_estimator.pause_threshold
         self.vad_speech_end_at = None
 
         transcription_latency = int((audio_cursor - start_time) * 1000)
-        vad_start_event = {
-            "audio_cursor": f"{audio_cursor:.2f}",
-            "transcript_cursor": "-",
-            "event_type": "vad_event_start",
-            "latency": f"{max(transcription_latency, 0)}",
-            "speech_start_time": start_time,
-            "speech_end_time": "-",
-            "content": f"[Speech Started at {start_time:.2f}s]"
-        }
-        self.events.append(vad_start_event)
+        self.events.append(EventRecord(
+            audio_cursor,
+            "vad_event_start",
+            f"[Speech Started at {start_time:.2f}s]",
+            latency=max(transcription_latency, 0),
+            speech_start_time=start_time
+        ))
 
     def _handle_vad_end(self, end_time: float, audio_cursor: float):
         """
@@ -76,20 +109,75 @@ class VADHeuristic(Heuristic):
             end_time (float): The timestamp when speech ends.
             audio_cursor (float): The current position of the audio cursor.
         """
+        if self.likely_end_at is not None:
+            # Logged before the VAD end, which must stay the last event for vad_endpoint_needed
+            SPECULATIVE_ENDS.labels("confirmed").inc()
+            SPECULATIVE_LEAD.observe(int((audio_cursor - self._likely_end_cursor) * 1000))
+            self._log_turn_event("confirm", f"[Likely end at {self.likely_end_at:.2f}s confirmed]", self.likely_end_at, audio_cursor)
+            self.likely_end_at = None
+
         self.vad_speech_detected = False
         self.vad_speech_end_at = end_time
 
         endpoint_latency = int((audio_cursor - end_time) * 1000)
-        vad_end_event = {
-            "audio_cursor": f"{audio_cursor:.2f}",
-            "transcript_cursor": "-",
-            "event_type": "vad_event_end",
-            "latency": f"{endpoint_latency}",
-            "speech_start_time": "-",
-            "speech_end_time": end_time,
-            "content": f"[Speech Ended at {end_time:.2f}s]"
-        }
-        self.events.append(vad_end_event)
+        self.events.append(EventRecord(
+            audio_cursor,
+            "vad_event_end",
+            f"[Speech Ended at {end_time:.2f}s]",
+            latency=endpoint_latency,
+            speech_end_time=end_time
+        ))
+        # The pause check is skipped during VAD speech; re-arm it for when speech has ended
+        if self.utterance:
+            self.scheduler.schedule("local_utt_end", max(audio_cursor, self.last_word_end + self.pause_threshold), self._on_pause_deadline)
+        if self.utterance or self.interim:
+            self.scheduler.schedule("vad_end", max(audio_cursor, end_time + (self.vad_end_grace or 0.0)), self._on_vad_end_deadline)
+
+    def _handle_vad_likely_end(self, end_time: float, audio_cursor: float):
+        """
+        Processes a likely end of speech: the speech probability dropped, but the VAD silence
+        window has not closed yet. Only reported while there is a transcript to endpoint.
+
+        Args:
+            end_time (float): The timestamp when speech likely ended.
+            audio_cursor (float): The current position of the audio cursor.
+        """
+        if not (self.utterance or self.interim):
+            return
+        SPECULATIVE_ENDS.labels("reported").inc()
+        self.likely_end_at = end_time
+        self._likely_end_cursor = audio_cursor
+        self._log_turn_event("likely_end", f"[Speech Likely Ended at {end_time:.2f}s]", end_time, audio_cursor)
+
+    def _handle_vad_resume(self, resume_time: float, audio_cursor: float):
+        """
+        Processes speech resuming before the VAD silence window closed, retracting the pending
+        likely end, if any.
+
+        Args:
+            resume_time (float): The timestamp when speech resumed.
+            audio_cursor (float): The current position of the audio cursor.
+        """
+        if self.likely_end_at is None:
+            return
+        SPECULATIVE_ENDS.labels("retracted").inc()
+        self._log_turn_event("retract", f"[Speech Resumed at {resume_time:.2f}s]", self.likely_end_at, audio_cursor)
+        self.likely_end_at = None
+
+    def _log_turn_event(self, event_type: str, content: str, end_time: float, audio_cursor: float):
+        """
+        Logs a speculative turn event and publishes it, with the pending transcript, to the sinks.
+        """
+        self.events.append(EventRecord(
+            audio_cursor,
+            event_type,
+            content,
+            latency=int((audio_cursor - end_time) * 1000),
+            speech_end_time=end_time
+        ))
+        if self.sinks:
+            transcript = " ".join(filter(None, (self.utterance.text, self.interim.text)))
+            self._publish(turn_payload(event_type, transcript, end_time, audio_cursor))
 
     @Heuristic.event_handler("transcript")
     def handle_transcript(self, event):
@@ -111,18 +199,21 @@ class VADHeuristic(Heuristic):
         self.last_word_end = last_word_end if last_word_end else self.last_word_end
         transcription_latency = self._calculate_transcription_latency(result, transcript_cursor)
         endpoint_latency = self._calculate_endpoint_latency(result, event_audio_cursor, last_word_end)
+        if self.pause_estimator is not None and result.is_final:
+            self.pause_estimator.observe_words(words)
+            self.pause_threshold = self.pause_estimator.pause_threshold
 
         # Update current utterance based on transcription result type
         if result.speech_final:
             event_type = "speech_final_transcript"
-            self._process_speech_final(transcript, first_word_start, last_word_end, transcription_latency)
+            self._process_speech_final(transcript, words, first_word_start, transcription_latency)
         elif result.is_final:
             event_type = "final_transcript"
             transcription_latency = None
-            self._process_final_transcript(transcript, first_word_start)
+            self._process_final_transcript(transcript, words, first_word_start)
         else:
             event_type = "interim_transcript"
-            self._process_interim_transcript(transcript, first_word_start, transcription_latency)
+            self._process_interim_transcript(transcript, words, first_word_start, transcription_latency)
 
         # Determine if endpointing is needed and handle utterance accordingly
         if self.vad_endpoint_needed():
@@ -146,6 +237,9 @@ class VADHeuristic(Heuristic):
                 endpoint_latency
             )
 
+        if transcription_latency is not None:
+            TRANSCRIPTION_LATENCY.labels(event_type).observe(transcription_latency)
+
         # Log the current transcription event
         should_log_endpoint_latency = (
             event_type in ["speech_final_transcript", "vad_interim", "vad_is_final", "empty_speech_final"] and
@@ -164,6 +258,8 @@ class VADHeuristic(Heuristic):
 
         # Update the last word end time
         self.last_word_end = last_word_end or self.last_word_end
+        if self.utterance:
+            self.scheduler.schedule("local_utt_end", self.last_word_end + self.pause_threshold, self._on_pause_deadline)
 
     def _extract_word_times(self, words):
         """
@@ -210,69 +306,61 @@ class VADHeuristic(Heuristic):
             return int((audio_cursor - last_word_end) * 1000)
         return 0
 
-    def _process_speech_final(self, transcript, first_word_start, last_word_end, transcription_latency):
+    def _process_speech_final(self, transcript, words, first_word_start, transcription_latency):
         """
         Processes a speech_final transcription result, updating the current utterance.
 
         Args:
             transcript (str): The transcribed text.
+            words (list): Word objects of the result.
             first_word_start (float): Start time of the first word.
-            last_word_end (float): End time of the last word.
             transcription_latency (int): Transcription latency in milliseconds.
         """
         if first_word_start and not self.interim_endpointed:
             self.spot_endpoint_latency = transcription_latency
-            if self.current_utterance:
-                self.current_utterance += " " + transcript
-            else:
-                self.current_utterance = transcript
-                self.current_utterance_start = first_word_start
+            self.utterance.append(transcript, words)
 
             if self.first_or_distinct_utterance():
-                self._add_completed_utterance(first_word_start, last_word_end, transcription_latency, "speech_final", self.current_utterance)
+                self._add_completed_utterance(self.utterance.start, self.utterance.end, transcription_latency, "speech_final", self.utterance.text)
 
         # Reset interim utterance state
-        self.current_interim_utterance = ""
-        self.current_interim_utterance_start = None
+        self.interim.clear()
         self.interim_endpointed = False
 
-    def _process_final_transcript(self, transcript, first_word_start):
+    def _process_final_transcript(self, transcript, words, first_word_start):
         """
         Processes a final_transcript result, updating the current utterance.
 
         Args:
             transcript (str): The transcribed text.
+            words (list): Word objects of the result.
             first_word_start (float): Start time of the first word.
         """
         if first_word_start and not self.interim_endpointed:
-            if self.current_utterance:
-                self.current_utterance += " " + transcript
-            else:
-                self.current_utterance = transcript
-                self.current_utterance_start = first_word_start
+            self.utterance.append(transcript, words)
 
         # Reset interim utterance state
-        self.current_interim_utterance = ""
-        self.current_interim_utterance_start = None
+        self.interim.clear()
         self.interim_endpointed = False
 
-    def _process_interim_transcript(self, transcript, first_word_start, transcription_latency):
+    def _process_interim_transcript(self, transcript, words, first_word_start, transcription_latency):
         """
         Processes an interim_transcript result, updating the current interim utterance.
 
         Args:
             transcript (str): The transcribed text.
+            words (list): Word objects of the result.
             first_word_start (float): Start time of the first word.
             transcription_latency (int): Transcription latency in milliseconds.
         """
         self.spot_interim_latency = transcription_latency
         if first_word_start and not self.interim_endpointed:
-            self.current_interim_utterance = transcript
-            self.current_interim_utterance_start = first_word_start
+            self.interim.clear()
+            self.interim.append(transcript, words)
 
     def _log_transcription_event(self, transcript, transcript_cursor, audio_cursor, event_type, first_word_start, last_word_end, transcription_latency, endpoint_latency=None):
         """
-        Logs a transcription event to the events list.
+        Logs a transcription event to the event history.
 
         Args:
             transcript (str): The transcribed text.
@@ -284,21 +372,16 @@ class VADHeuristic(Heuristic):
             transcription_latency (int): Transcription latency in milliseconds.
             endpoint_latency (int, optional): Endpoint latency in milliseconds. Defaults to None.
         """
-        if endpoint_latency is not None:
-            latency_str = f"{transcription_latency} ({endpoint_latency})"
-        else:
-            latency_str = f"{transcription_latency}" if isinstance(transcription_latency, int) else '-'
-
-        event_log = {
-            "audio_cursor": f"{audio_cursor:.2f}",
-            "transcript_cursor": f"{transcript_cursor:.2f}" if isinstance(transcript_cursor, float) else "-",
-            "event_type": event_type,
-            "latency": latency_str,
-            "speech_start_time": f"{first_word_start:.2f}" if first_word_start else '-',
-            "speech_end_time": f"{last_word_end:.2f}" if last_word_end else '-',
-            "content": transcript
-        }
-        self.events.append(event_log)
+        self.events.append(EventRecord(
+            audio_cursor,
+            event_type,
+            transcript,
+            transcript_cursor=transcript_cursor,
+            latency=transcription_latency,
+            endpoint_latency=endpoint_latency,
+            speech_start_time=first_word_start,
+            speech_end_time=last_word_end
+        ))
 
     @Heuristic.event_handler("utterance_end")
     def handle_utterance_end(self, event):
@@ -312,19 +395,54 @@ class VADHeuristic(Heuristic):
         last_word_end = result.last_word_end
         event_audio_cursor = event.get("audio_cursor", 0.0)
 
-        content = f"Utterance end for word at {last_word_end:.2f} s"
         endpoint_latency = int((event_audio_cursor - last_word_end) * 1000)
+        self.events.append(EventRecord(
+            event_audio_cursor,
+            "utterance_end",
+            f"Utterance end for word at {last_word_end:.2f} s",
+            latency=endpoint_latency,
+            speech_end_time=last_word_end
+        ))
 
-        utterance_end_event = {
-            "audio_cursor": f"{event_audio_cursor:.2f}",
-            "transcript_cursor": "-",
-            "event_type": "utterance_end",
-            "latency": f"{endpoint_latency}",
-            "speech_start_time": "-",
-            "speech_end_time": f"{last_word_end:.2f}",
-            "content": content
-        }
-        self.events.append(utterance_end_event)
+    def _on_pause_deadline(self, deadline: float):
+        """
+        Fires pause_threshold seconds of audio after the last word ended.
+        """
+        if self.utterance_endpoint_needed():
+            self._endpoint_on_timer("local_utt_end")
+
+    def _on_vad_end_deadline(self, deadline: float):
+        """
+        Fires when VAD speech ends, or vad_end_grace seconds of audio after, endpointing with the
+        latest transcription result if no transcript has done so since.
+        """
+        result = self.current_result
+        final_covers_end = result.is_final and result.start + result.duration >= self.vad_speech_end_at
+        if (final_covers_end or self.vad_end_grace is not None) and self.vad_endpoint_needed():
+            self._endpoint_on_timer("final_transcript" if result.is_final else "interim_transcript")
+
+    def _endpoint_on_timer(self, reason: str):
+        """
+        Endpoints the current utterance from a timer, using the latest transcription result.
+
+        Args:
+            reason (str): Reason for completion, or the event type it maps from (see
+                endpoint_current_utterance).
+        """
+        result = self.current_result
+        transcript_cursor = result.start + result.duration
+        alternative = result.channel.alternatives[0]
+        first_word_start, last_word_end = self._extract_word_times(alternative.words)
+        endpoint_latency = self._calculate_endpoint_latency(result, self.audio_cursor, self.last_word_end)
+        self.endpoint_current_utterance(
+            reason,
+            self.audio_cursor,
+            transcript_cursor,
+            alternative.transcript,
+            self.utterance.start or first_word_start,
+            last_word_end or self.last_word_end,
+            endpoint_latency
+        )
 
     def first_or_distinct_utterance(self) -> bool:
         """
@@ -335,7 +453,7 @@ class VADHeuristic(Heuristic):
         """
         return (
             not self.completed_utterances or
-            float(self.completed_utterances[-1]["end_time"]) < (self.current_utterance_start or 0)
+            (self.completed_utterances[-1].end_time or 0) < (self.utterance.start or 0)
         )
     
     def vad_endpoint_needed(self) -> bool:
@@ -348,9 +466,9 @@ class VADHeuristic(Heuristic):
         return (
             not self.vad_speech_detected and
             not self.interim_endpointed and
-            (self.current_utterance or self.current_interim_utterance) and
+            (self.utterance or self.interim) and
             self.events and
-            self.events[-1]["event_type"] == "vad_event_end"
+            self.events[-1].event_type == "vad_event_end"
         )
     
     def utterance_endpoint_needed(self) -> bool:
@@ -363,8 +481,8 @@ class VADHeuristic(Heuristic):
         return (
             not self.vad_speech_detected and 
             not self.interim_endpointed and
-            self.current_utterance and
-            (self.audio_cursor - self.last_word_end) > self.pause_threshold
+            self.utterance and
+            (self.audio_cursor - self.last_word_end) >= self.pause_threshold
         )
 
     def endpoint_current_utterance(self, event_type, audio_cursor, transcript_cursor, transcript, first_word_start, last_word_end, endpoint_latency):
@@ -388,26 +506,23 @@ class VADHeuristic(Heuristic):
         # Calculate transcription latency for endpointing events
         transcription_latency = self._calculate_transcription_latency(self.current_result, transcript_cursor)
 
-        # Format latency as "transcription_latency (endpoint_latency)"
-        latency_str = f"{transcription_latency} ({endpoint_latency})"
-
-        endpoint_event = {
-            "audio_cursor": f"{audio_cursor:.2f}",
-            "transcript_cursor": f"{transcript_cursor:.2f}",
-            "event_type": reason,
-            "latency": latency_str,
-            "speech_start_time": f"{first_word_start:.2f}" if first_word_start else "-",
-            "speech_end_time": f"{last_word_end:.2f}" if last_word_end else "-",
-            "content": transcript
-        }
-        self.events.append(endpoint_event)
+        self.events.append(EventRecord(
+            audio_cursor,
+            reason,
+            transcript,
+            transcript_cursor=transcript_cursor,
+            latency=transcription_latency,
+            endpoint_latency=endpoint_latency,
+            speech_start_time=first_word_start,
+            speech_end_time=last_word_end
+        ))
 
         self._add_completed_utterance(
-            first_word_start, 
-            last_word_end, 
-            endpoint_latency, 
-            reason, 
-            self.current_utterance
+            self.utterance.start or first_word_start,
+            self.utterance.end or last_word_end,
+            endpoint_latency,
+            reason,
+            self.utterance.text
         )
 
     def _determine_endpoint_reason(self, event_type: str) -> str:
@@ -431,17 +546,13 @@ class VADHeuristic(Heuristic):
         """
         Merges the current interim utterance into the main utterance if the result is not final.
         """
-        if self.current_utterance:
-            self.current_utterance += " " + self.current_interim_utterance
-        else:
-            self.current_utterance = self.current_interim_utterance
-        self.current_interim_utterance = ""
-        self.current_interim_utterance_start = None
+        self.utterance.extend(self.interim)
+        self.interim.clear()
         self.interim_endpointed = True
 
     def _add_completed_utterance(self, start_time, end_time, latency, completed_by, transcript):
         """
-        Adds a completed utterance to the list of completed utterances.
+        Adds a completed utterance to the completed utterance history.
 
         Args:
             start_time (float): Start time of the utterance.
@@ -450,16 +561,13 @@ class VADHeuristic(Heuristic):
             completed_by (str): Reason for completion.
             transcript (str): The transcribed text.
         """
-        completed_utterance = {
-            "start_time": f"{start_time:.2f}" if start_time else "-",
-            "end_time": f"{end_time:.2f}" if end_time else "-",
-            "latency": latency,
-            "completed_by": completed_by,
-            "transcript": transcript
-        }
-        self.completed_utterances.append(completed_utterance)
-        self.current_utterance = ""
-        self.current_utterance_start = None
+        self._complete_utterance(UtteranceRecord(start_time, end_time, latency, completed_by, transcript))
+        self.scheduler.cancel("local_utt_end")
+        self.scheduler.cancel("vad_end")
+        ENDPOINTS.labels(completed_by).inc()
+        if latency is not None:
+            ENDPOINT_LATENCY.labels(completed_by).observe(latency)
+        self.utterance.clear()
 
     def get_display_data(self) -> dict:
         """
@@ -471,10 +579,10 @@ class VADHeuristic(Heuristic):
         return {
             'completed_utterances': self.completed_utterances,
             'events': self.events,
-            'current_utterance': self.current_utterance,
-            'current_utterance_start': self.current_utterance_start or "",
-            'current_interim_utterance': self.current_interim_utterance,
-            'current_interim_utterance_start': self.current_interim_utterance_start or "",
+            'current_utterance': self.utterance.text,
+            'current_utterance_start': self.utterance.start or "",
+            'current_interim_utterance': self.interim.text,
+            'current_interim_utterance_start': self.interim.start or "",
             'metrics': {
                 'spot_interim_latency': self.spot_interim_latency,
                 'spot_endpoint_latency': self.spot_endpoint_latency,
@@ -1,78 +1,147 @@
+import gc
+import json
 import os
 import threading
-import queue
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
 from deepgram import DeepgramClient, LiveOptions, LiveTranscriptionEvents, Microphone
 from common.vad import vad_worker, create_vad_iterator, VAD_SAMPLE_RATE, VAD_CHUNK_DURATION # 32 ms
+from common.batched_vad import BatchedVADEngine, vad_engine_worker
+from common.vad_backends import get_vad_backend
+from common.recording import SessionRecorder
+from common.dispatcher import EventDispatcher
+from common.audio_clock import AudioClock
+from common.audio_queue import AudioQueue
+from common.metrics import MetricsServer
+from common.multichannel import MultichannelHeuristic
+from common.sinks import create_sinks
+from common.pause_estimator import PauseEstimator
 from heuristic import VADHeuristic
-from terminal_renderer import TerminalRenderer
+from common.terminal_renderer import TerminalRenderer
 
 DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
+VAD_BACKEND = os.getenv("VAD_BACKEND", "onnx") # "onnx" or "torchscript"; model path can be set with VAD_MODEL_PATH
+RECORD_PATH = os.getenv("RECORD_PATH") # Optional path prefix; records <prefix>.wav and <prefix>.jsonl for replay.py
+METRICS_PORT = os.getenv("METRICS_PORT") # Optional port serving Prometheus metrics at http://127.0.0.1:<port>/metrics
+UTTERANCE_ARCHIVE_PATH = os.getenv("UTTERANCE_ARCHIVE_PATH") # Optional JSONL file receiving completed utterances as they leave the history
+UTTERANCE_SINK_PATH = os.getenv("UTTERANCE_SINK_PATH") # Optional JSONL file receiving each utterance as soon as it is endpointed
+UTTERANCE_SOCKET_PATH = os.getenv("UTTERANCE_SOCKET_PATH") # Optional UNIX socket serving each utterance as a JSON line as soon as it is endpointed
 
 # These three can be changed
 INPUT_SAMPLE_RATE = 48000 # Microphone sample rate Note: Must manually provide this
+INPUT_CHANNELS = 1 # Interleaved input channels; each is endpointed separately, e.g. 2 for agent and customer of a call
 # Silence required for endpointing for both Deepgram API VAD (speech_final) and local VAD (silero-VAD)
 # TODO: Make it easier to just pass in ms, handle the math in code
 MIN_SILENCE_DURATION_MULTIPLIER = 8 # Multiples of 32 ms
 PAUSE_THRESHOLD = 1.0 # Allowed pause between words in seconds, for local utterance_end
+ADAPTIVE_PAUSE = False # Tune PAUSE_THRESHOLD and the VAD silence duration to each speaker, starting from the values above; see common/pause_estimator.py
+VAD_QUEUE_PACKETS = 32 # Packets waiting for VAD before VAD_QUEUE_POLICY applies (about 3 s)
+ENERGY_GATE = False # Skip VAD inference on obvious silence, at the cost of changing some VAD events; see common/energy_gate.py
+SPECULATIVE_ENDPOINTING = False # Publish likely turn ends to the sinks before the VAD silence window closes; see VADHeuristic
+VAD_QUEUE_POLICY = "defer_in_speech" # "block", "drop_oldest" or "defer_in_speech"; see common/audio_queue.py
 
 # Avoid changing these directly
 MIN_SILENCE_DURATION_MS = MIN_SILENCE_DURATION_MULTIPLIER * VAD_CHUNK_DURATION * 1000 # Defaulting to 320 ms, change the multiplier
 INPUT_CHUNK_DURATION = int(INPUT_SAMPLE_RATE / VAD_SAMPLE_RATE) * VAD_CHUNK_DURATION # Defaulting to quotient of input sample rate / VAD sample rate
 INPUT_CHUNK_SIZE = int(INPUT_SAMPLE_RATE * INPUT_CHUNK_DURATION) # samples at INPUT_SAMPLE_RATE
+BYTES_PER_SAMPLE = 2 # int16
 
 
 def main():
     deepgram = DeepgramClient(DEEPGRAM_API_KEY)
     dg_connection = deepgram.listen.websocket.v("1")
 
-    heuristic = VADHeuristic(pause_threshold=PAUSE_THRESHOLD)
+    metrics_server = MetricsServer(int(METRICS_PORT)) if METRICS_PORT else None
+    if metrics_server:
+        metrics_server.start()
+
+    archive = open(UTTERANCE_ARCHIVE_PATH, "a") if UTTERANCE_ARCHIVE_PATH else None
+
+    def archive_utterance(utterance):
+        archive.write(json.dumps(utterance.to_dict()) + "\n")
+
+    sinks = create_sinks(UTTERANCE_SINK_PATH, UTTERANCE_SOCKET_PATH)
+    pause_estimators = [
+        PauseEstimator(PAUSE_THRESHOLD, MIN_SILENCE_DURATION_MS) if ADAPTIVE_PAUSE else None
+        for _ in range(INPUT_CHANNELS)
+    ]
+    heuristics = [
+        VADHeuristic(pause_threshold=PAUSE_THRESHOLD, on_utterance_evicted=archive_utterance if archive else None, sinks=sinks, pause_estimator=pause_estimator)
+        for pause_estimator in pause_estimators
+    ]
+    # With several channels, Deepgram results are routed to each channel's heuristic by channel_index
+    heuristic = heuristics[0] if INPUT_CHANNELS == 1 else MultichannelHeuristic(heuristics)
     terminal_renderer = TerminalRenderer()
+    terminal_renderer.start()
+    # Only the dispatcher thread touches the heuristic; the other threads push events to it
+    clock = AudioClock(INPUT_SAMPLE_RATE)
+    dispatcher = EventDispatcher(heuristic, clock, on_processed=terminal_renderer.refresh)
+    dispatcher.start()
     
     stop_event = threading.Event()
-    vad_queue = queue.Queue()
-
-    def process_vad_event(speech_dict):
-        heuristic.process({
-            "event_type": "vad_event", 
-            "audio_cursor": heuristic.audio_cursor, 
-            "data": speech_dict
-        })
-        display_data = heuristic.get_display_data()
-        terminal_renderer.update(**display_data)
-        terminal_renderer.render()
-
-    vad_iterator = create_vad_iterator(MIN_SILENCE_DURATION_MS)
-    vad_thread = threading.Thread(
-        target=vad_worker, 
-        args=(vad_queue, process_vad_event, stop_event, INPUT_SAMPLE_RATE, vad_iterator)
-    )
+    recorder = SessionRecorder(RECORD_PATH, INPUT_SAMPLE_RATE, INPUT_CHANNELS) if RECORD_PATH else None
+
+    if INPUT_CHANNELS == 1:
+        def process_vad_event(speech_dict):
+            dispatcher.push("vad_event", speech_dict)
+
+        def process_vad_frames(frames):
+            dispatcher.push("vad_frames", frames)
+
+        vad_iterator = create_vad_iterator(MIN_SILENCE_DURATION_MS, get_vad_backend(VAD_BACKEND), ENERGY_GATE, SPECULATIVE_ENDPOINTING)
+        if ADAPTIVE_PAUSE:
+            pause_estimators[0].vad_trigger = vad_iterator
+        vad_queue = AudioQueue(VAD_QUEUE_PACKETS, VAD_QUEUE_POLICY, is_speech=lambda: vad_iterator.triggered)
+        push_vad_audio = vad_queue.put
+        vad_thread = threading.Thread(
+            target=vad_worker, 
+            args=(vad_queue, process_vad_event, stop_event, INPUT_SAMPLE_RATE, vad_iterator, clock, process_vad_frames)
+        )
+    else:
+        # One VAD stream per channel, all run through the model in the same batches
+        vad_engine = BatchedVADEngine(get_vad_backend(VAD_BACKEND), energy_gate=ENERGY_GATE, speculative=SPECULATIVE_ENDPOINTING)
+        vad_sessions = []
+        for channel in range(INPUT_CHANNELS):
+            vad_session = vad_engine.add_session(
+                channel,
+                lambda speech_dict, channel=channel: dispatcher.push("vad_event", {**speech_dict, "channel": channel}),
+                INPUT_SAMPLE_RATE,
+                MIN_SILENCE_DURATION_MS,
+                INPUT_CHANNELS,
+                channel,
+                lambda frames: dispatcher.push("vad_frames", frames)
+            )
+            vad_sessions.append(vad_session)
+            if ADAPTIVE_PAUSE:
+                pause_estimators[channel].vad_trigger = vad_session.trigger
+
+        # The channels share one queue, so a drop skips the same audio in every channel
+        vad_queue = AudioQueue(
+            VAD_QUEUE_PACKETS,
+            VAD_QUEUE_POLICY,
+            is_speech=lambda: any(vad_session.trigger.triggered for vad_session in vad_sessions),
+            channels=INPUT_CHANNELS
+        )
+        push_vad_audio = vad_queue.put
+        vad_thread = threading.Thread(
+            target=vad_engine_worker,
+            args=(vad_queue, vad_engine, list(range(INPUT_CHANNELS)), stop_event, clock)
+        )
     vad_thread.start()
     
     def on_message(self, result, **kwargs):
-        audio_cursor = heuristic.audio_cursor
-        heuristic.process({
-            "event_type": "transcript", 
-            "audio_cursor": audio_cursor, 
-            "data": result
-        })
-        display_data = heuristic.get_display_data()
-        terminal_renderer.update(**display_data)
-        terminal_renderer.render()
+        audio_cursor = dispatcher.audio_cursor
+        if recorder:
+            recorder.write_event("transcript", audio_cursor, result)
+        dispatcher.push("transcript", result, audio_cursor)
         
     def on_utterance_end(self, utterance_end, **kwargs):
-        audio_cursor = heuristic.audio_cursor
-        heuristic.process({
-            "event_type": "utterance_end", 
-            "audio_cursor": audio_cursor, 
-            "data": utterance_end
-        })
-        display_data = heuristic.get_display_data()
-        terminal_renderer.update(**display_data)
-        terminal_renderer.render()
+        audio_cursor = dispatcher.audio_cursor
+        if recorder:
+            recorder.write_event("utterance_end", audio_cursor, utterance_end)
+        dispatcher.push("utterance_end", utterance_end, audio_cursor)
         
     def on_error(_, error, **__):
         print(f"Error: {error}")
@@ -89,26 +158,39 @@ def main():
         utterance_end_ms=max(1000, int(PAUSE_THRESHOLD * 1000)),
         endpointing=int(MIN_SILENCE_DURATION_MS),
         encoding="linear16",
-        channels=1,
+        channels=INPUT_CHANNELS,
+        multichannel=INPUT_CHANNELS > 1,
         sample_rate=INPUT_SAMPLE_RATE
     )
 
     if dg_connection.start(options) is False:
+        stop_event.set()
+        dispatcher.stop()
+        for sink in sinks:
+            sink.close()
+        terminal_renderer.stop()
         print("Failed to connect to Deepgram")
         return
     
     def process_mic_data(data):
         if not stop_event.is_set():
-            heuristic.audio_cursor += INPUT_CHUNK_DURATION
+            clock.advance(len(data) // (BYTES_PER_SAMPLE * INPUT_CHANNELS))
+            # Lets the heuristic's timers fire while no transcripts arrive
+            dispatcher.push("tick", None)
             dg_connection.send(data)
-            vad_queue.put(data)
+            push_vad_audio(data)
+            if recorder:
+                recorder.write_audio(data)
             
     microphone = Microphone(
         process_mic_data, 
         rate=INPUT_SAMPLE_RATE,
         chunk=INPUT_CHUNK_SIZE,
+        channels=INPUT_CHANNELS,
     )
     
+    # Objects created so far live for the whole session; keep them out of the collector's full passes
+    gc.freeze()
     microphone.start()
 
     print("\nPress Enter to stop streaming...\n")
@@ -118,6 +200,20 @@ def main():
     microphone.finish()
     dg_connection.finish()
     vad_thread.join()
+    dispatcher.stop()
+    for sink in sinks:
+        sink.close()
+    # The dispatcher has stopped, so the final state can be read from this thread
+    terminal_renderer.update(**heuristic.get_display_data())
+    terminal_renderer.stop()
+    if metrics_server:
+        metrics_server.stop()
+    if recorder:
+        recorder.close()
+    if archive:
+        for channel_heuristic in heuristics:
+            channel_heuristic.completed_utterances.evict_all()
+        archive.close()
     print("Finished")
 
 if __name__ == "__main__":
@@ -0,0 +1,160 @@
+import argparse
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from deepgram import DeepgramClient, DeepgramClientOptions, LiveOptions, LiveTranscriptionEvents
+from common.audio_clock import AudioClock
+from common.dispatcher import EventDispatcher
+from common.recording import load_recording, find_recordings
+from common.replay import replay_recording, FakeDeepgramServer, DEFAULT_PACKET_DURATION
+from common.vad import VADStream, create_vad_iterator, VAD_CHUNK_DURATION
+from common.vad_backends import get_vad_backend
+from common.pause_estimator import PauseEstimator
+from heuristic import VADHeuristic
+
+VAD_BACKEND = os.getenv("VAD_BACKEND", "onnx") # "onnx" or "torchscript"; model path can be set with VAD_MODEL_PATH
+WEBSOCKET_REPLAY_SPEED = 10.0 # Multiple of real time at which audio is streamed to the stand-in server
+
+
+def create_heuristic(pause_threshold: float, min_silence_duration_ms: float, vad_iterator, adaptive: bool, vad_end_grace: float = None) -> VADHeuristic:
+    """
+    Creates the heuristic for one replay; with `adaptive`, the parameters are only starting
+    values for a PauseEstimator that tunes them and the VAD iterator to the recording.
+    """
+    pause_estimator = PauseEstimator(pause_threshold, min_silence_duration_ms, vad_trigger=vad_iterator) if adaptive else None
+    return VADHeuristic(pause_threshold=pause_threshold, utterance_history_size=None, pause_estimator=pause_estimator, vad_end_grace=vad_end_grace)
+
+
+def replay_file(prefix: str, pause_threshold: float, min_silence_multiplier: int, packet_duration: float, adaptive: bool = False, energy_gate: bool = False, vad_end_grace: float = None) -> list:
+    """
+    Replays one recording with one parameter set.
+
+    Returns:
+        list: The completed utterances produced by the heuristic.
+    """
+    recording = load_recording(prefix)
+    min_silence_duration_ms = min_silence_multiplier * VAD_CHUNK_DURATION * 1000
+    vad_iterator = create_vad_iterator(min_silence_duration_ms, get_vad_backend(VAD_BACKEND), energy_gate)
+    heuristic = create_heuristic(pause_threshold, min_silence_duration_ms, vad_iterator, adaptive, vad_end_grace)
+    replay_recording(recording, heuristic, vad_iterator, packet_duration)
+    return list(heuristic.completed_utterances)
+
+
+def replay_via_websocket(prefix: str, pause_threshold: float, min_silence_multiplier: int, packet_duration: float, adaptive: bool = False, energy_gate: bool = False, vad_end_grace: float = None) -> list:
+    """
+    Replays one recording through the Deepgram SDK against a local FakeDeepgramServer, exercising
+    the same websocket path as the live pipeline. Audio is streamed at WEBSOCKET_REPLAY_SPEED
+    times real time, so latencies include scaled-up network and scheduling delays.
+
+    Returns:
+        list: The completed utterances produced by the heuristic.
+    """
+    recording = load_recording(prefix)
+    server = FakeDeepgramServer(recording)
+    server.start()
+
+    min_silence_duration_ms = min_silence_multiplier * VAD_CHUNK_DURATION * 1000
+    vad_iterator = create_vad_iterator(min_silence_duration_ms, get_vad_backend(VAD_BACKEND), energy_gate)
+    heuristic = create_heuristic(pause_threshold, min_silence_duration_ms, vad_iterator, adaptive, vad_end_grace)
+    clock = AudioClock(recording.sample_rate)
+    dispatcher = EventDispatcher(heuristic, clock)
+    dispatcher.start()
+    vad_stream = VADStream(recording.sample_rate, vad_iterator)
+
+    deepgram = DeepgramClient("replay", DeepgramClientOptions(url=server.url))
+    dg_connection = deepgram.listen.websocket.v("1")
+    dg_connection.on(LiveTranscriptionEvents.Transcript, lambda _, result, **kwargs: dispatcher.push("transcript", result))
+    dg_connection.on(LiveTranscriptionEvents.UtteranceEnd, lambda _, utterance_end, **kwargs: dispatcher.push("utterance_end", utterance_end))
+
+    options = LiveOptions(
+        interim_results=True,
+        encoding="linear16",
+        channels=1,
+        sample_rate=recording.sample_rate
+    )
+    if dg_connection.start(options) is False:
+        server.stop()
+        dispatcher.stop()
+        raise RuntimeError("Failed to connect to the stand-in Deepgram server")
+
+    packet_size = int(recording.sample_rate * packet_duration)
+    for offset in range(0, len(recording.audio), packet_size):
+        packet = recording.audio[offset:offset + packet_size]
+        clock.advance(len(packet))
+        dispatcher.push("tick", None)
+        dg_connection.send(packet.tobytes())
+        for speech_dict in vad_stream.process(packet):
+            dispatcher.push("vad_event", speech_dict)
+        frames = vad_stream.take_frames()
+        if frames is not None:
+            dispatcher.push("vad_frames", frames)
+        time.sleep(packet_duration / WEBSOCKET_REPLAY_SPEED)
+
+    dg_connection.finish()
+    server.stop()
+    dispatcher.stop()
+    return list(heuristic.completed_utterances)
+
+
+def summarize(utterances: list) -> dict:
+    latencies = np.array([u.latency for u in utterances if u.latency is not None], dtype=float)
+    completed_by = {}
+    for utterance in utterances:
+        completed_by[utterance.completed_by] = completed_by.get(utterance.completed_by, 0) + 1
+    return {
+        "utterances": len(utterances),
+        "p50": np.percentile(latencies, 50) if len(latencies) else float("nan"),
+        "p90": np.percentile(latencies, 90) if len(latencies) else float("nan"),
+        "completed_by": completed_by,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sessions through VADHeuristic faster than real time.")
+    parser.add_argument("recordings", nargs="+", help="Recording prefixes, .wav files or directories of recordings")
+    parser.add_argument("--pause-threshold", type=float, nargs="+", default=[1.0], help="PAUSE_THRESHOLD values to sweep")
+    parser.add_argument("--min-silence-multiplier", type=int, nargs="+", default=[8], help="MIN_SILENCE_DURATION_MULTIPLIER values to sweep")
+    parser.add_argument("--packet-ms", type=float, default=DEFAULT_PACKET_DURATION * 1000, help="Replayed audio packet size in ms")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processes used to replay recordings in parallel")
+    parser.add_argument("--adaptive", action="store_true", help="Adapt the pause threshold and VAD silence duration per recording, starting from the swept values")
+    parser.add_argument("--energy-gate", action="store_true", help="Skip VAD inference on obvious silence, as with ENERGY_GATE in main.py")
+    parser.add_argument("--vad-end-grace", type=float, help="Endpoint on the latest interim this many seconds after VAD speech ends (see VADHeuristic)")
+    parser.add_argument("--websocket", action="store_true", help="Replay through the Deepgram SDK against a local stand-in server")
+    parser.add_argument("--verbose", action="store_true", help="Print every completed utterance")
+    args = parser.parse_args()
+
+    prefixes = find_recordings(args.recordings)
+    if not prefixes:
+        print("No recordings found")
+        return
+
+    replay = replay_via_websocket if args.websocket else replay_file
+    packet_duration = args.packet_ms / 1000
+
+    print(f"{'Pause Threshold':^17}|{'Min Silence (ms)':^18}|{'Utterances':^12}|{'p50 Latency':^13}|{'p90 Latency':^13}| Completed By")
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for pause_threshold, multiplier in itertools.product(args.pause_threshold, args.min_silence_multiplier):
+            start = time.perf_counter()
+            results = list(executor.map(replay, prefixes, itertools.repeat(pause_threshold), itertools.repeat(multiplier), itertools.repeat(packet_duration), itertools.repeat(args.adaptive), itertools.repeat(args.energy_gate), itertools.repeat(args.vad_end_grace)))
+            elapsed = time.perf_counter() - start
+
+            utterances = list(itertools.chain.from_iterable(results))
+            if args.verbose:
+                for prefix, file_utterances in zip(prefixes, results):
+                    for utterance in file_utterances:
+                        utterance = utterance.display()
+                        print(f"{os.path.basename(prefix)} [{utterance['start_time']} - {utterance['end_time']} ({utterance['latency']} ms - {utterance['completed_by']})]  {utterance['transcript']}")
+
+            summary = summarize(utterances)
+            min_silence_ms = int(multiplier * VAD_CHUNK_DURATION * 1000)
+            print(f"{pause_threshold:^17}|{min_silence_ms:^18}|{summary['utterances']:^12}|{summary['p50']:^13.0f}|{summary['p90']:^13.0f}| {summary['completed_by']} ({elapsed:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import websockets
+from deepgram import DeepgramClient, LiveOptions, LiveTranscriptionEvents
+from common.audio_clock import AudioClock
+from common.batched_vad import BatchedVADEngine
+from common.metrics import MetricsServer
+from common.multichannel import MultichannelHeuristic
+from common.vad import VAD_CHUNK_DURATION
+from common.vad_backends import get_vad_backend
+from common.vad_pool import VADProcessPool
+from heuristic import VADHeuristic
+
+DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
+VAD_BACKEND = os.getenv("VAD_BACKEND", "onnx") # "onnx" or "torchscript"; model path can be set with VAD_MODEL_PATH
+
+# These can be changed
+SERVER_HOST = "127.0.0.1"
+TCP_PORT = 8765 # Raw TCP audio sessions
+WEBSOCKET_PORT = 8766 # Websocket audio sessions
+METRICS_PORT = 9100 # Prometheus metrics for all sessions, at /metrics
+DEFAULT_SAMPLE_RATE = 16000 # Used when a client does not send one in its header
+MIN_SILENCE_DURATION_MULTIPLIER = 8 # Multiples of 32 ms
+PAUSE_THRESHOLD = 1.0 # Allowed pause between words in seconds, for local utterance_end
+SESSION_QUEUE_PACKETS = 32 # Packets buffered per session before the server stops reading from that client
+MAX_VAD_BACKLOG_PACKETS = 16 # Packets a session may have waiting for VAD before its audio intake pauses
+ENERGY_GATE = False # Skip VAD inference on obvious silence, at the cost of changing some VAD events; see common/energy_gate.py
+THREAD_POOL_SIZE = 4 # Shared by the VAD engine and other blocking work
+VAD_WORKERS = 0 # Processes running VAD, with sessions spread across them; 0 runs VAD in a thread of the server process
+
+# Avoid changing these directly
+MIN_SILENCE_DURATION_MS = MIN_SILENCE_DURATION_MULTIPLIER * VAD_CHUNK_DURATION * 1000
+BYTES_PER_SAMPLE = 2 # int16
+
+
+class HeuristicSession:
+    """
+    HeuristicSession runs one independent VADHeuristic pipeline inside the server's event loop:
+    it forwards a client's audio to its own Deepgram connection and to the shared VAD engine, and
+    streams completed utterances back to the client.
+
+    Utterances are sent by one writer task per session, in the order they complete. If a send
+    fails, e.g. because the client went away, the session stops taking audio and closes.
+
+    All heuristic processing for a session happens on the event loop thread, so VAD events coming
+    from the engine thread are handed over with `call_soon_threadsafe`.
+
+    Multichannel audio, e.g. both sides of a call, is endpointed per channel within the session:
+    each channel has its own VAD stream in the engine and its own VADHeuristic, and utterances
+    sent to the client carry their channel.
+    """
+
+    def __init__(self, session_id: int, sample_rate: int, manager: "SessionManager", send_line, channels: int = 1):
+        """
+        Initializes the HeuristicSession.
+
+        Args:
+            session_id (int): Unique id of the session in the manager.
+            sample_rate (int): Sample rate of the client's int16 PCM.
+            manager (SessionManager): The manager owning the shared VAD engine and Deepgram client.
+            send_line (Callable): Coroutine function sending one line of text to the client.
+            channels (int): Interleaved channels in the client's PCM.
+        """
+        self.session_id = session_id
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.manager = manager
+        self.send_line = send_line
+        self.heuristics = [VADHeuristic(pause_threshold=PAUSE_THRESHOLD) for _ in range(channels)]
+        self.heuristic = self.heuristics[0] if channels == 1 else MultichannelHeuristic(self.heuristics)
+        self.clock = AudioClock(sample_rate)
+        self.audio_queue = asyncio.Queue(maxsize=SESSION_QUEUE_PACKETS)
+        self.dg_connection = None
+        self.vad_sessions = []
+        self._loop = asyncio.get_running_loop()
+        self._sent_utterances = [0] * channels
+        self._lines = asyncio.Queue() # Lines waiting for the writer task, ended by None
+        self._writer_task = None
+        self.send_error = None # Set when sending to the client failed
+        self._partial_frame = b"" # Bytes of a frame split across client packets
+
+    async def start(self) -> bool:
+        """
+        Opens the session's Deepgram connection and registers it with the VAD engine.
+
+        Returns:
+            bool: False if the Deepgram connection could not be started.
+        """
+        self.dg_connection = self.manager.deepgram.listen.asyncwebsocket.v("1")
+
+        async def on_message(_, result, **kwargs):
+            self._process("transcript", result)
+
+        async def on_utterance_end(_, utterance_end, **kwargs):
+            self._process("utterance_end", utterance_end)
+
+        async def on_error(_, error, **kwargs):
+            print(f"Session {self.session_id} error: {error}")
+
+        self.dg_connection.on(LiveTranscriptionEvents.Transcript, on_message)
+        self.dg_connection.on(LiveTranscriptionEvents.UtteranceEnd, on_utterance_end)
+        self.dg_connection.on(LiveTranscriptionEvents.Error, on_error)
+
+        options = LiveOptions(
+            model="nova-2",
+            language="en",
+            smart_format=True,
+            interim_results=True,
+            utterance_end_ms=max(1000, int(PAUSE_THRESHOLD * 1000)),
+            endpointing=int(MIN_SILENCE_DURATION_MS),
+            encoding="linear16",
+            channels=self.channels,
+            multichannel=self.channels > 1,
+            sample_rate=self.sample_rate
+        )
+        if await self.dg_connection.start(options) is False:
+            return False
+
+        self.vad_sessions = [
+            self.manager.engine.add_session(
+                (self.session_id, channel),
+                lambda speech_dict, channel=channel: self._on_vad_event(speech_dict, channel),
+                self.sample_rate,
+                MIN_SILENCE_DURATION_MS,
+                self.channels,
+                channel
+            )
+            for channel in range(self.channels)
+        ]
+        self._writer_task = asyncio.create_task(self._write_lines())
+        return True
+
+    async def _write_lines(self):
+        while (line := await self._lines.get()) is not None:
+            try:
+                await self.send_line(line)
+            except Exception as error:
+                print(f"Session {self.session_id} send error: {error}")
+                self.send_error = error
+                return
+
+    def _on_vad_event(self, speech_dict, channel: int):
+        # Called from the VAD engine thread
+        if self.channels > 1:
+            speech_dict = {**speech_dict, "channel": channel}
+        self._loop.call_soon_threadsafe(self._process, "vad_event", speech_dict)
+
+    def _process(self, event_type: str, data):
+        self.heuristic.audio_cursor = self.clock.seconds
+        self.heuristic.process({
+            "event_type": event_type,
+            "audio_cursor": self.heuristic.audio_cursor,
+            "data": data
+        })
+        for channel, heuristic in enumerate(self.heuristics):
+            completed_utterances = heuristic.completed_utterances
+            for utterance in completed_utterances.tail(completed_utterances.appended - self._sent_utterances[channel]):
+                self._lines.put_nowait(json.dumps({"type": "utterance", **utterance.to_dict()}))
+            self._sent_utterances[channel] = completed_utterances.appended
+
+    async def feed(self, data: bytes):
+        """
+        Queues a packet from the client, waiting while the session's queue is full. Waiting here
+        stops the server from reading that client's socket, which applies backpressure upstream.
+        """
+        await self.audio_queue.put(data)
+
+    async def finish(self):
+        await self.audio_queue.put(None)
+
+    async def run(self):
+        """
+        Forwards queued audio to Deepgram and the VAD engine until the client finishes.
+        """
+        while True:
+            data = await self.audio_queue.get()
+            if data is None:
+                break
+            if self.send_error is not None:
+                continue # The client is gone; drop audio until the session finishes
+
+            # Only forward whole frames, so every packet starts on the first channel
+            frame_bytes = BYTES_PER_SAMPLE * self.channels
+            data = self._partial_frame + data
+            whole = len(data) - len(data) % frame_bytes
+            data, self._partial_frame = data[:whole], data[whole:]
+            if not data:
+                continue
+
+            # Let VAD catch up before taking more audio from this session
+            while self.vad_sessions[0].packets.qsize() > MAX_VAD_BACKLOG_PACKETS:
+                await asyncio.sleep(VAD_CHUNK_DURATION)
+
+            self.clock.advance(len(data) // frame_bytes)
+            self._process("tick", None)
+            await self.dg_connection.send(data)
+            for vad_session in self.vad_sessions:
+                self.manager.engine.push(vad_session.session_id, data)
+
+        await self.close()
+
+    async def close(self):
+        # Let the engine process the audio already pushed before dropping the session
+        while any(vad_session.packets.qsize() for vad_session in self.vad_sessions):
+            await asyncio.sleep(VAD_CHUNK_DURATION)
+        await asyncio.sleep(VAD_CHUNK_DURATION)
+        for vad_session in self.vad_sessions:
+            self.manager.engine.remove_session(vad_session.session_id)
+        if self.dg_connection is not None:
+            await self.dg_connection.finish()
+        # Send the utterances completed so far before the connection is closed
+        if self._writer_task is not None:
+            self._lines.put_nowait(None)
+            await self._writer_task
+
+
+class SessionManager:
+    """
+    SessionManager hosts many independent HeuristicSessions in one asyncio event loop. Audio is
+    accepted over raw TCP or a websocket; every session shares one BatchedVADEngine, one
+    Deepgram client and one thread pool. With VAD_WORKERS set, the engine is a VADProcessPool
+    running VAD in worker processes, and this process only routes events to the heuristics.
+
+    Protocol: the client first sends a JSON header, e.g. {"sample_rate": 16000}, as a text line
+    over TCP or a text message over the websocket, then streams int16 PCM. Multichannel clients
+    add "channels", e.g. {"sample_rate": 8000, "channels": 2}, and stream interleaved PCM.
+    Completed utterances are sent back as JSON lines, with a "channel" field for multichannel
+    sessions.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE)
+        if VAD_WORKERS:
+            self.engine = VADProcessPool(VAD_WORKERS, VAD_BACKEND, energy_gate=ENERGY_GATE)
+        else:
+            self.engine = BatchedVADEngine(get_vad_backend(VAD_BACKEND), energy_gate=ENERGY_GATE)
+        self.deepgram = DeepgramClient(DEEPGRAM_API_KEY)
+        self.sessions = {}
+        self.stop_event = threading.Event()
+        self._next_session_id = 0
+
+    async def _run_session(self, header: dict, packets, send_line):
+        """
+        Runs one session until its audio packets are exhausted.
+
+        Args:
+            header (dict): The client's JSON header.
+            packets: Async iterator of raw audio packets from the client.
+            send_line (Callable): Coroutine function sending one line of text to the client.
+        """
+        session_id = self._next_session_id
+        self._next_session_id += 1
+
+        session = HeuristicSession(
+            session_id,
+            int(header.get("sample_rate", DEFAULT_SAMPLE_RATE)),
+            self,
+            send_line,
+            int(header.get("channels", 1))
+        )
+        if not await session.start():
+            await send_line(json.dumps({"type": "error", "message": "Failed to connect to Deepgram"}))
+            return
+
+        self.sessions[session_id] = session
+        run_task = asyncio.create_task(session.run())
+        try:
+            async for data in packets:
+                if session.send_error is not None:
+                    break
+                await session.feed(data)
+        finally:
+            await session.finish()
+            await run_task
+            del self.sessions[session_id]
+
+    async def handle_tcp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        async def send_line(line: str):
+            writer.write(line.encode() + b"\n")
+            await writer.drain()
+
+        async def packets():
+            while data := await reader.read(4096):
+                yield data
+
+        try:
+            header = json.loads(await reader.readline() or "{}")
+            await self._run_session(header, packets(), send_line)
+        finally:
+            writer.close()
+
+    async def handle_websocket(self, websocket):
+        async def send_line(line: str):
+            await websocket.send(line)
+
+        async def packets():
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    yield message
+
+        header = json.loads(await websocket.recv())
+        await self._run_session(header, packets(), send_line)
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        engine_task = loop.run_in_executor(self.executor, self.engine.run, self.stop_event)
+
+        tcp_server = await asyncio.start_server(self.handle_tcp, SERVER_HOST, TCP_PORT)
+        websocket_server = await websockets.serve(self.handle_websocket, SERVER_HOST, WEBSOCKET_PORT)
+        metrics_server = MetricsServer(METRICS_PORT, SERVER_HOST)
+        metrics_server.start()
+        print(f"Listening on tcp://{SERVER_HOST}:{TCP_PORT} and ws://{SERVER_HOST}:{WEBSOCKET_PORT}, metrics on http://{SERVER_HOST}:{METRICS_PORT}/metrics")
+
+        try:
+            await asyncio.Future()
+        finally:
+            tcp_server.close()
+            websocket_server.close()
+            metrics_server.stop()
+            self.stop_event.set()
+            await engine_task
+            if VAD_WORKERS:
+                self.engine.close()
+            self.executor.shutdown()
+
+
+def main():
+    try:
+        asyncio.run(SessionManager().serve())
+    except KeyboardInterrupt:
+        print("Finished")
+
+if __name__ == "__main__":
+    main()